@@ -8,10 +8,23 @@ https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
 """
 
 from channels.routing import ProtocolTypeRouter, URLRouter
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 from django.urls import re_path
 
-from backend.infra.consumers import LobbyConsumer, GameSessionConsumer
+django_asgi_application = get_asgi_application()
+
+from backend.infra.consumers import LobbyConsumer, GameSessionConsumer, ExportConsumer  # noqa: E402 - нужны загруженные модели
+from backend.modules.game_session.event_handlers import schedule_timer_recovery  # noqa: E402
+
+# таймеры восстанавливаются только в процессе сервера, а не в командах manage.py
+if settings.TIMER_RECOVERY_ENABLED:
+    schedule_timer_recovery()
+
+http_urlpatterns = [
+    re_path(r'^api/export/$', ExportConsumer.as_asgi()),
+    re_path(r'', django_asgi_application),
+]
 
 websocket_urlpatterns = [
     re_path(r'^ws/lobby/$', LobbyConsumer.as_asgi()),
@@ -19,6 +32,6 @@ websocket_urlpatterns = [
 ]
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": URLRouter(http_urlpatterns),
     "websocket": URLRouter(websocket_urlpatterns),
 })
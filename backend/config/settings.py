@@ -1,4 +1,5 @@
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -13,6 +14,7 @@ DEBUG = 'DJANGO_DEBUG' in os.environ
 
 ALLOWED_HOSTS = [os.environ.get('HOST')]
 CORS_ORIGIN_ALLOW_ALL = True
+CORS_EXPOSE_HEADERS = ['ETag', 'X-Total-Count', 'X-Sequence', 'X-Next-Cursor']
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -37,6 +39,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'backend.infra.http.middleware.IdentityMapMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.config.urls'
@@ -118,5 +121,41 @@ CHANNEL_LAYERS = {
     }
 }
 
+# 'db' - каждое действие читает и пишет сессию в БД,
+# 'memory' - активные сессии хранятся в памяти процесса и записываются в БД в фоне (только для одного воркера)
+GAME_SESSION_STORAGE = os.environ.get('GAME_SESSION_STORAGE', 'db')
+GAME_SESSION_FLUSH_INTERVAL = 5
+# наибольшая пауза в секундах между повторными попытками записать сессию, запись которой не удалась
+GAME_SESSION_FLUSH_MAX_BACKOFF = 60
+
+# количество игр, содержимое которых хранится в памяти процесса
+GAME_CACHE_SIZE = int(os.environ.get('GAME_CACHE_SIZE', 100))
+
+# время в секундах, в течение которого страницы списка игр отдаются из памяти процесса, и количество таких страниц
+GAME_LIST_CACHE_TTL = 10
+GAME_LIST_CACHE_SIZE = 256
+
+# наибольший размер в байтах тела запроса импорта игр, тело читается построчно по мере записи игр
+GAME_IMPORT_MAX_SIZE = 64 * 1024 * 1024
+
+# количество строк, которое экспорт читает из курсора БД за один раз
+EXPORT_CHUNK_SIZE = 2000
+
+# 'sync' - обработчики событий выполняются в запросе при сохранении сущности,
+# 'async' - события ставятся в очередь после коммита транзакции и обрабатываются фоновыми потоками
+EVENT_DISPATCH_MODE = os.environ.get('EVENT_DISPATCH_MODE', 'sync')
+EVENT_DISPATCH_WORKERS = 4
+EVENT_QUEUE_SIZE = 1000
+# сколько секунд запрос ждёт места в заполненной очереди, прежде чем обработать события сам
+EVENT_QUEUE_TIMEOUT = 0.1
+
+# восстановление таймеров из БД запускает точка входа ASGI; тесты импортируют её до создания тестовой БД
+# и проверяют восстановление сами
+TIMER_RECOVERY_ENABLED = sys.argv[1:2] != ['test']
+
+# время в секундах, в течение которого нажатия на кнопку ответа считаются одновременными;
+# нажатия сравниваются только внутри одного процесса
+BUZZER_WINDOW = 0.05
+
 db_from_env = dj_database_url.config(conn_max_age=500)
 DATABASES['default'].update(db_from_env)
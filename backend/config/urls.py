@@ -17,8 +17,8 @@ from django.contrib import admin
 from django.urls import path, re_path
 from django.views.generic import TemplateView
 
-from backend.infra.http.views import UserListView, UserView, SessionView, GameListView, GameSessionListView, \
-    GameSessionViewSet
+from backend.infra.http.views import UserListView, UserView, SessionView, GameListView, GameImportView, \
+    GameSessionListView, GameSessionViewSet, MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,6 +27,8 @@ urlpatterns = [
     path('api/sessions/', SessionView.as_view({'post': 'authenticate'})),
     path('api/sessions/new_token/', SessionView.as_view({'post': 'get_access_token'})),
     path('api/games/', GameListView.as_view()),
+    path('api/games/import/', GameImportView.as_view()),
+    path('api/metrics/', MetricsView.as_view()),
     path('api/game_sessions/', GameSessionListView.as_view()),
     path('api/game_sessions/current/', GameSessionViewSet.as_view({'get': 'get_state'})),
     path('api/game_sessions/actions/join/', GameSessionViewSet.as_view({'post': 'join'})),
@@ -1,13 +1,29 @@
-from abc import ABC
-from typing import Optional, List, TYPE_CHECKING
+from abc import ABC, abstractmethod
+from typing import Optional, List, Dict, Tuple, Any, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .events import Event
 
 
 class Entity(ABC):
+    __slots__ = ('id',)
+
     def __init__(self, id: Optional[int] = None):
         self.id = id
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+
+class AggregateRoot(Entity, ABC):
+    """
+    Сущность, сохраняемая репозиторием, события которой рассылаются после сохранения.
+    """
+
+    __slots__ = ('_events',)
+
+    def __init__(self, id: Optional[int] = None):
+        super().__init__(id)
         self._events: List[Event] = []
 
     def add_event(self, event):
@@ -19,5 +35,34 @@ class Entity(ABC):
     def clear_events(self):
         self._events.clear()
 
-    def __eq__(self, other):
-        return self.id == other.id
+
+class TrackedEntity(Entity, ABC):
+    """
+    Сущность, запоминающая своё состояние на момент загрузки или сохранения,
+    чтобы репозиторий записывал только изменившиеся поля.
+    Наследники объявляют _persisted_state в __slots__, чтобы их можно было сочетать с AggregateRoot.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, id: Optional[int] = None):
+        super().__init__(id)
+        self._persisted_state: Optional[Dict[str, Any]] = None
+
+    @abstractmethod
+    def get_state(self) -> Dict[str, Any]:
+        pass
+
+    @property
+    def is_tracked(self) -> bool:
+        return self._persisted_state is not None
+
+    def mark_persisted(self):
+        self._persisted_state = self.get_state()
+
+    def get_changes(self) -> Dict[str, Tuple[Any, Any]]:
+        persisted_state = self._persisted_state or {}
+
+        return {field: (persisted_state.get(field), value)
+                for field, value in self.get_state().items()
+                if not self.is_tracked or persisted_state[field] != value}
@@ -1,12 +1,135 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Hashable, Optional, Tuple, Type
 
-from backend.core.entities import Entity
+from django.db import transaction
+
+from backend.core.entities import AggregateRoot
 from backend.infra.dispatcher import EventDispatcher
 
+_identity_map: ContextVar[Optional[Dict[Hashable, AggregateRoot]]] = ContextVar('identity_map', default=None)
+_unit_of_work: ContextVar[Optional['UnitOfWork']] = ContextVar('unit_of_work', default=None)
+
+
+@contextmanager
+def identity_map():
+    """
+    Включает на время запроса или команды карту загруженных сущностей:
+    повторно запрошенная сущность берётся из карты без обращения к БД.
+    Карта очищается при любом сохранении, так как оно может изменить другие сущности.
+    """
+    if _identity_map.get() is not None:
+        yield
+        return
+
+    token = _identity_map.set(dict())
+    try:
+        yield
+    finally:
+        _identity_map.reset(token)
+
+
+class UnitOfWork:
+    """
+    Откладывает создание, изменение и удаление сущностей до завершения действия: каждая сущность записывается
+    один раз, сколько бы раз её ни сохраняли, все записи выполняются в одной транзакции,
+    а события рассылаются только после её фиксации.
+    Идентификатор новой сущности появляется при записи, то есть после выхода из блока единицы работы.
+    """
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+
+    def __init__(self):
+        self._entities: Dict[int, Tuple[Type['Repository'], AggregateRoot, str]] = dict()
+
+    def register(self, repository: Type['Repository'], entity: AggregateRoot, operation: str):
+        registered = self._entities.get(id(entity))
+        if registered and registered[2] == UnitOfWork.DELETED:
+            return
+
+        if registered and registered[2] == UnitOfWork.CREATED:
+            # новая сущность, удалённая до записи, не записывается вовсе, а изменённая - создаётся
+            if operation == UnitOfWork.DELETED:
+                del self._entities[id(entity)]
+            return
+
+        self._entities[id(entity)] = (repository, entity, operation)
+
+    def flush(self):
+        with transaction.atomic():
+            for repository, entity, operation in self._entities.values():
+                if operation == UnitOfWork.CREATED:
+                    repository._create(entity)
+                elif operation == UnitOfWork.UPDATED:
+                    repository._update(entity)
+                elif operation == UnitOfWork.DELETED:
+                    repository._delete(entity)
+
+    def dispatch_events(self):
+        for _, entity, _ in self._entities.values():
+            EventDispatcher.dispatch_events(entity)
+            entity.clear_events()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Выполняет действие как единицу работы: с картой сущностей, записью всех изменений одной транзакцией
+    при выходе из блока и рассылкой событий после её фиксации. Вложенная единица работы присоединяется к внешней.
+    """
+    if _unit_of_work.get() is not None:
+        yield
+        return
+
+    uow = UnitOfWork()
+    token = _unit_of_work.set(uow)
+    try:
+        with identity_map():
+            try:
+                yield
+                uow.flush()
+            finally:
+                # после записи или отката загруженные сущности устарели, повторная попытка загрузит их заново
+                Repository._clear_identities()
+
+            uow.dispatch_events()
+    finally:
+        _unit_of_work.reset(token)
+
 
 class Repository(ABC):
+    @staticmethod
+    def _get_identity(key: Hashable) -> Optional[AggregateRoot]:
+        identities = _identity_map.get()
+
+        return identities.get(key) if identities is not None else None
+
+    @staticmethod
+    def _put_identity(entity: AggregateRoot, *keys: Hashable):
+        identities = _identity_map.get()
+        if identities is not None:
+            for key in keys:
+                identities[key] = entity
+
+    @staticmethod
+    def _clear_identities():
+        identities = _identity_map.get()
+        if identities is not None:
+            identities.clear()
+
     @classmethod
-    def save(cls, entity: Entity) -> Entity:
+    def save(cls, entity: AggregateRoot) -> AggregateRoot:
+        uow = _unit_of_work.get()
+        if uow:
+            uow.register(cls, entity, UnitOfWork.UPDATED if entity.id else UnitOfWork.CREATED)
+
+            return entity
+
+        cls._clear_identities()
+
         if entity.id:
             entity = cls._update(entity)
         else:
@@ -19,20 +142,27 @@ class Repository(ABC):
 
     @staticmethod
     @abstractmethod
-    def _create(entity: Entity) -> Entity:
+    def _create(entity: AggregateRoot) -> AggregateRoot:
         pass
 
     @staticmethod
     @abstractmethod
-    def _update(entity: Entity) -> Entity:
+    def _update(entity: AggregateRoot) -> AggregateRoot:
         pass
 
     @classmethod
-    def delete(cls, entity: Entity):
+    def delete(cls, entity: AggregateRoot):
+        uow = _unit_of_work.get()
+        if uow:
+            uow.register(cls, entity, UnitOfWork.DELETED)
+            return
+
+        cls._clear_identities()
+
         EventDispatcher.dispatch_events(entity)
         cls._delete(entity)
 
     @staticmethod
     @abstractmethod
-    def _delete(entity: Entity):
+    def _delete(entity: AggregateRoot):
         pass
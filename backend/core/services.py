@@ -0,0 +1,31 @@
+from functools import wraps
+from typing import Callable, Awaitable
+
+from channels.db import database_sync_to_async
+
+from backend.infra.notifiers import Notifications, notification_batch, async_notify
+
+
+def to_async(method: Callable) -> Callable[..., Awaitable]:
+    """
+    Асинхронная версия метода сервиса для вызова из цикла событий.
+    Метод выполняется в пуле потоков целиком, так как загрузка, изменение и сохранение агрегата
+    должны идти под одной блокировкой сессии, а ORM синхронная.
+    Уведомления, отправленные в потоке, собираются и отправляются уже из цикла событий,
+    без перехода обратно через async_to_sync.
+    """
+
+    @wraps(method)
+    async def async_method(self, *args, **kwargs):
+        notifications: Notifications = dict()
+
+        def collecting_method():
+            with notification_batch(notifications):
+                return method(self, *args, **kwargs)
+
+        try:
+            return await database_sync_to_async(collecting_method, thread_sensitive=False)()
+        finally:
+            await async_notify(notifications)
+
+    return async_method
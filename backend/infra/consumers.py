@@ -1,56 +1,247 @@
 import json
-from typing import Dict
+from time import monotonic
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.http import AsyncHttpConsumer
+from channels.generic.websocket import AsyncWebsocketConsumer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+from backend.core.repos import identity_map
+from backend.infra.export import EXPORT_SOURCES, export_lines, stream_in_thread
+from backend.infra.registry import game_session_registry
+from backend.infra.http.serializers import JoinGameSessionSerializer, QuestionChoiceSerializer, \
+    AnswerRequestSerializer
+from backend.modules.game_session.dtos import JoinGameSessionDTO, QuestionChoiceDTO, AnswerRequestDTO
+from backend.modules.game_session.exceptions import GameSessionNotFound, TooManyPlayers, NotCurrentPlayer, \
+    WrongQuestionRequest, AlreadyPlaying, WrongStage, ConcurrentModification
+from backend.modules.game_session.repos import lobby
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.exceptions import UserNotFound
+
+
+class LobbyConsumer(AsyncWebsocketConsumer):
+    """
+    Отправляет изменения списка игровых сессий.
+
+    Клиент, подключившийся с параметром sequence, сразу получает пропущенные изменения или,
+    если их уже нет в буфере, событие resync, после которого список нужно запросить заново.
+    Изменения могут повторяться, клиент пропускает изменения с уже полученными номерами.
+
+    Номера изменений ведёт каждый процесс свой, поэтому снимок списка и подписка сравнимы, только если
+    их обслуживает один процесс. Развёртывание с одним процессом daphne это обеспечивает.
+    """
 
-from asgiref.sync import async_to_sync
-from channels.generic.websocket import WebsocketConsumer
+    groups = ['lobby']
 
+    async def connect(self):
+        await self.accept()
 
-class LobbyConsumer(WebsocketConsumer):
-    groups = ['lobby']
+        query = parse_qs(self.scope['query_string'].decode())
+        try:
+            since = int(query['sequence'][0])
+        except (KeyError, ValueError):
+            return
 
-    def lobby_event(self, event):
+        deltas = lobby.get_deltas(since)
+        if deltas is None:
+            await self.send(json.dumps({'event': 'resync', 'data': {'sequence': lobby.sequence}}))
+        elif deltas:
+            events = [{'event': event_type, 'data': data, 'sequence': sequence}
+                      for sequence, event_type, data in deltas]
+            await self.send(json.dumps({'events': events}, ensure_ascii=False))
+
+    async def lobby_event(self, event):
         event_type = event.pop('type')
-        self.send(json.dumps(event, ensure_ascii=False))
+        await self.send(json.dumps(event, ensure_ascii=False))
         event['type'] = event_type
 
 
-class GameSessionConsumer(WebsocketConsumer):
-    group_names: Dict[str, str] = dict()
+class GameSessionConsumer(AsyncWebsocketConsumer):
+    """
+    Отправляет игровые события и принимает игровые команды.
+
+    Пользователь аутентифицируется один раз при подключении по access-токену из параметра token.
+    Команда - сообщение {"id": ..., "command": ..., "data": {...}}, ответ на неё -
+    {"id": ..., "status": "ok", "data": {...}} или {"id": ..., "status": "error", "code": ...}.
+    """
+
+    service = GameSessionService()
+
+    # команда: (метод сервиса, сериализатор данных, DTO данных)
+    commands = {
+        'get_state': ('async_get_game_state', None, None),
+        'join': ('async_join', JoinGameSessionSerializer, JoinGameSessionDTO),
+        'leave': ('async_leave', None, None),
+        'start': ('async_start', None, None),
+        'choose_question': ('async_choose_question', QuestionChoiceSerializer, QuestionChoiceDTO),
+        'allow_answers': ('async_allow_answers', None, None),
+        'submit_answer': ('async_submit_answer', AnswerRequestSerializer, AnswerRequestDTO),
+        'confirm_answer': ('async_confirm_answer', None, None),
+        'reject_answer': ('async_reject_answer', None, None),
+    }
+    membership_commands = {'join', 'leave'}
+    command_errors = (GameSessionNotFound, TooManyPlayers, NotCurrentPlayer, WrongQuestionRequest,
+                      AlreadyPlaying, WrongStage, ConcurrentModification, UserNotFound)
+
+    async def connect(self):
+        self.username: Optional[str] = None
+        self.group_name: Optional[str] = None
+
+        await self.accept()
+
+        token = parse_qs(self.scope['query_string'].decode()).get('token')
+        if token:
+            self.username = await self._authenticate(token[0])
+            if not self.username:
+                await self.close(code=4001)
+                return
+
+            await self._update_group(self.username)
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        received_at = monotonic()
+        data = json.loads(text_data)
+        if data and 'command' in data:
+            await self._handle_command(data, received_at)
+        elif data and 'username' in data:
+            # сокет, аутентифицированный токеном, не может подписаться на группу другого пользователя
+            if not self.username:
+                await self._update_group(data['username'])
+        else:
+            await self.close()
 
-    @classmethod
-    def add_user(cls, username: str, game_session_id: int):
-        cls.group_names[username] = f'game_session_{game_session_id}'
+    @database_sync_to_async
+    def _authenticate(self, token: str) -> Optional[str]:
+        authentication = JWTAuthentication()
+        try:
+            user = authentication.get_user(authentication.get_validated_token(token))
+        except (InvalidToken, AuthenticationFailed):
+            return None
 
-        print(f'added {username}@{game_session_id} to notifier')
+        return user.username
 
-    @classmethod
-    def remove_user(cls, username: str):
-        cls.group_names.pop(username, None)
+    async def _handle_command(self, data: Dict, received_at: float):
+        command_id = data.get('id')
 
-        print(f'removed {username} from notifier')
+        if not self.username:
+            return await self._send_error(command_id, 'not_authenticated')
 
-    @classmethod
-    def remove_group(cls, game_session_id: int):
-        group_name = f'game_session_{game_session_id}'
-        cls.group_names = {k: v for k, v in cls.group_names.items() if v != group_name}
+        if data['command'] not in self.commands:
+            return await self._send_error(command_id, 'unknown_command')
 
-        print(f'removed group {group_name} from notifier')
+        method_name, serializer_class, dto_class = self.commands[data['command']]
 
-    def receive(self, text_data=None, bytes_data=None):
-        data = json.loads(text_data)
-        if data and 'username' in data:
-            self._add_user_to_group(data['username'])
-        else:
-            self.close()
+        args = [self.username]
+        if serializer_class:
+            serializer = serializer_class(data=data.get('data') or {})
+            if not serializer.is_valid():
+                return await self._send_error(command_id, 'invalid_request')
+
+            args.append(dto_class(**serializer.validated_data))
+
+        if data['command'] == 'submit_answer':
+            args.append(received_at)
+
+        try:
+            with identity_map():
+                response_dto = await getattr(self.service, method_name)(*args)
+        except self.command_errors as e:
+            return await self._send_error(command_id, e.code)
+
+        # после входа в сессию или выхода из неё сокет переходит в группу новой сессии
+        if not self.group_name or data['command'] in self.membership_commands:
+            await self._update_group(self.username)
+
+        await self.send(json.dumps(dict(
+            id=command_id,
+            status='ok',
+            data=response_dto.to_response() if response_dto else None
+        ), ensure_ascii=False))
+
+    async def _send_error(self, command_id, code: str):
+        await self.send(json.dumps(dict(
+            id=command_id,
+            status='error',
+            code=code
+        )))
+
+    async def _update_group(self, username: str):
+        group_name = await database_sync_to_async(game_session_registry.get_group_name)(username)
+        if group_name == self.group_name:
+            return
 
-    def _add_user_to_group(self, username: str):
-        async_to_sync(self.channel_layer.group_add)(self.group_names[username], self.channel_name)
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if group_name:
+            await self.channel_layer.group_add(group_name, self.channel_name)
+        self.group_name = group_name
 
-        print(f'added {username} to group')
+        print(f'moved {username} to group {group_name}')
 
-    def game_session_event(self, event):
+    async def game_session_event(self, event):
         event_type = event.pop('type')
-        self.send(json.dumps(event, ensure_ascii=False))
+        await self.send(json.dumps(event, ensure_ascii=False))
         event['type'] = event_type
 
 
+class ExportConsumer(AsyncHttpConsumer):
+    """
+    Выгружает игры и результаты завершённых сессий в JSONL, параметр type ограничивает типы объектов.
+    Доступно администраторам, аутентифицированным по access-токену в заголовке Authorization.
+
+    Django 4.0 перебирает StreamingHttpResponse синхронно прямо в цикле событий, поэтому выгрузка
+    отдаётся потребителем, который ждёт блоки асинхронно.
+    """
+
+    async def handle(self, body):
+        if self.scope['method'] != 'GET':
+            return await self._send_error(405, 'method_not_allowed')
+
+        is_admin = await self._authenticate_admin()
+        if is_admin is None:
+            return await self._send_error(401, 'not_authenticated')
+        if not is_admin:
+            return await self._send_error(403, 'forbidden')
+
+        types = parse_qs(self.scope['query_string'].decode()).get('type') or list(EXPORT_SOURCES)
+        if not set(types) <= set(EXPORT_SOURCES):
+            return await self._send_error(400, 'invalid_request')
+
+        await self.send_headers(headers=[(b'Content-Type', b'application/x-ndjson'),
+                                         (b'Content-Disposition', b'attachment; filename="export.jsonl"')])
+
+        chunks = stream_in_thread(export_lines(types))
+        try:
+            async for chunk in chunks:
+                await self.send_body(chunk, more_body=True)
+        finally:
+            await chunks.aclose()
+
+        await self.send_body(b'')
+
+    @database_sync_to_async
+    def _authenticate_admin(self) -> Optional[bool]:
+        authentication = JWTAuthentication()
+        header = dict(self.scope['headers']).get(b'authorization')
+        raw_token = authentication.get_raw_token(header) if header else None
+        if not raw_token:
+            return None
+
+        try:
+            user = authentication.get_user(authentication.get_validated_token(raw_token))
+        except (InvalidToken, AuthenticationFailed):
+            return None
+
+        return user.is_staff
+
+    async def _send_error(self, status: int, code: str):
+        await self.send_response(status,
+                                 json.dumps(dict(code=code)).encode(),
+                                 headers=[(b'Content-Type', b'application/json')])
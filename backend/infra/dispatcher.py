@@ -1,25 +1,127 @@
-from typing import TYPE_CHECKING, Dict, Type, List, Callable
+from queue import Queue, Full
+from threading import Thread, Lock
+from time import monotonic
+from typing import TYPE_CHECKING, Dict, Set, Type, List, Callable
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+
+from backend.infra.notifiers import notification_batch
 
 if TYPE_CHECKING:
-    from ..core.entities import Entity
+    from ..core.entities import AggregateRoot
     from ..core.events import Event
 
 
 class EventDispatcher:
     handlers: Dict[Type['Event'], List[Callable[['Event'], None]]] = {}
+    immediate_handlers: Set[Callable[['Event'], None]] = set()
+
+    _queues: List[Queue] = []
+    _workers_lock = Lock()
+
+    _metrics_lock = Lock()
+    _delivered_count = 0
+    _inline_count = 0
+    _total_latency = 0.0
+    _max_latency = 0.0
 
     @classmethod
     # TODO поменять местами аргументы
-    def register_handler(cls, handler: Callable[['Event'], None], event_type: Type['Event']):
+    def register_handler(cls,
+                         handler: Callable[['Event'], None],
+                         event_type: Type['Event'],
+                         is_immediate: bool = False):
+        """
+        Обработчики с is_immediate меняют состояние процесса, от которого зависят следующие действия,
+        поэтому выполняются при сохранении сущности и в асинхронном режиме.
+        """
         event_handlers = cls.handlers.get(event_type)
         if event_handlers:
             event_handlers.append(handler)
         else:
             cls.handlers[event_type] = [handler]
 
+        if is_immediate:
+            cls.immediate_handlers.add(handler)
+
     @classmethod
-    def dispatch_events(cls, entity: 'Entity'):
-        events = entity.get_events()
-        for event in events:
-            for handler in cls.handlers[type(event)]:
-                handler(event)
+    def dispatch_events(cls, entity: 'AggregateRoot'):
+        events = list(entity.get_events())
+        if not events:
+            return
+
+        if settings.EVENT_DISPATCH_MODE == 'async':
+            cls._handle(events, lambda handler: handler in cls.immediate_handlers)
+
+            # события одной сущности попадают в одну очередь, чтобы сохранить их порядок
+            partition_key = hash((type(entity), entity.id))
+            transaction.on_commit(lambda: cls._enqueue(partition_key, events))
+        else:
+            cls._handle(events)
+
+    @classmethod
+    def get_metrics(cls) -> Dict[str, float]:
+        with cls._metrics_lock:
+            return dict(
+                queue_depth=sum(queue.qsize() for queue in cls._queues),
+                delivered_count=cls._delivered_count,
+                inline_count=cls._inline_count,
+                avg_latency=cls._total_latency / cls._delivered_count if cls._delivered_count else 0.0,
+                max_latency=cls._max_latency
+            )
+
+    @classmethod
+    def _handle(cls, events: List['Event'], is_selected: Callable[[Callable], bool] = lambda handler: True):
+        with notification_batch():
+            for event in events:
+                for handler in cls.handlers[type(event)]:
+                    if is_selected(handler):
+                        handler(event)
+
+    @classmethod
+    def _enqueue(cls, partition_key: int, events: List['Event']):
+        queues = cls._get_queues()
+        try:
+            queues[partition_key % len(queues)].put((monotonic(), events), timeout=settings.EVENT_QUEUE_TIMEOUT)
+        except Full:
+            # запрос не ждёт освобождения очереди, события обрабатываются в нём самом,
+            # поэтому они могут обогнать события этой сущности, оставшиеся в очереди
+            print(f'event queue is full, dispatching {[type(event).__name__ for event in events]} inline')
+
+            with cls._metrics_lock:
+                cls._inline_count += 1
+
+            cls._deliver(events)
+
+    @classmethod
+    def _deliver(cls, events: List['Event']):
+        try:
+            cls._handle(events, lambda handler: handler not in cls.immediate_handlers)
+        except Exception as e:
+            print(f'failed to dispatch {[type(event).__name__ for event in events]}: {e!r}')
+
+    @classmethod
+    def _get_queues(cls) -> List[Queue]:
+        with cls._workers_lock:
+            if not cls._queues:
+                for index in range(settings.EVENT_DISPATCH_WORKERS):
+                    queue = Queue(maxsize=settings.EVENT_QUEUE_SIZE)
+                    Thread(target=cls._run_worker, args=(queue,), name=f'event_dispatcher_{index}', daemon=True).start()
+                    cls._queues.append(queue)
+
+        return cls._queues
+
+    @classmethod
+    def _run_worker(cls, queue: Queue):
+        while True:
+            enqueued_at, events = queue.get()
+
+            close_old_connections()
+            cls._deliver(events)
+
+            latency = monotonic() - enqueued_at
+            with cls._metrics_lock:
+                cls._delivered_count += 1
+                cls._total_latency += latency
+                cls._max_latency = max(cls._max_latency, latency)
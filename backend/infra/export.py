@@ -0,0 +1,92 @@
+import json
+from queue import Queue, Full, Empty
+from threading import Thread, Event
+from typing import Iterator, Iterable, Callable, Dict, Generator, AsyncIterator
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+
+from backend.core.dtos import ResponseDTO
+from backend.modules.game.services import GameService
+from backend.modules.game_session.services import GameSessionService
+
+EXPORT_BUFFER_SIZE = 64 * 1024
+EXPORT_QUEUE_SIZE = 16
+
+EXPORT_SOURCES: Dict[str, Callable[[], Iterator[ResponseDTO]]] = {
+    'game': GameService().export_games,
+    'game_result': GameSessionService().export_results,
+}
+
+
+def export_lines(types: Iterable[str]) -> Generator[str, None, None]:
+    """
+    JSONL: по объекту в строке, тип объекта указывается в поле type.
+    """
+    for type in types:
+        for dto in EXPORT_SOURCES[type]():
+            yield json.dumps({'type': type, **dto.to_response()}, ensure_ascii=False) + '\n'
+
+
+async def stream_in_thread(lines: Generator[str, None, None]) -> AsyncIterator[bytes]:
+    """
+    Строки читаются из БД в отдельном потоке, а блоки ожидаются в пуле потоков,
+    поэтому ни запросы к БД, ни ожидание блоков не блокируют цикл событий.
+    Ограниченная очередь держит в памяти не больше EXPORT_QUEUE_SIZE блоков по EXPORT_BUFFER_SIZE байт,
+    а при разрыве соединения поток завершается.
+    """
+    queue = Queue(maxsize=EXPORT_QUEUE_SIZE)
+    is_closed = Event()
+    end = object()
+
+    def put(item) -> bool:
+        while not is_closed.is_set():
+            try:
+                queue.put(item, timeout=1)
+                return True
+            except Full:
+                continue
+
+        return False
+
+    def get():
+        # ожидание прерывается, если клиент отключился и поток больше ничего не положит
+        while not is_closed.is_set():
+            try:
+                return queue.get(timeout=1)
+            except Empty:
+                continue
+
+        return end
+
+    def produce():
+        buffer = list()
+        buffer_size = 0
+
+        try:
+            for line in lines:
+                buffer.append(line.encode())
+                buffer_size += len(buffer[-1])
+
+                if buffer_size >= EXPORT_BUFFER_SIZE:
+                    if not put(b''.join(buffer)):
+                        return
+                    buffer, buffer_size = list(), 0
+
+            put(b''.join(buffer))
+        except Exception as e:
+            print(f'failed to export: {e!r}')
+        finally:
+            # курсор должен закрыться до соединения, даже если выгрузка прервана
+            lines.close()
+            put(end)
+            connection.close()
+
+    Thread(target=produce, name='export', daemon=True).start()
+
+    async_get = sync_to_async(get, thread_sensitive=False)
+    try:
+        while (chunk := await async_get()) is not end:
+            yield chunk
+    finally:
+        is_closed.set()
@@ -0,0 +1,58 @@
+import json
+from typing import Iterator, Iterable, List, Any, BinaryIO
+
+from backend.infra.http.serializers import GameSerializer
+from backend.modules.game.dtos import CreateGameDTO
+
+
+class PackStreamTooLarge(Exception):
+    pass
+
+
+def read_lines(stream: BinaryIO, max_size: int) -> Iterator[str]:
+    """
+    Читает поток байтов построчно и прерывает чтение, если прочитано больше max_size байт.
+    """
+    size = 0
+    for line in iter(stream.readline, b''):
+        size += len(line)
+        if size > max_size:
+            raise PackStreamTooLarge
+
+        yield line.decode()
+
+
+class GamePackReader:
+    """
+    Читает игры из JSON-массива или из JSONL (по игре в строке) и проверяет их GameSerializer.
+    JSONL читается построчно, поэтому поток не загружается в память целиком.
+    Некорректные игры пропускаются, их номера в потоке собираются в invalid_indexes.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self.invalid_indexes: List[int] = list()
+
+    def __iter__(self) -> Iterator[CreateGameDTO]:
+        for index, pack in enumerate(self._read_packs()):
+            serializer = GameSerializer(data=pack)
+
+            if serializer.is_valid():
+                yield CreateGameDTO(**serializer.validated_data)
+            else:
+                self.invalid_indexes.append(index)
+
+    def _read_packs(self) -> Iterator[Any]:
+        for line in self._lines:
+            if not line.strip():
+                continue
+
+            if line.lstrip().startswith('['):
+                # JSON-массив может занимать несколько строк, поэтому читается целиком
+                yield from json.loads(line + ''.join(self._lines))
+                return
+
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
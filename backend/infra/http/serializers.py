@@ -1,6 +1,24 @@
+from base64 import b64decode, urlsafe_b64encode
+
 from rest_framework.serializers import Serializer, CharField, IntegerField, ListField, BooleanField
 
 
+class CursorField(CharField):
+    """
+    Курсор страницы в base64, чтобы значение ключа с любыми символами можно было передать в заголовке.
+    """
+
+    def to_internal_value(self, data):
+        try:
+            return b64decode(super().to_internal_value(data), altchars=b'-_', validate=True).decode()
+        except ValueError:
+            self.fail('invalid')
+
+    @staticmethod
+    def encode(value: str) -> str:
+        return urlsafe_b64encode(value.encode()).decode()
+
+
 class CreateUserSerializer(Serializer):
     username = CharField()
     nickname = CharField(required=False)
@@ -27,8 +45,21 @@ class JoinGameSessionSerializer(Serializer):
     creator = CharField()
 
 
+class LobbyQuerySerializer(Serializer):
+    game = CharField(source='game_name', required=False)
+    hasFreeSeats = BooleanField(source='has_free_seats', default=False)
+    offset = IntegerField(min_value=0, default=0)
+    limit = IntegerField(min_value=1, max_value=100, required=False)
+
+
+class GameListQuerySerializer(Serializer):
+    search = CharField(max_length=50, allow_blank=True, required=False)
+    cursor = CursorField(required=False)
+    limit = IntegerField(min_value=1, max_value=100, required=False)
+
+
 class ThemeSerializer(Serializer):
-    name = CharField()
+    name = CharField(max_length=50)
     questions = ListField(child=QuestionSerializer())
 
 
@@ -37,7 +68,7 @@ class RoundSerializer(Serializer):
 
 
 class GameSerializer(Serializer):
-    name = CharField()
+    name = CharField(max_length=50)
     rounds = ListField(child=RoundSerializer())
     finalRound = QuestionSerializer(source='final_round')
 
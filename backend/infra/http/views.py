@@ -1,4 +1,12 @@
+import io
+import json
+from hashlib import md5
+from time import monotonic
+from typing import Dict, Optional
+
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
 
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
@@ -9,22 +17,38 @@ from rest_framework.viewsets import ViewSet
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
+from backend.infra.dispatcher import EventDispatcher
+from backend.infra.game_packs import GamePackReader, PackStreamTooLarge, read_lines
 from backend.infra.http.serializers import CreateUserSerializer, LoginUserSerializer, \
     ChangeUserSerializer, GameSerializer, CreateGameSessionSerializer, \
-    QuestionChoiceSerializer, AnswerRequestSerializer, JoinGameSessionSerializer
+    QuestionChoiceSerializer, AnswerRequestSerializer, JoinGameSessionSerializer, LobbyQuerySerializer, \
+    GameListQuerySerializer, CursorField
 from backend.modules.game.exceptions import GameAlreadyExists, GameNotFound
 from backend.modules.game.services import GameService
 from backend.modules.game_session.dtos import CreateGameSessionDTO, JoinGameSessionDTO, QuestionChoiceDTO, \
-    AnswerRequestDTO
-from backend.modules.game.dtos import CreateGameDTO
+    AnswerRequestDTO, LobbyQueryDTO
+from backend.modules.game.dtos import CreateGameDTO, GameListQueryDTO
 from backend.modules.game_session.exceptions import GameSessionNotFound, TooManyPlayers, NotCurrentPlayer, \
-    WrongQuestionRequest, AlreadyPlaying, WrongStage, AlreadyCreated
+    WrongQuestionRequest, AlreadyPlaying, WrongStage, AlreadyCreated, ConcurrentModification
 from backend.modules.game_session.services import GameSessionService
 from backend.modules.user.dtos import CreateUserDTO, LoginUserDTO, ChangeUserDTO
 from backend.modules.user.exceptions import UserAlreadyExists, UserNotFound, UserNicknameAlreadyExists
 from backend.modules.user.services import UserService
 
 
+def etag_response(request, data, headers: Optional[Dict] = None) -> Response:
+    """
+    Отвечает 304, если клиент уже получил такие же данные.
+    """
+    etag = '"{}"'.format(md5(json.dumps(data, sort_keys=True).encode()).hexdigest())
+    headers = {**(headers or {}), 'ETag': etag}
+
+    if etag in request.headers.get('If-None-Match', ''):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(data=data, headers=headers)
+
+
 class UserListView(APIView):
     permission_classes = [AllowAny]
 
@@ -129,9 +153,42 @@ class GameListView(APIView):
         return Response(status=status.HTTP_201_CREATED)
 
     def get(self, request):
-        game_description_dtos = self.service.get_all_descriptions()
+        serializer = GameListQuerySerializer(data=request.query_params)
+
+        try:
+            serializer.is_valid(raise_exception=True)
+        except ValidationError:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={'code': 'invalid_request'})
+
+        game_description_dtos, next_cursor = self.service.get_all_descriptions(
+            GameListQueryDTO(**serializer.validated_data)
+        )
+        headers = {'X-Next-Cursor': CursorField.encode(next_cursor)} if next_cursor else None
 
-        return Response(data=[dto.to_response() for dto in game_description_dtos])
+        return etag_response(request, [dto.to_response() for dto in game_description_dtos], headers)
+
+
+class GameImportView(APIView):
+    service = GameService()
+
+    def post(self, request):
+        """
+        Принимает JSON-массив игр или JSONL, некорректные игры пропускаются.
+        Тело читается построчно, а не целиком, и не может быть больше GAME_IMPORT_MAX_SIZE байт.
+        """
+        if int(request.META.get('CONTENT_LENGTH') or 0) > settings.GAME_IMPORT_MAX_SIZE:
+            return Response(status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, data={'code': 'request_too_large'})
+
+        try:
+            reader = GamePackReader(read_lines(request.stream or io.BytesIO(), settings.GAME_IMPORT_MAX_SIZE))
+            result_dto = self.service.import_games(request.user.username, reader)
+        except PackStreamTooLarge:
+            return Response(status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, data={'code': 'request_too_large'})
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={'code': 'invalid_request'})
+
+        return Response(status=status.HTTP_201_CREATED,
+                        data={**result_dto.to_response(), 'invalidIndexes': reader.invalid_indexes})
 
 
 class GameSessionListView(APIView):
@@ -156,10 +213,46 @@ class GameSessionListView(APIView):
         return Response(status=status.HTTP_201_CREATED, data=game_state_dto.to_response())
 
     def get(self, request):
-        game_session_description_dtos = self.service.get_all_descriptions(request.user.username
-                                                                          if request.user != AnonymousUser else None)
+        serializer = LobbyQuerySerializer(data=request.query_params)
 
-        return Response(data=[dto.to_response() for dto in game_session_description_dtos])
+        try:
+            serializer.is_valid(raise_exception=True)
+        except ValidationError:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={'code': 'invalid_request'})
+
+        game_session_description_dtos, total_count, sequence = self.service.get_all_descriptions(
+            request.user.username if request.user != AnonymousUser else None,
+            LobbyQueryDTO(**serializer.validated_data)
+        )
+
+        return etag_response(request,
+                             [dto.to_response() for dto in game_session_description_dtos],
+                             headers={'X-Total-Count': total_count, 'X-Sequence': sequence})
+
+
+class MetricsView(APIView):
+    """
+    Счётчики этого процесса, доступны администраторам.
+    """
+
+    game_session_service = GameSessionService()
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return Response(status=status.HTTP_403_FORBIDDEN, data={'code': 'forbidden'})
+
+        event_metrics = EventDispatcher.get_metrics()
+
+        return Response(data=dict(
+            conflicts=self.game_session_service.get_conflict_metrics().to_response(),
+            events={
+                'queueDepth': event_metrics['queue_depth'],
+                'deliveredCount': event_metrics['delivered_count'],
+                'inlineCount': event_metrics['inline_count'],
+                'avgLatency': event_metrics['avg_latency'],
+                'maxLatency': event_metrics['max_latency']
+            }
+        ))
 
 
 class GameSessionViewSet(ViewSet):
@@ -167,11 +260,14 @@ class GameSessionViewSet(ViewSet):
 
     def get_state(self, request):
         try:
-            game_state_dto = self.service.get_game_state(request.user.username)
+            snapshot = self.service.get_game_state_snapshot(request.user.username)
         except GameSessionNotFound as e:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'code': e.code})
 
-        return Response(data=game_state_dto.to_response())
+        if snapshot.etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': snapshot.etag})
+
+        return HttpResponse(snapshot.content, content_type='application/json', headers={'ETag': snapshot.etag})
 
     def join(self, request):
         serializer = JoinGameSessionSerializer(data=request.data)
@@ -184,6 +280,8 @@ class GameSessionViewSet(ViewSet):
             return Response(status=status.HTTP_400_BAD_REQUEST, data={'code': 'invalid_request'})
         except GameSessionNotFound as e:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'code': e.code})
+        except ConcurrentModification as e:
+            return Response(status=status.HTTP_409_CONFLICT, data={'code': e.code})
         except (TooManyPlayers, AlreadyPlaying) as e:
             return Response(status=status.HTTP_409_CONFLICT, data={'code': e.code})
 
@@ -194,6 +292,8 @@ class GameSessionViewSet(ViewSet):
             self.service.leave(request.user.username)
         except GameSessionNotFound as e:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'code': e.code})
+        except ConcurrentModification as e:
+            return Response(status=status.HTTP_409_CONFLICT, data={'code': e.code})
 
         return Response(status=status.HTTP_201_CREATED)
 
@@ -202,6 +302,8 @@ class GameSessionViewSet(ViewSet):
             self.service.start(request.user.username)
         except GameSessionNotFound as e:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'code': e.code})
+        except ConcurrentModification as e:
+            return Response(status=status.HTTP_409_CONFLICT, data={'code': e.code})
         except WrongStage as e:
             return Response(status=status.HTTP_403_FORBIDDEN, data={'code': e.code})
 
@@ -220,6 +322,8 @@ class GameSessionViewSet(ViewSet):
             return Response(status=status.HTTP_422_UNPROCESSABLE_ENTITY, data={'code': e.code})
         except GameSessionNotFound as e:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'code': e.code})
+        except ConcurrentModification as e:
+            return Response(status=status.HTTP_409_CONFLICT, data={'code': e.code})
         except (NotCurrentPlayer, WrongStage) as e:
             return Response(status=status.HTTP_403_FORBIDDEN, data={'code': e.code})
 
@@ -230,20 +334,26 @@ class GameSessionViewSet(ViewSet):
             current_question_answer_dto = self.service.allow_answers(request.user.username)
         except GameSessionNotFound as e:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'code': e.code})
+        except ConcurrentModification as e:
+            return Response(status=status.HTTP_409_CONFLICT, data={'code': e.code})
 
         return Response(status=status.HTTP_201_CREATED, data=current_question_answer_dto.to_response())
 
     def submit_answer(self, request):
+        received_at = monotonic()
         serializer = AnswerRequestSerializer(data=request.data)
 
         try:
             serializer.is_valid(raise_exception=True)
             self.service.submit_answer(request.user.username,
-                                       AnswerRequestDTO(**serializer.validated_data))
+                                       AnswerRequestDTO(**serializer.validated_data),
+                                       received_at)
         except ValidationError:
             return Response(status=status.HTTP_400_BAD_REQUEST, data={'code': 'invalid_request'})
         except GameSessionNotFound as e:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'code': e.code})
+        except ConcurrentModification as e:
+            return Response(status=status.HTTP_409_CONFLICT, data={'code': e.code})
         except WrongStage as e:
             return Response(status=status.HTTP_403_FORBIDDEN, data={'code': e.code})
 
@@ -254,6 +364,8 @@ class GameSessionViewSet(ViewSet):
             self.service.confirm_answer(request.user.username)
         except GameSessionNotFound as e:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'code': e.code})
+        except ConcurrentModification as e:
+            return Response(status=status.HTTP_409_CONFLICT, data={'code': e.code})
         except WrongStage as e:
             return Response(status=status.HTTP_403_FORBIDDEN, data={'code': e.code})
 
@@ -264,6 +376,8 @@ class GameSessionViewSet(ViewSet):
             self.service.reject_answer(request.user.username)
         except GameSessionNotFound as e:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'code': e.code})
+        except ConcurrentModification as e:
+            return Response(status=status.HTTP_409_CONFLICT, data={'code': e.code})
         except WrongStage as e:
             return Response(status=status.HTTP_403_FORBIDDEN, data={'code': e.code})
 
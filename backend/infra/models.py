@@ -1,7 +1,9 @@
+from typing import Optional, Set, Tuple
+
 from django.contrib.auth.models import User as ORMDjangoUser
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Model, CharField, TextField, IntegerField, \
-    ForeignKey, ManyToManyField, OneToOneField, BooleanField, CASCADE, PROTECT
+from django.db.models import Model, CharField, TextField, IntegerField, DateTimeField, \
+    ForeignKey, ManyToManyField, OneToOneField, BooleanField, BinaryField, Index, Q, CASCADE, PROTECT
 from django_enum_choices.fields import EnumChoiceField
 
 from backend.modules.game.entities import Question, Theme, Round, Game
@@ -19,7 +21,11 @@ class ORMUser(Model):
 
     @property
     def game_session_id(self):
-        active_player = self.players.filter(is_playing=True).first()
+        # загруженный через user_queryset пользователь уже содержит id активной сессии
+        if hasattr(self, 'active_game_session_id'):
+            return self.active_game_session_id
+
+        active_player = next((player for player in self.players.all() if player.is_playing), None)
         return active_player.game_session_id if active_player else None
 
     @property
@@ -33,7 +39,6 @@ class ORMUser(Model):
         return User(id=self.pk,
                     username=self.user.username,
                     nickname=self.nickname,
-                    game_sessions=list(self.players.values_list('game_session_id', flat=True)),
                     game_session_id=self.game_session_id,
                     hosted_game_session_id=self.hosted_game_session_id)
 
@@ -64,6 +69,9 @@ class ORMQuestion(Model):
     answer = TextField()
     value = IntegerField()
 
+    class Meta:
+        ordering = ['order', 'pk']
+
     def to_domain(self):
         return Question(id=self.pk,
                         text=self.text,
@@ -77,6 +85,9 @@ class ORMTheme(Model):
     questions = ManyToManyField(ORMQuestion,
                                 related_name='questions')
 
+    class Meta:
+        ordering = ['order']
+
     def to_domain(self):
         return Theme(id=self.pk,
                      name=self.name,
@@ -87,10 +98,13 @@ class ORMRound(Model):
     order = IntegerField()
     themes = ManyToManyField(ORMTheme)
 
+    class Meta:
+        ordering = ['order']
+
     def to_domain(self):
         return Round(id=self.pk,
                      order=self.order,
-                     themes=[theme.to_domain() for theme in self.themes.all().order_by('order')])
+                     themes=[theme.to_domain() for theme in self.themes.all()])
 
 
 class ORMGame(Model):
@@ -104,10 +118,11 @@ class ORMGame(Model):
                              on_delete=CASCADE)
 
     def to_domain(self):
+        # игра кэшируется и разделяется между сессиями, поэтому автор хранится без изменяемых данных пользователя
         return Game(id=self.pk,
                     name=self.name,
-                    author=self.author.to_domain(),
-                    rounds=[round.to_domain() for round in self.rounds.all().order_by('order')],
+                    author=User(username=self.author.user.username, id=self.author_id),
+                    rounds=[round.to_domain() for round in self.rounds.all()],
                     final_round=self.final_round.to_domain())
 
 
@@ -128,36 +143,83 @@ class ORMGameSession(Model):
     current_question = ForeignKey(ORMQuestion,
                                   on_delete=PROTECT,
                                   null=True)
+    current_theme_index = IntegerField(null=True)
+    current_question_index = IntegerField(null=True)
     current_player = OneToOneField(ORMPlayer,
                                    on_delete=CASCADE,
                                    null=True)
     stage = EnumChoiceField(Stage,
                             default=Stage.WAITING,
                             max_length=30)
-    answered_questions = ManyToManyField(ORMQuestion,
-                                         related_name='answered_questions')
+    # битовая маска отвеченных вопросов текущего раунда, см. Round.get_question_position;
+    # заменила таблицу answered_questions без переноса данных, перед обновлением начатые игры нужно завершить
+    answered_questions = BinaryField(default=b'')
+    version = IntegerField(default=0)
+    timer_deadline = DateTimeField(null=True)
+    timer_lease_until = DateTimeField(null=True)
 
-    @property
-    def current_question_indexes(self):
-        if self.current_question.order is not None:
-            question_index = self.current_question.order - 1
-            orm_theme = self.current_round.themes.get(questions=self.current_question)
-            theme_index = orm_theme.order - 1
-            return theme_index, question_index
-        else:
-            return None, None
+    class Meta:
+        # восстановление таймеров читает только сессии с взведённым таймером
+        indexes = [Index(fields=['timer_deadline'],
+                         condition=Q(timer_deadline__isnull=False),
+                         name='game_session_timer_deadline')]
+
+    def to_domain(self, game: Optional[Game] = None):
+        game = game or self.game.to_domain()
+        players = [player.to_domain() for player in self.players.all()]
+
+        current_round = next((round for round in game.rounds if round.id == self.current_round_id), None)
 
-    def to_domain(self):
         return GameSession(id=self.pk,
                            creator=self.creator.to_domain(),
                            host=self.host.to_domain() if self.host else None,
-                           game=self.game.to_domain(),
+                           game=game,
                            max_players=self.max_players,
-                           players=[player.to_domain() for player in self.players.all()],
-                           current_round=self.current_round.to_domain() if self.current_round else None,
-                           current_question=CurrentQuestion(self.current_question.to_domain(),
-                                                            *self.current_question_indexes)
-                           if self.current_question else None,
-                           current_player=self.current_player.to_domain() if self.current_player else None,
+                           players=players,
+                           current_round=current_round,
+                           current_question=self._current_question_to_domain(game, current_round),
+                           current_player=next((player for player in players
+                                                if player.id == self.current_player_id), None),
                            stage=self.stage,
-                           answered_questions=[question.to_domain() for question in self.answered_questions.all()])
+                           version=self.version,
+                           answered_questions=self._answered_questions_to_domain(current_round))
+
+    def _answered_questions_to_domain(self, current_round: Optional[Round]) -> Set[Tuple[int, int]]:
+        bitmap = int.from_bytes(bytes(self.answered_questions), 'little')
+        if not bitmap or not current_round:
+            return set()
+
+        answered_questions = set()
+        position = 0
+        for theme_index, theme in enumerate(current_round.themes):
+            for question_index in range(len(theme.questions)):
+                if bitmap >> position & 1:
+                    answered_questions.add((theme_index, question_index))
+                position += 1
+
+        return answered_questions
+
+    @staticmethod
+    def answered_questions_from_domain(current_round: Optional[Round],
+                                       answered_questions: Set[Tuple[int, int]]) -> bytes:
+        bitmap = 0
+        for theme_index, question_index in answered_questions:
+            bitmap |= 1 << current_round.get_question_position(theme_index, question_index)
+
+        return bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+
+    def _current_question_to_domain(self, game, current_round):
+        if self.current_question_id is None:
+            return None
+
+        if current_round:
+            question = current_round.get_question(self.current_theme_index, self.current_question_index)
+            if question and question.id == self.current_question_id:
+                return CurrentQuestion(question, self.current_theme_index, self.current_question_index)
+
+            # сессии, сохранённые без индексов текущего вопроса
+            indexes = current_round.get_question_indexes(self.current_question_id)
+            if indexes:
+                return CurrentQuestion(current_round.get_question(*indexes), *indexes)
+
+        return CurrentQuestion(game.final_round)
@@ -1,24 +1,86 @@
-from typing import Dict
+import asyncio
+from contextlib import contextmanager
+from threading import local
+from typing import Dict, List, Tuple, Optional
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
 channel_layer = get_channel_layer()
 
+_batch = local()
 
-def websocket_notify(group_name: str, data: Dict, notification_type: str, event_type: str):
-    notification_dict = {
-        'type': notification_type,
+Notifications = Dict[Tuple[str, str], List[Dict]]
+
+
+def game_session_group_name(game_session_id: int) -> str:
+    return f'game_session_{game_session_id}'
+
+
+@contextmanager
+def notification_batch(collected: Optional[Notifications] = None):
+    """
+    Собирает уведомления, отправленные внутри блока, и отправляет каждой группе одно сообщение
+    со списком событий вместо отдельного сообщения на каждое событие.
+    Если передан словарь collected, уведомления только собираются в него, а отправляет их
+    асинхронный вызывающий код через async_notify.
+    """
+    if getattr(_batch, 'notifications', None) is not None:
+        yield
+        return
+
+    _batch.notifications = collected if collected is not None else dict()
+    try:
+        yield
+    finally:
+        notifications: Notifications = _batch.notifications
+        _batch.notifications = None
+
+        if collected is None and notifications:
+            async_to_sync(async_notify)(notifications)
+
+
+async def async_notify(notifications: Notifications):
+    sends = list()
+    for (group_name, notification_type), events in notifications.items():
+        if len(events) == 1:
+            notification_dict = {'type': notification_type} | events[0]
+        else:
+            notification_dict = {
+                'type': notification_type,
+                'events': events
+            }
+
+        sends.append(channel_layer.group_send(group_name, notification_dict))
+
+    await asyncio.gather(*sends)
+
+
+def _event_dict(data: Dict, event_type: str, sequence: Optional[int]) -> Dict:
+    event_dict = {
         'event': event_type,
         'data': data
     }
+    if sequence is not None:
+        event_dict['sequence'] = sequence
+
+    return event_dict
+
 
-    async_to_sync(channel_layer.group_send)(group_name, notification_dict)
+def websocket_notify(group_name: str,
+                     data: Dict,
+                     notification_type: str,
+                     event_type: str,
+                     sequence: Optional[int] = None):
+    with notification_batch():
+        _batch.notifications.setdefault((group_name, notification_type), []).append(
+            _event_dict(data, event_type, sequence)
+        )
 
 
-def notify_to_lobby(data: Dict, event_type: str):
-    websocket_notify('lobby', data, 'lobby_event', event_type)
+def notify_to_lobby(data: Dict, event_type: str, sequence: Optional[int] = None):
+    websocket_notify('lobby', data, 'lobby_event', event_type, sequence)
 
 
 def notify_to_game_session(game_session_id: int, data: Dict, event_type: str):
-    websocket_notify(f'game_session_{game_session_id}', data, 'game_session_event', event_type)
+    websocket_notify(game_session_group_name(game_session_id), data, 'game_session_event', event_type)
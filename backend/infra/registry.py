@@ -0,0 +1,90 @@
+from threading import Lock
+from time import monotonic
+from typing import Dict, Set, Tuple, Optional
+
+from backend.infra.models import ORMPlayer, ORMGameSession
+from backend.infra.notifiers import game_session_group_name
+
+REGISTRY_CACHE_TTL = 30
+
+
+class GameSessionRegistry:
+    """
+    Определяет группу игровой сессии, в которую нужно добавить вебсокет пользователя.
+
+    Группа берётся из БД, поэтому одинакова во всех воркерах, и кэшируется на REGISTRY_CACHE_TTL секунд.
+    Обработчики событий этого процесса обновляют кэш сразу; обратный индекс групп позволяет
+    удалять группу целиком без обхода всех пользователей.
+    """
+
+    def __init__(self, ttl: float = REGISTRY_CACHE_TTL):
+        self.ttl = ttl
+        self._group_names: Dict[str, Tuple[str, float]] = dict()
+        self._usernames: Dict[str, Set[str]] = dict()
+        self._lock = Lock()
+
+    def get_group_name(self, username: str) -> Optional[str]:
+        with self._lock:
+            group_name, expires_at = self._group_names.get(username, (None, 0))
+            if expires_at > monotonic():
+                return group_name
+
+        game_session_id = self._load_game_session_id(username)
+        if game_session_id is None:
+            with self._lock:
+                self._discard(username)
+            return None
+
+        self.add_user(username, game_session_id)
+
+        return game_session_group_name(game_session_id)
+
+    def add_user(self, username: str, game_session_id: int):
+        group_name = game_session_group_name(game_session_id)
+
+        with self._lock:
+            self._discard(username)
+            self._group_names[username] = (group_name, monotonic() + self.ttl)
+            self._usernames.setdefault(group_name, set()).add(username)
+
+        print(f'added {username}@{game_session_id} to notifier')
+
+    def remove_user(self, username: str):
+        with self._lock:
+            self._discard(username)
+
+        print(f'removed {username} from notifier')
+
+    def remove_group(self, game_session_id: int):
+        group_name = game_session_group_name(game_session_id)
+
+        with self._lock:
+            for username in self._usernames.pop(group_name, set()):
+                self._group_names.pop(username, None)
+
+        print(f'removed group {group_name} from notifier')
+
+    def _discard(self, username: str):
+        group_name, _ = self._group_names.pop(username, (None, 0))
+        if group_name:
+            usernames = self._usernames.get(group_name)
+            usernames.discard(username)
+            if not usernames:
+                del self._usernames[group_name]
+
+    @staticmethod
+    def _load_game_session_id(username: str) -> Optional[int]:
+        game_session_id = ORMPlayer.objects \
+            .filter(user__user__username=username, is_playing=True) \
+            .values_list('game_session_id', flat=True) \
+            .first()
+        if game_session_id is None:
+            game_session_id = ORMGameSession.objects \
+                .filter(host__user__username=username) \
+                .values_list('pk', flat=True) \
+                .first()
+
+        return game_session_id
+
+
+game_session_registry = GameSessionRegistry()
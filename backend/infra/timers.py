@@ -1,22 +1,108 @@
-from threading import Timer
-from typing import Callable, Tuple, Dict
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from heapq import heappush, heappop, heapify
+from itertools import count
+from threading import Thread, Condition
+from time import monotonic
+from typing import Callable, Tuple, Dict, List, Any, Optional
 
 CHOOSING_QUESTION_INTERVAL = 10
 FINAL_ROUND_INTERVAL = 30
 
+TIMER_LEASE_INTERVAL = 30
+TIMER_RECOVERY_INTERVAL = 15
+
+CALLBACK_WORKERS = 4
+
+
+@dataclass(order=True)
+class _TimerEntry:
+    deadline: float
+    sequence: int
+    key: Any = field(compare=False)
+    callback: Callable = field(compare=False)
+    args: Tuple = field(compare=False)
+    is_cancelled: bool = field(default=False, compare=False)
+
 
 class Timers:
-    _timers: Dict[int, Timer] = dict()
+    """
+    Все таймеры обслуживаются одним потоком-планировщиком с кучей по времени срабатывания.
+    Остановленные таймеры удаляются из кучи лениво, коллбэки выполняются в пуле потоков.
+    """
+
+    _timers: Dict[Any, _TimerEntry] = dict()
+    _queue: List[_TimerEntry] = []
+    _cancelled_count = 0
+    _sequence = count()
+
+    _condition = Condition()
+    _scheduler: Optional[Thread] = None
+    _executor = ThreadPoolExecutor(max_workers=CALLBACK_WORKERS, thread_name_prefix='timer_callback')
 
     @staticmethod
     def start(key, interval: int, callback: Callable, args: Tuple):
-        timer = Timer(interval, callback, args)
-        timer.start()
+        with Timers._condition:
+            Timers._cancel(key)
+
+            entry = _TimerEntry(monotonic() + interval, next(Timers._sequence), key, callback, args)
+            Timers._timers[key] = entry
+            heappush(Timers._queue, entry)
+
+            if not Timers._scheduler:
+                Timers._scheduler = Thread(target=Timers._run, name='timers', daemon=True)
+                Timers._scheduler.start()
 
-        Timers._timers[key] = timer
+            if Timers._queue[0] is entry:
+                Timers._condition.notify()
 
     @staticmethod
     def stop(key):
-        timer = Timers._timers.pop(key, None)
-        if timer:
-            timer.cancel()
+        with Timers._condition:
+            Timers._cancel(key)
+
+    @staticmethod
+    def _cancel(key):
+        entry = Timers._timers.pop(key, None)
+        if not entry:
+            return
+
+        entry.is_cancelled = True
+        Timers._cancelled_count += 1
+
+        if Timers._cancelled_count > len(Timers._queue) // 2:
+            Timers._queue = [entry for entry in Timers._queue if not entry.is_cancelled]
+            heapify(Timers._queue)
+            Timers._cancelled_count = 0
+
+    @staticmethod
+    def _run():
+        with Timers._condition:
+            while True:
+                while Timers._queue and Timers._queue[0].is_cancelled:
+                    heappop(Timers._queue)
+                    Timers._cancelled_count -= 1
+
+                if not Timers._queue:
+                    Timers._condition.wait()
+                    continue
+
+                delay = Timers._queue[0].deadline - monotonic()
+                if delay > 0:
+                    Timers._condition.wait(delay)
+                    continue
+
+                entry = heappop(Timers._queue)
+                del Timers._timers[entry.key]
+
+                Timers._executor.submit(Timers._call, entry.callback, entry.args)
+
+    @staticmethod
+    def _call(callback: Callable, args: Tuple):
+        # пул потоков сохраняет исключение в Future, которую никто не читает, поэтому ошибка выводится здесь
+        try:
+            callback(*args)
+        except Exception:
+            print(f'timer callback {getattr(callback, "__name__", callback)}{args} failed:')
+            traceback.print_exc()
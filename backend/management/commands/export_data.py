@@ -0,0 +1,27 @@
+import sys
+from contextlib import nullcontext
+from time import monotonic
+
+from django.core.management.base import BaseCommand
+
+from backend.infra.export import EXPORT_SOURCES, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Выгружает игры и результаты завершённых сессий в JSONL (по объекту в строке)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', action='append', choices=list(EXPORT_SOURCES), dest='types',
+                            help='тип выгружаемых объектов, по умолчанию все')
+        parser.add_argument('--output', default='-', help='файл для выгрузки, "-" - стандартный вывод')
+
+    def handle(self, *args, types, output: str, **options):
+        started_at = monotonic()
+        count = 0
+
+        with nullcontext(sys.stdout) if output == '-' else open(output, 'w', encoding='utf-8') as file:
+            for line in export_lines(types or list(EXPORT_SOURCES)):
+                file.write(line)
+                count += 1
+
+        self.stderr.write(f'exported {count} objects in {monotonic() - started_at:.2f}s')
@@ -0,0 +1,46 @@
+import sys
+from contextlib import nullcontext
+from time import monotonic
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.infra.game_packs import GamePackReader
+from backend.modules.game.dtos import GameImportResultDTO
+from backend.modules.game.services import GameService
+from backend.modules.user.exceptions import UserNotFound
+
+
+class Command(BaseCommand):
+    help = 'Импортирует игры из JSON-массива или JSONL (по игре в строке)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл с играми, "-" - стандартный ввод')
+        parser.add_argument('--author', required=True, help='имя пользователя, от которого создаются игры')
+
+    def handle(self, *args, path: str, author: str, **options):
+        started_at = monotonic()
+
+        def report_progress(result: GameImportResultDTO):
+            elapsed = monotonic() - started_at
+            self.stdout.write(f'imported {result.imported_count}, '
+                              f'skipped {len(result.skipped_names)}, '
+                              f'invalid {len(reader.invalid_indexes)} '
+                              f'({result.imported_count / elapsed:.1f} games/s)')
+
+        with nullcontext(sys.stdin) if path == '-' else open(path, encoding='utf-8') as lines:
+            reader = GamePackReader(lines)
+
+            try:
+                result = GameService().import_games(author, reader, report_progress)
+            except UserNotFound:
+                raise CommandError(f'user {author} not found')
+            except ValueError as e:
+                raise CommandError(f'invalid JSON: {e}')
+
+        for name in result.skipped_names:
+            self.stdout.write(f'skipped existing game {name}')
+        for index in reader.invalid_indexes:
+            self.stdout.write(f'skipped invalid game #{index}')
+
+        self.stdout.write(self.style.SUCCESS(f'imported {result.imported_count} games '
+                                             f'in {monotonic() - started_at:.2f}s'))
@@ -2,16 +2,19 @@ from dataclasses import dataclass
 from typing import TYPE_CHECKING, List
 
 if TYPE_CHECKING:
-    from .entities import Game
+    from .entities import Game, Question
 
 from backend.core.dtos import ResponseDTO
 
+GAME_LIST_PAGE_SIZE = 50
+
 
 class GameDescriptionDTO(ResponseDTO):
-    def __init__(self, game: 'Game'):
-        self.name = game.name
-        self.author = game.author.nickname
-        self.rounds_count = len(game.rounds) + 1
+    def __init__(self, name: str, author: str, rounds_count: int):
+        self.name = name
+        self.author = author
+        # вместе с финальным раундом
+        self.rounds_count = rounds_count + 1
 
     def to_response(self):
         return dict(
@@ -21,6 +24,53 @@ class GameDescriptionDTO(ResponseDTO):
         )
 
 
+@dataclass
+class GameListQueryDTO:
+    search: str | None = None
+    cursor: str | None = None
+    limit: int = GAME_LIST_PAGE_SIZE
+
+
+class GameExportDTO(ResponseDTO):
+    """
+    Игра целиком в формате, который принимает импорт игр.
+    """
+
+    def __init__(self, game: 'Game'):
+        self.game = game
+
+    def to_response(self):
+        return dict(
+            name=self.game.name,
+            author=self.game.author.nickname,
+            rounds=[dict(themes=[dict(name=theme.name,
+                                      questions=[self._question(question) for question in theme.questions])
+                                 for theme in round.themes])
+                    for round in self.game.rounds],
+            finalRound=self._question(self.game.final_round)
+        )
+
+    @staticmethod
+    def _question(question: 'Question'):
+        return dict(
+            text=question.text,
+            answer=question.answer,
+            value=question.value
+        )
+
+
+class GameImportResultDTO(ResponseDTO):
+    def __init__(self):
+        self.imported_count = 0
+        self.skipped_names: List[str] = list()
+
+    def to_response(self):
+        return dict(
+            importedCount=self.imported_count,
+            skippedNames=self.skipped_names
+        )
+
+
 @dataclass
 class CreateQuestionDTO:
     text: str
@@ -1,12 +1,14 @@
-from typing import Optional, List, TYPE_CHECKING
+from typing import Optional, List, Dict, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from ..user.entities import User
 
-from backend.core.entities import Entity
+from backend.core.entities import Entity, AggregateRoot
 
 
 class Question(Entity):
+    __slots__ = ('text', 'answer', 'value')
+
     def __init__(self,
                  text: str,
                  answer: str,
@@ -19,6 +21,8 @@ class Question(Entity):
 
 
 class Theme(Entity):
+    __slots__ = ('name', 'questions')
+
     def __init__(self,
                  name: str,
                  questions: List[Question],
@@ -29,6 +33,8 @@ class Theme(Entity):
 
 
 class Round(Entity):
+    __slots__ = ('themes', 'order', '_board', '_indexes')
+
     def __init__(self,
                  themes: List[Theme],
                  order: int,
@@ -37,8 +43,51 @@ class Round(Entity):
         self.themes = themes
         self.order = order
 
+        self._board: Optional[Dict[Tuple[int, int], Tuple[Question, int]]] = None
+        self._indexes: Optional[Dict[int, Tuple[int, int]]] = None
+
+    def build_board_index(self):
+        """
+        Запоминает для каждого вопроса его индексы (тема, вопрос) и номер при обходе тем по порядку.
+        Строится при первом обращении, поэтому темы раунда после этого не должны меняться.
+        """
+        self._board = dict()
+        self._indexes = dict()
+
+        for theme_index, theme in enumerate(self.themes):
+            for question_index, question in enumerate(theme.questions):
+                self._board[(theme_index, question_index)] = (question, len(self._board))
+                self._indexes[question.id] = (theme_index, question_index)
+
+    @property
+    def questions_count(self) -> int:
+        return len(self._get_board())
+
+    def get_question(self, theme_index: int, question_index: int) -> Optional[Question]:
+        question, _ = self._get_board().get((theme_index, question_index), (None, None))
+
+        return question
+
+    def get_question_indexes(self, question_id: int) -> Optional[Tuple[int, int]]:
+        self._get_board()
+
+        return self._indexes.get(question_id)
+
+    def get_question_position(self, theme_index: int, question_index: int) -> int:
+        _, position = self._get_board()[(theme_index, question_index)]
+
+        return position
+
+    def _get_board(self) -> Dict[Tuple[int, int], Tuple[Question, int]]:
+        if self._board is None:
+            self.build_board_index()
+
+        return self._board
+
+
+class Game(AggregateRoot):
+    __slots__ = ('name', 'author', 'rounds', 'final_round')
 
-class Game(Entity):
     def __init__(self,
                  name: str,
                  author: 'User',
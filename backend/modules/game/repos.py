@@ -1,11 +1,130 @@
-from typing import List, TYPE_CHECKING
+from collections import OrderedDict
+from itertools import groupby
+from operator import itemgetter
+from threading import Lock
+from time import monotonic
+from typing import List, Dict, Set, Tuple, Iterator, Optional
 
-if TYPE_CHECKING:
-    from .entities import Game
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, QuerySet, Q, OuterRef, Subquery, Count
+from django.db.models.functions import Coalesce
 
 from backend.core.repos import Repository
-from backend.infra.models import ORMUser, ORMGame, ORMQuestion, ORMRound, ORMTheme
+from backend.infra.models import ORMGame, ORMQuestion, ORMRound, ORMTheme
+from backend.modules.game.entities import Question, Theme, Round, Game
 from backend.modules.game.exceptions import GameNotFound
+from backend.modules.user.entities import User
+
+
+def game_queryset() -> QuerySet:
+    orm_rounds_qs = ORMRound.objects.prefetch_related(
+        Prefetch('themes', queryset=ORMTheme.objects.prefetch_related('questions'))
+    )
+
+    return ORMGame.objects \
+        .select_related('author__user', 'final_round') \
+        .prefetch_related(Prefetch('rounds', queryset=orm_rounds_qs))
+
+
+class GameCache:
+    """
+    Общий для всех игровых сессий процесса LRU-кэш содержимого игр.
+    Игры в кэше доступны только для чтения: списки раундов, тем и вопросов заменяются кортежами,
+    для раундов заранее строится индекс вопросов.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._games: OrderedDict[int, 'Game'] = OrderedDict()
+        self._ids_by_name: Dict[str, int] = dict()
+        self._lock = Lock()
+
+    def get(self, game_id: int) -> Optional['Game']:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game:
+                self._games.move_to_end(game_id)
+
+            return game
+
+    def get_by_name(self, game_name: str) -> Optional['Game']:
+        game_id = self._ids_by_name.get(game_name)
+
+        return self.get(game_id) if game_id else None
+
+    def put(self, game: 'Game') -> 'Game':
+        self._freeze(game)
+
+        with self._lock:
+            self._games[game.id] = game
+            self._games.move_to_end(game.id)
+            self._ids_by_name[game.name] = game.id
+
+            while len(self._games) > self.max_size:
+                _, evicted_game = self._games.popitem(last=False)
+                self._ids_by_name.pop(evicted_game.name, None)
+
+        return game
+
+    def invalidate(self, game_id: int):
+        with self._lock:
+            game = self._games.pop(game_id, None)
+            if game:
+                self._ids_by_name.pop(game.name, None)
+
+    def clear(self):
+        with self._lock:
+            self._games.clear()
+            self._ids_by_name.clear()
+
+    @staticmethod
+    def _freeze(game: 'Game'):
+        for round in game.rounds:
+            for theme in round.themes:
+                theme.questions = tuple(theme.questions)
+            round.themes = tuple(round.themes)
+            round.build_board_index()
+        game.rounds = tuple(game.rounds)
+
+
+class GameListCache:
+    """
+    LRU-кэш страниц списка игр. Кэш сбрасывается при создании игр в этом процессе,
+    а игры, созданные другими процессами, появляются в списке не позже чем через ttl секунд.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._pages: OrderedDict[Tuple, Tuple[float, List[Tuple[str, str, int]]]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Tuple) -> Optional[List[Tuple[str, str, int]]]:
+        with self._lock:
+            cached = self._pages.get(key)
+            if not cached or monotonic() - cached[0] >= self.ttl:
+                return None
+
+            self._pages.move_to_end(key)
+
+            return cached[1]
+
+    def put(self, key: Tuple, page: List[Tuple[str, str, int]]):
+        with self._lock:
+            self._pages[key] = (monotonic(), page)
+            self._pages.move_to_end(key)
+
+            while len(self._pages) > self.max_size:
+                self._pages.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+
+game_cache = GameCache(settings.GAME_CACHE_SIZE)
+game_list_cache = GameListCache(settings.GAME_LIST_CACHE_TTL, settings.GAME_LIST_CACHE_SIZE)
 
 
 class GameRepo(Repository):
@@ -13,59 +132,226 @@ class GameRepo(Repository):
     def is_exists(game_name) -> bool:
         return ORMGame.objects.filter(name=game_name).exists()
 
+    @staticmethod
+    def get_existing_names(game_names: List[str]) -> Set[str]:
+        return set(ORMGame.objects.filter(name__in=game_names).values_list('name', flat=True))
+
     @staticmethod
     def _create(game: 'Game') -> 'Game':
-        orm_final_round = ORMQuestion.objects.create(text=game.final_round.text,
-                                                     answer=game.final_round.answer,
-                                                     value=game.final_round.value)
-        orm_user = ORMUser.objects.get(user__username=game.author.username)
-        orm_game = ORMGame.objects.create(name=game.name,
-                                          author=orm_user,
-                                          final_round=orm_final_round)
+        return GameRepo.create_many([game])[0]
+
+    @staticmethod
+    def create_many(games: List['Game']) -> List['Game']:
+        """
+        Записывает игры одной транзакцией с одним пакетным INSERT на каждую таблицу,
+        включая промежуточные таблицы связей, независимо от количества игр, раундов и вопросов.
+        """
+        orm_games, orm_rounds, orm_themes, orm_questions = list(), list(), list(), list()
+        game_rounds, round_themes, theme_questions = list(), list(), list()
+        persisted_entities = list()
 
-        for round_index, round in enumerate(game.rounds):
-            orm_round = ORMRound.objects.create(order=round_index + 1)
+        for game in games:
+            orm_final_round = ORMQuestion(text=game.final_round.text,
+                                          answer=game.final_round.answer,
+                                          value=game.final_round.value)
+            orm_game = ORMGame(name=game.name,
+                               author_id=game.author.id,
+                               final_round=orm_final_round)
+            orm_questions.append(orm_final_round)
+            orm_games.append(orm_game)
+            persisted_entities += [(game.final_round, orm_final_round), (game, orm_game)]
 
-            for theme_index, theme in enumerate(round.themes):
-                orm_theme = ORMTheme.objects.create(name=theme.name,
-                                                    order=theme_index + 1)
+            for round_index, round in enumerate(game.rounds):
+                orm_round = ORMRound(order=round_index + 1)
+                orm_rounds.append(orm_round)
+                game_rounds.append(ORMGame.rounds.through(ormgame=orm_game, ormround=orm_round))
+                persisted_entities.append((round, orm_round))
 
-                for question_index, question in enumerate(theme.questions):
-                    orm_question = ORMQuestion.objects.create(order=question_index + 1,
-                                                              text=question.text,
-                                                              answer=question.answer,
-                                                              value=question.value)
+                for theme_index, theme in enumerate(round.themes):
+                    orm_theme = ORMTheme(name=theme.name,
+                                         order=theme_index + 1)
+                    orm_themes.append(orm_theme)
+                    round_themes.append(ORMRound.themes.through(ormround=orm_round, ormtheme=orm_theme))
+                    persisted_entities.append((theme, orm_theme))
 
-                    orm_theme.questions.add(orm_question)
+                    for question_index, question in enumerate(theme.questions):
+                        orm_question = ORMQuestion(order=question_index + 1,
+                                                   text=question.text,
+                                                   answer=question.answer,
+                                                   value=question.value)
+                        orm_questions.append(orm_question)
+                        theme_questions.append(ORMTheme.questions.through(ormtheme=orm_theme,
+                                                                          ormquestion=orm_question))
+                        persisted_entities.append((question, orm_question))
 
-                orm_round.themes.add(orm_theme)
+        with transaction.atomic():
+            # первичные ключи возвращаются из INSERT, поэтому связи строятся без дополнительных запросов
+            ORMQuestion.objects.bulk_create(orm_questions)
+            ORMGame.objects.bulk_create(orm_games)
+            ORMRound.objects.bulk_create(orm_rounds)
+            ORMTheme.objects.bulk_create(orm_themes)
+            ORMGame.rounds.through.objects.bulk_create(game_rounds)
+            ORMRound.themes.through.objects.bulk_create(round_themes)
+            ORMTheme.questions.through.objects.bulk_create(theme_questions)
 
-            orm_game.rounds.add(orm_round)
+        for entity, orm_entity in persisted_entities:
+            entity.id = orm_entity.pk
 
-        game.id = orm_game.pk
+        game_list_cache.clear()
 
-        return game
+        return games
 
     @staticmethod
     def _update(game: 'Game') -> 'Game':
-        raise NotImplementedError
+        """
+        Записывает название игры, названия тем и тексты, ответы и стоимости вопросов.
+        Состав раундов, тем и вопросов не меняется.
+        """
+        themes = [theme for round in game.rounds for theme in round.themes]
+        questions = [game.final_round, *(question for theme in themes for question in theme.questions)]
+
+        with transaction.atomic():
+            ORMGame.objects.filter(pk=game.id).update(name=game.name)
+            ORMTheme.objects.bulk_update([ORMTheme(pk=theme.id, name=theme.name) for theme in themes], ['name'])
+            ORMQuestion.objects.bulk_update([ORMQuestion(pk=question.id,
+                                                         text=question.text,
+                                                         answer=question.answer,
+                                                         value=question.value) for question in questions],
+                                            ['text', 'answer', 'value'])
+
+        GameRepo._invalidate(game)
+
+        return game
 
     @staticmethod
     def get(game_name) -> 'Game':
-        try:
-            orm_game = ORMGame.objects.get(name=game_name)
-        except ORMGame.DoesNotExist:
-            raise GameNotFound
+        game = GameRepo._get_identity(('game_name', game_name)) or game_cache.get_by_name(game_name)
+        if not game:
+            try:
+                orm_game = game_queryset().get(name=game_name)
+            except ORMGame.DoesNotExist:
+                raise GameNotFound
 
-        return orm_game.to_domain()
+            game = game_cache.put(orm_game.to_domain())
+
+        return GameRepo._put_game_identity(game)
+
+    @staticmethod
+    def get_by_id(game_id: int) -> 'Game':
+        game = GameRepo._get_identity(('game', game_id)) or game_cache.get(game_id)
+        if not game:
+            try:
+                orm_game = game_queryset().get(pk=game_id)
+            except ORMGame.DoesNotExist:
+                raise GameNotFound
+
+            game = game_cache.put(orm_game.to_domain())
+
+        return GameRepo._put_game_identity(game)
 
     @staticmethod
-    def get_all() -> List['Game']:
-        return [orm_game.to_domain() for orm_game in ORMGame.objects.all().order_by('name')]
+    def _put_game_identity(game: 'Game') -> 'Game':
+        # игра из карты остаётся той же до конца запроса, даже если её вытеснят из кэша
+        GameRepo._put_identity(game, ('game', game.id), ('game_name', game.name))
+
+        return game
+
+    @staticmethod
+    def get_descriptions(search: Optional[str] = None,
+                         cursor: Optional[str] = None,
+                         limit: Optional[int] = None) -> List[Tuple[str, str, int]]:
+        """
+        Возвращает названия, никнеймы авторов и количество раундов игр, упорядоченных по названию.
+        cursor - название последней игры предыдущей страницы: страница начинается по индексу названия,
+        а количество раундов считается подзапросом только для попавших на страницу игр.
+        """
+        key = (search, cursor, limit)
+        page = game_list_cache.get(key)
+        if page is not None:
+            return page
+
+        rounds_count = ORMGame.rounds.through.objects \
+            .filter(ormgame_id=OuterRef('pk')) \
+            .values('ormgame_id') \
+            .annotate(count=Count('pk')) \
+            .values('count')
+
+        games = ORMGame.objects.annotate(rounds_count=Coalesce(Subquery(rounds_count), 0))
+        if search:
+            games = games.filter(Q(name__icontains=search) | Q(author__nickname__icontains=search))
+        if cursor is not None:
+            games = games.filter(name__gt=cursor)
+
+        games = games.order_by('name').values_list('name', 'author__nickname', 'rounds_count')
+        page = list(games[:limit] if limit is not None else games)
+        game_list_cache.put(key, page)
+
+        return page
+
+    @staticmethod
+    def iter_all(chunk_size: int = settings.EXPORT_CHUNK_SIZE) -> Iterator['Game']:
+        """
+        Читает игры по одной из одного упорядоченного запроса через курсор на стороне сервера,
+        поэтому в памяти находится только текущая игра. В Django 4.0 iterator() не выполняет prefetch_related,
+        поэтому раунды, темы и вопросы присоединяются к строкам игры.
+        Авторы игр загружаются без данных о сессиях.
+        """
+        rows = ORMGame.objects \
+            .order_by('pk',
+                      'rounds__order', 'rounds__pk',
+                      'rounds__themes__order', 'rounds__themes__pk',
+                      'rounds__themes__questions__order', 'rounds__themes__questions__pk') \
+            .values_list('pk', 'name', 'author_id', 'author__user__username', 'author__nickname',
+                         'final_round_id', 'final_round__text', 'final_round__answer', 'final_round__value',
+                         'rounds__pk', 'rounds__order',
+                         'rounds__themes__pk', 'rounds__themes__name',
+                         'rounds__themes__questions__pk', 'rounds__themes__questions__text',
+                         'rounds__themes__questions__answer', 'rounds__themes__questions__value') \
+            .iterator(chunk_size=chunk_size)
+
+        for _, game_rows in groupby(rows, key=itemgetter(0)):
+            game = round = theme = None
+
+            for row in game_rows:
+                if not game:
+                    game_id, name, author_id, username, nickname, *final_round = row[:9]
+                    game = Game(name=name,
+                                author=User(username=username, nickname=nickname, id=author_id),
+                                rounds=list(),
+                                final_round=Question(*final_round[1:], id=final_round[0]),
+                                id=game_id)
+
+                round_id, round_order, theme_id, theme_name, question_id, *question = row[9:]
+                if round_id is not None and (not round or round.id != round_id):
+                    round = Round(themes=list(), order=round_order, id=round_id)
+                    game.rounds.append(round)
+                if theme_id is not None and (not theme or theme.id != theme_id):
+                    theme = Theme(name=theme_name, questions=list(), id=theme_id)
+                    round.themes.append(theme)
+                if question_id is not None:
+                    theme.questions.append(Question(*question, id=question_id))
+
+            yield game
 
     @staticmethod
     def _delete(game: 'Game'):
-        raise NotImplementedError
+        themes = [theme for round in game.rounds for theme in round.themes]
+
+        with transaction.atomic():
+            ORMGame.objects.filter(pk=game.id).delete()
+            ORMRound.objects.filter(pk__in=[round.id for round in game.rounds]).delete()
+            ORMTheme.objects.filter(pk__in=[theme.id for theme in themes]).delete()
+            ORMQuestion.objects.filter(pk__in=[game.final_round.id,
+                                               *(question.id for theme in themes for question in theme.questions)]) \
+                .delete()
+
+        GameRepo._invalidate(game)
+
+    @staticmethod
+    def _invalidate(game: 'Game'):
+        # до фиксации транзакции другие запросы могли бы снова закэшировать прежнее содержимое игры
+        transaction.on_commit(lambda: game_cache.invalidate(game.id))
+        transaction.on_commit(game_list_cache.clear)
 
 
 game_repo = GameRepo()
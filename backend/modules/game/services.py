@@ -1,15 +1,19 @@
-from typing import List, TYPE_CHECKING
+from itertools import islice
+from typing import List, Tuple, Iterable, Iterator, Callable, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from backend.modules.game.dtos import CreateGameDTO
+    from backend.modules.user.entities import User
 
-from backend.modules.game.dtos import GameDescriptionDTO
+from backend.modules.game.dtos import GameDescriptionDTO, GameImportResultDTO, GameExportDTO, GameListQueryDTO
 from backend.modules.game.entities import Question, Theme, Round, Game
 from backend.modules.game.exceptions import GameAlreadyExists
 from backend.modules.game.repos import game_repo
 from backend.modules.user.exceptions import UserNotFound
 from backend.modules.user.repos import user_repo
 
+GAME_IMPORT_BATCH_SIZE = 50
+
 
 class GameService:
     repo = game_repo
@@ -24,9 +28,65 @@ class GameService:
         if self.repo.is_exists(game_data.name):
             raise GameAlreadyExists
 
+        game = self._build_game(user, game_data)
+
+        self.repo.save(game)
+
+    def import_games(self,
+                     username: str,
+                     games_data: Iterable['CreateGameDTO'],
+                     on_progress: Optional[Callable[[GameImportResultDTO], None]] = None) -> GameImportResultDTO:
+        """
+        Записывает игры пачками по GAME_IMPORT_BATCH_SIZE, читая games_data по мере записи.
+        Игры с уже занятыми названиями пропускаются, on_progress вызывается после каждой пачки.
+        """
+        user = self.user_repo.get(username)
+        result = GameImportResultDTO()
+        games_data = iter(games_data)
+
+        while batch := list(islice(games_data, GAME_IMPORT_BATCH_SIZE)):
+            existing_names = self.repo.get_existing_names([game_data.name for game_data in batch])
+
+            games = list()
+            for game_data in batch:
+                if game_data.name in existing_names:
+                    result.skipped_names.append(game_data.name)
+                else:
+                    existing_names.add(game_data.name)
+                    games.append(self._build_game(user, game_data))
+
+            self.repo.create_many(games)
+            result.imported_count += len(games)
+
+            if on_progress:
+                on_progress(result)
+
+        return result
+
+    def get_all_descriptions(
+            self,
+            query: Optional[GameListQueryDTO] = None
+    ) -> Tuple[List[GameDescriptionDTO], Optional[str]]:
+        """
+        Возвращает страницу списка игр и курсор следующей страницы или None, если страница последняя.
+        """
+        query = query or GameListQueryDTO()
+
+        # лишняя игра показывает, есть ли следующая страница
+        rows = self.repo.get_descriptions(query.search, query.cursor, query.limit + 1)
+        page = rows[:query.limit]
+        next_cursor = page[-1][0] if len(rows) > query.limit else None
+
+        return [GameDescriptionDTO(*row) for row in page], next_cursor
+
+    def export_games(self) -> Iterator[GameExportDTO]:
+        return (GameExportDTO(game) for game in self.repo.iter_all())
+
+    @staticmethod
+    def _build_game(user: 'User', game_data: 'CreateGameDTO') -> Game:
         rounds = list()
 
-        for round_index, round_data in enumerate(game_data.rounds):  # TODO выделить создание сущностей
+        for round_index, round_data in enumerate(game_data.rounds):
             themes = list()
 
             for theme_data in round_data.themes:
@@ -48,14 +108,7 @@ class GameService:
                                answer=final_round_data.answer,
                                value=final_round_data.value)
 
-        game = Game(name=game_data.name,
+        return Game(name=game_data.name,
                     author=user,
                     rounds=rounds,
                     final_round=final_round)
-
-        self.repo.save(game)
-
-    def get_all_descriptions(self) -> List[GameDescriptionDTO]:
-        games = self.repo.get_all()
-
-        return [GameDescriptionDTO(game) for game in games]
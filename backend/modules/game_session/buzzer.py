@@ -0,0 +1,70 @@
+from dataclasses import dataclass, field
+from threading import Condition
+from time import monotonic
+from typing import Dict, List, Tuple, Optional
+
+from django.conf import settings
+
+
+@dataclass
+class _AnswerPeriod:
+    buzzes: List[Tuple[float, str]] = field(default_factory=list)
+    deadline: Optional[float] = None
+    winner: Optional[str] = None
+
+
+class Buzzer:
+    """
+    Определяет, кто из игроков первым нажал на кнопку ответа в игре с ведущим.
+
+    Нажатия, пришедшие в течение BUZZER_WINDOW секунд после первого, собираются вместе,
+    побеждает нажатие с наименьшим временем получения (при равенстве - по юзернейму).
+    Проигравшие получают отказ без загрузки игровой сессии.
+    Если период ответов сессии не открыт в этом процессе, нажатие обрабатывается как обычный ответ.
+
+    Периоды хранятся в памяти процесса, поэтому арбитраж корректен, только пока все запросы
+    одной сессии обрабатывает один процесс. При нескольких воркерах нажатия, попавшие в разные процессы,
+    друг о друге не знают, и победителя определяет порядок сохранения сессии.
+    """
+
+    def __init__(self):
+        self._periods: Dict[int, _AnswerPeriod] = dict()
+        self._condition = Condition()
+
+    def open(self, game_session_id: int):
+        with self._condition:
+            self._periods[game_session_id] = _AnswerPeriod()
+
+    def close(self, game_session_id: int):
+        with self._condition:
+            self._periods.pop(game_session_id, None)
+            self._condition.notify_all()
+
+    def buzz(self, game_session_id: int, username: str, received_at: Optional[float] = None) -> bool:
+        received_at = received_at or monotonic()
+
+        with self._condition:
+            period = self._periods.get(game_session_id)
+            if not period:
+                return True
+
+            if period.winner:
+                return period.winner == username
+
+            period.buzzes.append((received_at, username))
+            if period.deadline is None:
+                period.deadline = received_at + settings.BUZZER_WINDOW
+
+            while not period.winner and self._periods.get(game_session_id) is period:
+                timeout = period.deadline - monotonic()
+                if timeout <= 0:
+                    _, period.winner = min(period.buzzes)
+                    self._condition.notify_all()
+                    break
+
+                self._condition.wait(timeout)
+
+            return period.winner == username
+
+
+buzzer = Buzzer()
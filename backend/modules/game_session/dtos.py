@@ -1,10 +1,11 @@
 from dataclasses import dataclass
-from typing import List, Union, TYPE_CHECKING
+from typing import List, Set, Tuple, Union, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from ..user.entities import User
     from ..game.entities import Round, Theme, Question
     from .entities import GameSession, Player, Answer, CurrentQuestion
+    from .lobby import LobbyEntry
 
 from backend.core.dtos import ResponseDTO
 from backend.modules.game_session.enums import Stage
@@ -118,9 +119,10 @@ class QuestionDTO(ResponseDTO):
 
 
 class ThemeDTO(ResponseDTO):
-    def __init__(self, theme: 'Theme', answered_questions: List['Question']):
+    def __init__(self, theme: 'Theme', theme_index: int, answered_questions: Set[Tuple[int, int]]):
         self.name = theme.name
-        self.questions = [QuestionDTO(question, question in answered_questions) for question in theme.questions]
+        self.questions = [QuestionDTO(question, (theme_index, question_index) in answered_questions)
+                          for question_index, question in enumerate(theme.questions)]
 
     def to_response(self):
         return dict(
@@ -130,9 +132,10 @@ class ThemeDTO(ResponseDTO):
 
 
 class CurrentRoundDTO(ResponseDTO):
-    def __init__(self, current_round: 'Round', answered_questions: List['Question']):
+    def __init__(self, current_round: 'Round', answered_questions: Set[Tuple[int, int]]):
         self.order = current_round.order
-        self.themes = [ThemeDTO(theme, answered_questions) for theme in current_round.themes]
+        self.themes = [ThemeDTO(theme, theme_index, answered_questions)
+                       for theme_index, theme in enumerate(current_round.themes)]
 
     def to_response(self):
         return dict(
@@ -143,7 +146,7 @@ class CurrentRoundDTO(ResponseDTO):
 
 class RoundStartedDTO(ResponseDTO):
     def __init__(self, current_round: 'Round', current_player: 'Player'):
-        self.round = CurrentRoundDTO(current_round, [])
+        self.round = CurrentRoundDTO(current_round, set())
         self.current_player = PlayerNicknameDTO(current_player)
 
     def to_response(self):
@@ -200,11 +203,11 @@ class HostGameStateDTO(GameStateDTO):
 
 
 class GameSessionDescriptionDTO(ResponseDTO):
-    def __init__(self, gs: 'GameSession', is_playing: bool, is_left: bool):
-        self.creator = gs.creator.nickname
-        self.game_name = gs.game.name
-        self.max_players = gs.max_players
-        self.current_players = len(gs.players)
+    def __init__(self, entry: 'LobbyEntry', is_playing: bool, is_left: bool):
+        self.creator = entry.creator
+        self.game_name = entry.game_name
+        self.max_players = entry.max_players
+        self.current_players = entry.current_players
         self.is_playing = is_playing
         self.is_left = is_left
 
@@ -219,6 +222,27 @@ class GameSessionDescriptionDTO(ResponseDTO):
         )
 
 
+class GameResultDTO(ResponseDTO):
+    def __init__(self,
+                 creator: str,
+                 host: Optional[str],
+                 game_name: str,
+                 players: List[Tuple[str, int, bool]]):
+        self.creator = creator
+        self.host = host
+        self.game_name = game_name
+        self.players = players
+
+    def to_response(self):
+        return dict(
+            creator=self.creator,
+            host=self.host,
+            gameName=self.game_name,
+            players=[dict(nickname=nickname, score=score, isPlaying=is_playing)
+                     for nickname, score, is_playing in self.players]
+        )
+
+
 class PlayerNicknameDTO(ResponseDTO):
     def __init__(self, player: 'Player'):
         self.nickname = player.nickname
@@ -255,6 +279,22 @@ class FinalRoundTimeoutDTO(ResponseDTO):
         )
 
 
+class ConflictMetricsDTO(ResponseDTO):
+    def __init__(self, actions_count: int, conflicts_count: int, failures_count: int, conflict_rate: float):
+        self.actions_count = actions_count
+        self.conflicts_count = conflicts_count
+        self.failures_count = failures_count
+        self.conflict_rate = conflict_rate
+
+    def to_response(self):
+        return dict(
+            actionsCount=self.actions_count,
+            conflictsCount=self.conflicts_count,
+            failuresCount=self.failures_count,
+            conflictRate=self.conflict_rate
+        )
+
+
 class CreatorNicknameDTO(ResponseDTO):
     def __init__(self, user: 'User'):
         self.nickname = user.nickname
@@ -283,6 +323,14 @@ class QuestionChoiceDTO:
     question_index: int
 
 
+@dataclass
+class LobbyQueryDTO:
+    game_name: str | None = None
+    has_free_seats: bool = False
+    offset: int = 0
+    limit: int | None = None
+
+
 @dataclass
 class AnswerRequestDTO:
     answer: str | None = None
@@ -1,12 +1,12 @@
 import random
 from dataclasses import dataclass
-from typing import Optional, List, TYPE_CHECKING
+from typing import Optional, List, Dict, Set, Tuple, Any, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from ..user.entities import User
     from ..game.entities import Question, Round, Game
 
-from backend.core.entities import Entity
+from backend.core.entities import Entity, AggregateRoot, TrackedEntity
 from backend.modules.game_session.enums import Stage
 from backend.modules.game_session.exceptions import TooManyPlayers, NotCurrentPlayer, WrongQuestionRequest, WrongStage
 from backend.modules.game_session.events import PlayerJoinedEvent, PlayerLeftEvent, RoundStartedEvent, \
@@ -16,13 +16,15 @@ from backend.modules.game_session.events import PlayerJoinedEvent, PlayerLeftEve
     StopAnswerPeriodEvent, RestartAnswerPeriodEvent, StartFinalRoundPeriodEvent, GameEndedEvent
 
 
-@dataclass
+@dataclass(slots=True)
 class Answer:
     text: Optional[str] = None
     is_correct: Optional[bool] = None
 
 
-class Player(Entity):
+class Player(TrackedEntity):
+    __slots__ = ('user', 'score', 'is_playing', 'answer', '_persisted_state')
+
     def __init__(self,
                  user: 'User',
                  score: int = 0,
@@ -35,6 +37,12 @@ class Player(Entity):
         self.is_playing = is_playing
         self.answer = answer or Answer()
 
+    def get_state(self) -> Dict[str, Any]:
+        return dict(is_playing=self.is_playing,
+                    score=self.score,
+                    answer=self.answer.text,
+                    is_answer_correct=self.answer.is_correct)
+
     @property
     def username(self) -> str:
         return self.user.username
@@ -45,6 +53,8 @@ class Player(Entity):
 
 
 class CurrentQuestion(Entity):
+    __slots__ = ('_question', 'theme_index', 'question_index')
+
     def __init__(self,
                  question: 'Question',
                  theme_index: Optional[int] = None,
@@ -67,7 +77,10 @@ class CurrentQuestion(Entity):
         return self._question.value
 
 
-class GameSession(Entity):
+class GameSession(AggregateRoot, TrackedEntity):
+    __slots__ = ('version', 'creator', 'host', 'game', 'max_players', 'players', 'current_round', 'current_question',
+                 'current_player', 'stage', 'answered_questions', '_persisted_state')
+
     def __init__(self, creator: 'User',
                  game: 'Game',
                  max_players: int,
@@ -78,8 +91,10 @@ class GameSession(Entity):
                  current_player: Optional[Player] = None,  # TODO сделать свойством и брать объекты только из players
                  current_round: Optional['Round'] = None,
                  current_question: Optional['CurrentQuestion'] = None,
-                 answered_questions: Optional[List['CurrentQuestion']] = None):
+                 answered_questions: Optional[Set[Tuple[int, int]]] = None,
+                 version: int = 0):
         super().__init__(id)
+        self.version = version
         self.creator = creator
         self.host = host
         self.game = game
@@ -95,7 +110,24 @@ class GameSession(Entity):
         self.current_player = current_player
         self.current_question = current_question
 
-        self.answered_questions = answered_questions or []
+        # индексы (тема, вопрос) отвеченных вопросов текущего раунда
+        self.answered_questions = answered_questions or set()
+
+    def get_state(self) -> Dict[str, Any]:
+        return dict(stage=self.stage,
+                    current_round_id=self.current_round.id if self.current_round else None,
+                    current_question_id=self.current_question.id if self.current_question else None,
+                    current_theme_index=self.current_question.theme_index if self.current_question else None,
+                    current_question_index=self.current_question.question_index if self.current_question else None,
+                    current_player_id=self.current_player.id if self.current_player else None,
+                    player_ids=frozenset(player.id for player in self.players if player.id),
+                    answered_questions=frozenset(self.answered_questions))
+
+    def mark_persisted(self):
+        super().mark_persisted()
+
+        for player in self.players:
+            player.mark_persisted()
 
     @property
     def is_hosted(self):
@@ -185,12 +217,11 @@ class GameSession(Entity):
         if player != self.current_player:
             raise NotCurrentPlayer
 
-        try:
-            question = self.current_round.themes[theme_index].questions[question_index]
-        except IndexError:
+        question = self.current_round.get_question(theme_index, question_index)
+        if not question:
             raise WrongQuestionRequest
 
-        if question in self.answered_questions:
+        if (theme_index, question_index) in self.answered_questions:
             raise WrongQuestionRequest
 
         self.current_question = CurrentQuestion(question, theme_index, question_index)
@@ -233,7 +264,7 @@ class GameSession(Entity):
                 player.answer = answer
                 player.score += self.current_question.value
 
-                self.answered_questions.append(self.current_question)
+                self._set_current_question_answered()
 
                 self.add_event(PlayerCorrectlyAnsweredEvent(self, player))
                 self.add_event(StopAnswerPeriodEvent(self))
@@ -272,7 +303,7 @@ class GameSession(Entity):
             self.current_player.answer = Answer(is_correct=True)
             self.current_player.score += self.current_question.value
 
-            self.answered_questions.append(self.current_question)
+            self._set_current_question_answered()
 
             self.add_event(PlayerCorrectlyAnsweredEvent(self, self.current_player))
             self.add_event(StopAnswerPeriodEvent(self))
@@ -321,7 +352,7 @@ class GameSession(Entity):
             raise WrongStage()
 
     def answer_timeout(self):
-        self.answered_questions.append(self.current_question)
+        self._set_current_question_answered()
 
         self.add_event(AnswerTimeoutEvent(self, self.current_question))
 
@@ -389,8 +420,10 @@ class GameSession(Entity):
         print(self.current_player.nickname if self.current_player else None)
 
     def _is_no_more_questions(self) -> bool:
-        return len(self.answered_questions) == \
-               len(self.current_round.themes) * len(self.current_round.themes[0].questions)
+        return len(self.answered_questions) == self.current_round.questions_count
+
+    def _set_current_question_answered(self):
+        self.answered_questions.add((self.current_question.theme_index, self.current_question.question_index))
 
     def _is_all_answers_checked(self):
         return all(player.answer.is_correct is not None for player in self.players)
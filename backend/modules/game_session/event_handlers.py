@@ -1,28 +1,49 @@
-from typing import Union
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Union, Callable, Dict
+
+from django.utils import timezone
 
-from backend.infra.consumers import GameSessionConsumer
 from backend.infra.dispatcher import EventDispatcher
 from backend.infra.notifiers import notify_to_lobby, notify_to_game_session
-from backend.infra.timers import Timers, CHOOSING_QUESTION_INTERVAL, FINAL_ROUND_INTERVAL
+from backend.infra.registry import game_session_registry
+from backend.infra.timers import Timers, CHOOSING_QUESTION_INTERVAL, FINAL_ROUND_INTERVAL, TIMER_LEASE_INTERVAL, \
+    TIMER_RECOVERY_INTERVAL
+from backend.modules.game_session.buzzer import buzzer
+from backend.modules.game_session.dtos import GameSessionDescriptionDTO
+from backend.modules.game_session.enums import Stage
 from backend.modules.game_session.events import GameSessionCreatedEvent, GameSessionDeletedEvent, PlayerJoinedEvent, \
     PlayerLeftEvent, RoundStartedEvent, FinalRoundStartedEvent, CurrentQuestionChosenEvent, \
     PlayerCorrectlyAnsweredEvent, PlayerIncorrectlyAnsweredEvent, AnswerTimeoutEvent, FinalRoundTimeoutEvent, \
     PlayerInactiveEvent, PlayerActiveEvent, StartAnswerPeriodEvent, AnswersAllowedEvent, PlayerAnsweringEvent, \
     FinalRoundAnswersAllowedEvent, RestartAnswerPeriodEvent, StopAnswerPeriodEvent, StartFinalRoundPeriodEvent, \
     GameEndedEvent
+from backend.modules.game_session.lobby import LobbyEntry
+from backend.modules.game_session.repos import game_session_repo, lobby
 from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.events import UserNicknameChangedEvent
 
 
 def notify_of_game_session_created(event: GameSessionCreatedEvent):
-    notify_to_lobby(event.game_session_description_dto, 'game_session_created')
+    entry = LobbyEntry(event.game_session_id,
+                       event.creator_nickname,
+                       event.game_name,
+                       event.max_players,
+                       event.players_count)
+    game_session_description_dto = GameSessionDescriptionDTO(entry, False, False).to_response()
+
+    sequence = lobby.add(entry, 'game_session_created', game_session_description_dto)
+    notify_to_lobby(game_session_description_dto, 'game_session_created', sequence)
 
 
 def notify_of_game_session_deleted(event: GameSessionDeletedEvent):
-    notify_to_lobby(event.creator_nickname_dto, 'game_session_deleted')
+    sequence = lobby.remove(event.game_session_id, 'game_session_deleted', event.creator_nickname_dto)
+    notify_to_lobby(event.creator_nickname_dto, 'game_session_deleted', sequence)
 
 
 def notify_of_player_joined(event: PlayerJoinedEvent):
-    notify_to_lobby(event.creator_nickname_dto, 'player_joined')
+    sequence = lobby.change_players_count(event.game_session_id, 1, 'player_joined', event.creator_nickname_dto)
+    notify_to_lobby(event.creator_nickname_dto, 'player_joined', sequence)
     notify_to_game_session(event.game_session_id, event.player_nickname_dto, 'player_joined')
 
 
@@ -31,7 +52,8 @@ def notify_of_player_active(event: PlayerJoinedEvent):
 
 
 def notify_of_player_left(event: PlayerLeftEvent):
-    notify_to_lobby(event.creator_nickname_dto, 'player_left')
+    sequence = lobby.change_players_count(event.game_session_id, -1, 'player_left', event.creator_nickname_dto)
+    notify_to_lobby(event.creator_nickname_dto, 'player_left', sequence)
     notify_to_game_session(event.game_session_id, event.player_nickname_dto, 'player_left')
 
 
@@ -75,51 +97,127 @@ def notify_of_game_ended(event: GameEndedEvent):
 
 
 def add_creator_to_notifier(event: GameSessionCreatedEvent):
-    GameSessionConsumer.add_user(event.creator_username, event.game_session_id)
+    game_session_registry.add_user(event.creator_username, event.game_session_id)
 
 
 def add_player_to_notifier(event: PlayerJoinedEvent):
-    GameSessionConsumer.add_user(event.player_username, event.game_session_id)
+    game_session_registry.add_user(event.player_username, event.game_session_id)
 
 
 def remove_player_from_notifier(event: PlayerLeftEvent):
-    GameSessionConsumer.remove_user(event.player_username)
+    game_session_registry.remove_user(event.player_username)
 
 
 def remove_group_from_notifier(event: GameSessionDeletedEvent):
-    GameSessionConsumer.remove_group(event.game_session_id)
+    game_session_registry.remove_group(event.game_session_id)
+
+
+def refresh_user_in_game_sessions(event: UserNicknameChangedEvent):
+    game_session_repo.refresh_user(event.user_id, event.nickname)
+
+
+# сроки таймеров, взведённых в этом процессе, чтобы восстановление не заменило более новый таймер старым
+_armed_deadlines: Dict[int, datetime] = dict()
+_armed_deadlines_lock = Lock()
+
+
+def _fire_timer(game_session_id: int, deadline: datetime, callback: Callable[[int], None]):
+    with _armed_deadlines_lock:
+        if _armed_deadlines.get(game_session_id) == deadline:
+            del _armed_deadlines[game_session_id]
+
+    if not game_session_repo.claim_timer(game_session_id, deadline, timedelta(seconds=TIMER_LEASE_INTERVAL)):
+        return
+
+    try:
+        callback(game_session_id)
+    finally:
+        game_session_repo.clear_timer_deadline(game_session_id, deadline)
+
+
+def _arm_timer(game_session_id: int, deadline: datetime, callback: Callable[[int], None], is_recovered=False):
+    with _armed_deadlines_lock:
+        armed_deadline = _armed_deadlines.get(game_session_id)
+        if is_recovered and armed_deadline and armed_deadline >= deadline:
+            return
+
+        _armed_deadlines[game_session_id] = deadline
+        Timers.start(key=game_session_id,
+                     interval=max((deadline - timezone.now()).total_seconds(), 0),
+                     callback=_fire_timer,
+                     args=(game_session_id, deadline, callback))
+
+
+def _start_timer(game_session_id: int, interval: int, callback: Callable[[int], None]):
+    deadline = timezone.now() + timedelta(seconds=interval)
+    game_session_repo.set_timer_deadline(game_session_id, deadline)
+
+    _arm_timer(game_session_id, deadline, callback)
+
+
+def _stop_timer(game_session_id: int):
+    with _armed_deadlines_lock:
+        _armed_deadlines.pop(game_session_id, None)
+        Timers.stop(game_session_id)
+
+    game_session_repo.set_timer_deadline(game_session_id, None)
+
+
+def recover_timers():
+    """
+    Взводит таймеры, сохранённые в БД, на оставшееся до срабатывания время.
+    Выполняется периодически, чтобы подхватить таймеры упавших воркеров.
+    """
+    service = GameSessionService()
+
+    try:
+        for game_session_id, stage, deadline in game_session_repo.get_timer_deadlines():
+            if stage == Stage.ANSWERING:
+                _arm_timer(game_session_id, deadline, service.answer_timeout, is_recovered=True)
+            elif stage in (Stage.FINAL_ROUND, Stage.FINAL_ROUND_ANSWERING):
+                _arm_timer(game_session_id, deadline, service.final_round_timeout, is_recovered=True)
+    finally:
+        # ошибка чтения сроков не должна останавливать восстановление в этом процессе
+        schedule_timer_recovery(TIMER_RECOVERY_INTERVAL)
+
+
+def schedule_timer_recovery(interval: int = 0):
+    # при запуске сервера восстановление выполняется в потоке таймеров, а не при импорте точки входа
+    Timers.start(key='recover_timers',
+                 interval=interval,
+                 callback=recover_timers,
+                 args=())
 
 
 def start_question_timer(event: StartAnswerPeriodEvent):
     service = GameSessionService()
 
-    Timers.start(key=event.game_session_id,
-                 interval=CHOOSING_QUESTION_INTERVAL,
-                 callback=service.answer_timeout,
-                 args=(event.game_session_id,))
+    _start_timer(event.game_session_id, CHOOSING_QUESTION_INTERVAL, service.answer_timeout)
 
 
 def stop_question_timer(event: Union[PlayerCorrectlyAnsweredEvent, GameSessionDeletedEvent]):
-    Timers.stop(event.game_session_id)
+    _stop_timer(event.game_session_id)
 
 
 def restart_question_timer(event: PlayerIncorrectlyAnsweredEvent):
     service = GameSessionService()
 
-    Timers.stop(event.game_session_id)
-    Timers.start(key=event.game_session_id,
-                 interval=CHOOSING_QUESTION_INTERVAL,
-                 callback=service.answer_timeout,
-                 args=(event.game_session_id,))
+    _start_timer(event.game_session_id, CHOOSING_QUESTION_INTERVAL, service.answer_timeout)
 
 
 def start_final_round_timer(event: FinalRoundStartedEvent | StartFinalRoundPeriodEvent):
     service = GameSessionService()
 
-    Timers.start(key=event.game_session_id,
-                 interval=FINAL_ROUND_INTERVAL,
-                 callback=service.final_round_timeout,
-                 args=(event.game_session_id,))
+    _start_timer(event.game_session_id, FINAL_ROUND_INTERVAL, service.final_round_timeout)
+
+
+def open_buzzer(event: AnswersAllowedEvent | RestartAnswerPeriodEvent):
+    if isinstance(event, AnswersAllowedEvent) or event.is_hosted:
+        buzzer.open(event.game_session_id)
+
+
+def close_buzzer(event: StopAnswerPeriodEvent | AnswerTimeoutEvent | GameSessionDeletedEvent):
+    buzzer.close(event.game_session_id)
 
 
 def register_handlers():
@@ -144,6 +242,7 @@ def register_handlers():
     EventDispatcher.register_handler(add_player_to_notifier, PlayerJoinedEvent)
     EventDispatcher.register_handler(remove_player_from_notifier, PlayerLeftEvent)
     EventDispatcher.register_handler(remove_group_from_notifier, GameSessionDeletedEvent)
+    EventDispatcher.register_handler(refresh_user_in_game_sessions, UserNicknameChangedEvent)
     EventDispatcher.register_handler(start_question_timer, StartAnswerPeriodEvent)
     EventDispatcher.register_handler(start_question_timer, AnswersAllowedEvent)
     EventDispatcher.register_handler(stop_question_timer, PlayerAnsweringEvent)
@@ -152,3 +251,8 @@ def register_handlers():
     EventDispatcher.register_handler(restart_question_timer, RestartAnswerPeriodEvent)
     EventDispatcher.register_handler(start_final_round_timer, StartFinalRoundPeriodEvent)
     EventDispatcher.register_handler(start_final_round_timer, FinalRoundAnswersAllowedEvent)
+    EventDispatcher.register_handler(open_buzzer, AnswersAllowedEvent, is_immediate=True)
+    EventDispatcher.register_handler(open_buzzer, RestartAnswerPeriodEvent, is_immediate=True)
+    EventDispatcher.register_handler(close_buzzer, StopAnswerPeriodEvent, is_immediate=True)
+    EventDispatcher.register_handler(close_buzzer, AnswerTimeoutEvent, is_immediate=True)
+    EventDispatcher.register_handler(close_buzzer, GameSessionDeletedEvent, is_immediate=True)
@@ -7,7 +7,7 @@ if TYPE_CHECKING:
     from .entities import GameSession, Player
 
 from backend.core.events import Event
-from backend.modules.game_session.dtos import GameSessionDescriptionDTO, CreatorNicknameDTO, PlayerNicknameDTO, \
+from backend.modules.game_session.dtos import CreatorNicknameDTO, PlayerNicknameDTO, \
     CurrentQuestionDTO, PlayerDTO, FinalRoundQuestionDTO, CorrectAnswerDTO, FinalRoundTimeoutDTO, RoundStartedDTO, \
     CurrentQuestionAnswerDTO
 
@@ -25,8 +25,11 @@ class GameSessionCreatedEvent(GameSessionEvent):
     def __init__(self, game_session: 'GameSession'):
         super().__init__(game_session)
         self.creator_username = game_session.creator.username
-
-        self.game_session_description_dto = GameSessionDescriptionDTO(game_session, False, False).to_response()
+        # id у сессии появляется только при сохранении, поэтому запись лобби собирает обработчик
+        self.creator_nickname = game_session.creator.nickname
+        self.game_name = game_session.game.name
+        self.max_players = game_session.max_players
+        self.players_count = len(game_session.players)
 
 
 class GameSessionDeletedEvent(GameSessionEvent):
@@ -105,6 +108,7 @@ class StopAnswerPeriodEvent(GameSessionEvent):
 class RestartAnswerPeriodEvent(GameSessionEvent):
     def __init__(self, game_session: 'GameSession'):
         super().__init__(game_session)
+        self.is_hosted = game_session.is_hosted
 
 
 class PlayerAnsweringEvent(GameSessionEvent):
@@ -24,3 +24,7 @@ class AlreadyCreated(Exception):
 
 class WrongStage(Exception):
     code = 'wrong_stage'
+
+
+class ConcurrentModification(Exception):
+    code = 'concurrent_modification'
@@ -0,0 +1,130 @@
+from collections import deque
+from threading import Lock
+from time import monotonic, time
+from typing import Dict, List, Tuple, Callable, Optional, Deque
+
+LOBBY_REFRESH_INTERVAL = 5
+LOBBY_DELTAS_SIZE = 1000
+
+
+class LobbyEntry:
+    def __init__(self, game_session_id: int, creator: str, game_name: str, max_players: int, current_players: int):
+        self.game_session_id = game_session_id
+        self.creator = creator
+        self.game_name = game_name
+        self.max_players = max_players
+        self.current_players = current_players
+
+    @property
+    def has_free_seats(self) -> bool:
+        return self.current_players < self.max_players
+
+
+class Lobby:
+    """
+    Список игровых сессий для лобби, который обновляется обработчиками событий, а не читается из агрегатов.
+    События приходят только в процесс, сохранивший сессию, поэтому раз в LOBBY_REFRESH_INTERVAL секунд
+    список перечитывается из БД одним запросом.
+
+    Каждое изменение получает порядковый номер и сохраняется в кольцевом буфере, чтобы переподключившийся
+    клиент получил только пропущенные изменения. Номера начинаются со времени запуска в миллисекундах,
+    поэтому номера, выданные до перезапуска, оказываются вне буфера.
+    Последовательность у каждого процесса своя: предполагается, что лобби обслуживает один процесс.
+    """
+
+    def __init__(self,
+                 loader: Callable[[], List[LobbyEntry]],
+                 refresh_interval: float = LOBBY_REFRESH_INTERVAL,
+                 deltas_size: int = LOBBY_DELTAS_SIZE):
+        self.refresh_interval = refresh_interval
+        self._loader = loader
+        self._entries: Dict[int, LobbyEntry] = dict()
+        self._loaded_at: Optional[float] = None
+        self._sequence = int(time() * 1000)
+        self._deltas: Deque[Tuple[int, str, Dict]] = deque(maxlen=deltas_size)
+        self._lock = Lock()
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    def get_page(self,
+                 game_name: Optional[str] = None,
+                 has_free_seats: bool = False,
+                 offset: int = 0,
+                 limit: Optional[int] = None) -> Tuple[List[LobbyEntry], int, int]:
+        self._refresh_if_expired()
+
+        with self._lock:
+            entries = [LobbyEntry(entry.game_session_id,
+                                  entry.creator,
+                                  entry.game_name,
+                                  entry.max_players,
+                                  entry.current_players)
+                       for entry in self._entries.values()
+                       if (game_name is None or entry.game_name == game_name)
+                       and (not has_free_seats or entry.has_free_seats)]
+            sequence = self._sequence
+
+        end = offset + limit if limit is not None else None
+
+        return entries[offset:end], len(entries), sequence
+
+    def get_deltas(self, since: int) -> Optional[List[Tuple[int, str, Dict]]]:
+        """
+        Возвращает изменения с номерами больше since или None, если часть из них уже вытеснена из буфера.
+        """
+        with self._lock:
+            if since == self._sequence:
+                return []
+
+            if not self._deltas or not self._deltas[0][0] - 1 <= since < self._sequence:
+                return None
+
+            return [delta for delta in self._deltas if delta[0] > since]
+
+    def add(self, entry: LobbyEntry, event_type: str, data: Dict) -> int:
+        with self._lock:
+            self._entries[entry.game_session_id] = entry
+
+            return self._add_delta(event_type, data)
+
+    def remove(self, game_session_id: int, event_type: str, data: Dict) -> int:
+        with self._lock:
+            self._entries.pop(game_session_id, None)
+
+            return self._add_delta(event_type, data)
+
+    def change_players_count(self, game_session_id: int, count: int, event_type: str, data: Dict) -> int:
+        with self._lock:
+            entry = self._entries.get(game_session_id)
+            if entry:
+                entry.current_players += count
+
+            return self._add_delta(event_type, data)
+
+    def _add_delta(self, event_type: str, data: Dict) -> int:
+        self._sequence += 1
+        self._deltas.append((self._sequence, event_type, data))
+
+        return self._sequence
+
+    def _refresh_if_expired(self):
+        if self._loaded_at is not None and monotonic() - self._loaded_at < self.refresh_interval:
+            return
+
+        entries = {entry.game_session_id: entry for entry in self._loader()}
+
+        with self._lock:
+            if self._state(entries) != self._state(self._entries):
+                # изменения, сделанные другими процессами, нельзя восстановить из буфера
+                self._sequence += 1
+                self._deltas.clear()
+
+            self._entries = entries
+            self._loaded_at = monotonic()
+
+    @staticmethod
+    def _state(entries: Dict[int, LobbyEntry]) -> Dict[int, Tuple]:
+        return {game_session_id: (entry.creator, entry.game_name, entry.max_players, entry.current_players)
+                for game_session_id, entry in entries.items()}
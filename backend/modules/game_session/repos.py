@@ -1,103 +1,280 @@
-from typing import List, TYPE_CHECKING
+import atexit
+from contextlib import nullcontext
+from queue import Queue, Empty
+from threading import Lock, RLock, Thread
+from time import monotonic
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Dict, Set, Tuple, Iterator, Optional, ContextManager, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from ..user.entities import User
 
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.db.models import Prefetch, QuerySet, Q, F, Count
+from django.utils import timezone
+
 from backend.core.repos import Repository
-from backend.infra.models import ORMGameSession, ORMPlayer, ORMRound, ORMQuestion
-from backend.modules.game_session.exceptions import GameSessionNotFound
+from backend.infra.models import ORMGameSession, ORMPlayer
+from backend.modules.game.repos import game_repo
+from backend.modules.game_session.exceptions import GameSessionNotFound, ConcurrentModification
 from backend.modules.game_session.entities import GameSession
+from backend.modules.game_session.enums import Stage
+from backend.modules.game_session.lobby import Lobby, LobbyEntry
+from backend.modules.game_session.state_cache import GameStateCache
+
+
+def _user_relations(prefix: str) -> List[str]:
+    return [f'{prefix}__user', f'{prefix}__hosted_game_session']
+
+
+def _active_players(relation: str) -> Prefetch:
+    # для id активной сессии пользователя достаточно его активных игроков, а не всей истории игр
+    return Prefetch(relation, queryset=ORMPlayer.objects.filter(is_playing=True))
+
+
+def game_session_queryset() -> QuerySet:
+    """
+    Загружает агрегат игровой сессии целиком фиксированным числом запросов,
+    не зависящим от количества игроков и сыгранных ими игр. Содержимое игры берётся из game_cache.
+    """
+    orm_players_qs = ORMPlayer.objects.select_related(*_user_relations('user')) \
+        .prefetch_related(_active_players('user__players')) \
+        .order_by('pk')
+
+    return ORMGameSession.objects \
+        .select_related(*_user_relations('creator'),
+                        *_user_relations('host')) \
+        .prefetch_related(_active_players('creator__players'),
+                          _active_players('host__players'),
+                          Prefetch('players', queryset=orm_players_qs))
+
+
+def _to_domain(orm_game_session: ORMGameSession) -> 'GameSession':
+    game = game_repo.get_by_id(orm_game_session.game_id)
+
+    return orm_game_session.to_domain(game)
 
 
 class GameSessionRepo(Repository):
+    @staticmethod
+    def lock(game_session_id) -> ContextManager:
+        return nullcontext()
+
+    @classmethod
+    def save(cls, game_session: 'GameSession') -> 'GameSession':
+        game_state_cache.invalidate(game_session.id)
+
+        return super().save(game_session)
+
+    @classmethod
+    def delete(cls, game_session: 'GameSession'):
+        game_state_cache.invalidate(game_session.id)
+
+        super().delete(game_session)
+
     @staticmethod
     def is_exists(creator: 'User'):
         return ORMGameSession.objects.filter(creator_id=creator.id).exists()
 
     @staticmethod
     def _create(game_session: 'GameSession') -> 'GameSession':
-        orm_game_session = ORMGameSession.objects.create(creator_id=game_session.creator.id,
-                                                         host_id=game_session.host.id if game_session.host else None,
-                                                         game_id=game_session.game.id,
-                                                         max_players=game_session.max_players)
-        game_session.id = orm_game_session.pk
-
-        if game_session.players:
-            player = game_session.players[0]
-            orm_player = ORMPlayer.objects.create(user_id=player.user.id,
-                                                  game_session=orm_game_session)
-            player.id = orm_player.pk
+        with transaction.atomic():
+            orm_game_session = ORMGameSession.objects.create(creator_id=game_session.creator.id,
+                                                             host_id=game_session.host.id if game_session.host else None,
+                                                             game_id=game_session.game.id,
+                                                             max_players=game_session.max_players)
+            game_session.id = orm_game_session.pk
+
+            if game_session.players:
+                player = game_session.players[0]
+                orm_player = ORMPlayer.objects.create(user_id=player.user.id,
+                                                      game_session=orm_game_session)
+                player.id = orm_player.pk
+
+        game_session.mark_persisted()
 
         return game_session
 
     @staticmethod
     def get(game_session_id) -> 'GameSession':
+        game_session = GameSessionRepo._get_identity(('game_session', game_session_id))
+        if game_session:
+            return game_session
+
         try:
-            orm_game_session = ORMGameSession.objects.get(pk=game_session_id)
+            orm_game_session = game_session_queryset().get(pk=game_session_id)
         except ORMGameSession.DoesNotExist:
             raise GameSessionNotFound
 
-        return orm_game_session.to_domain()
+        game_session = _to_domain(orm_game_session)
+        game_session.mark_persisted()
+        GameSessionRepo._put_identity(game_session, ('game_session', game_session.id))
+
+        return game_session
 
     @staticmethod
     def get_all() -> List['GameSession']:
-        return [orm_gs.to_domain() for orm_gs in ORMGameSession.objects.all().order_by('pk')]
+        game_sessions = [_to_domain(orm_gs) for orm_gs in game_session_queryset().order_by('pk')]
+        for game_session in game_sessions:
+            game_session.mark_persisted()
+
+        return game_sessions
 
     @staticmethod
-    def _update(game_session: 'GameSession') -> 'GameSession':
-        try:
-            orm_game_session = ORMGameSession.objects.get(pk=game_session.id)
-        except ORMGameSession.DoesNotExist:
+    def get_version(game_session_id: int) -> int:
+        version = ORMGameSession.objects.filter(pk=game_session_id).values_list('version', flat=True).first()
+        if version is None:
             raise GameSessionNotFound
 
-        players_ids = [player.id for player in game_session.players]
-        deleted_players_qs = orm_game_session.players.exclude(pk__in=players_ids)
-        deleted_players_qs.delete()
+        return version
+
+    @staticmethod
+    def get_lobby_entries() -> List[LobbyEntry]:
+        rows = ORMGameSession.objects \
+            .annotate(current_players=Count('players')) \
+            .order_by('pk') \
+            .values_list('pk', 'creator__nickname', 'game__name', 'max_players', 'current_players')
+
+        return [LobbyEntry(*row) for row in rows]
+
+    @staticmethod
+    def iter_results(
+            chunk_size: int = settings.EXPORT_CHUNK_SIZE
+    ) -> Iterator[Tuple[str, Optional[str], str, List[Tuple[str, int, bool]]]]:
+        """
+        Читает результаты завершённых сессий по одной через курсор на стороне сервера:
+        никнеймы создателя и ведущего, название игры и никнеймы, очки и активность игроков.
+        """
+        rows = ORMPlayer.objects \
+            .filter(game_session__stage=Stage.END_GAME) \
+            .order_by('game_session_id', 'pk') \
+            .values_list('game_session_id', 'game_session__creator__nickname', 'game_session__host__nickname',
+                         'game_session__game__name', 'user__nickname', 'score', 'is_playing') \
+            .iterator(chunk_size=chunk_size)
+
+        for _, session_rows in groupby(rows, key=itemgetter(0)):
+            session_rows = list(session_rows)
+            _, creator, host, game_name = session_rows[0][:4]
+
+            yield creator, host, game_name, [row[4:] for row in session_rows]
+
+    @staticmethod
+    def _update(game_session: 'GameSession') -> 'GameSession':
+        # вызывается внутри транзакции записи единицы работы, которая при конфликте откатывается целиком
+        # (или до своей точки сохранения, если действие выполняется во внешней транзакции), либо вне транзакций.
+        # Собственной точки сохранения нет, поэтому оборачивать вызов напрямую во внешнюю транзакцию нельзя:
+        # после конфликта она будет помечена для отката и следующий запрос в ней завершится ошибкой
+        with transaction.atomic(savepoint=False):
+            GameSessionRepo._create_players(game_session)
+
+            changes = {field: value for field, (_, value) in game_session.get_changes().items()}
+            changes.pop('player_ids', None)
+            if 'answered_questions' in changes:
+                changes['answered_questions'] = ORMGameSession.answered_questions_from_domain(
+                    game_session.current_round, changes['answered_questions']
+                )
+
+            # версия проверяется и увеличивается тем же запросом, при конфликте транзакция откатывается
+            updated_count = ORMGameSession.objects \
+                .filter(pk=game_session.id, version=game_session.version) \
+                .update(version=F('version') + 1, **changes)
+            if not updated_count:
+                if not ORMGameSession.objects.filter(pk=game_session.id).exists():
+                    raise GameSessionNotFound
+                raise ConcurrentModification
+
+            GameSessionRepo._update_players(game_session)
+
+        game_session.version += 1
+        game_session.mark_persisted()
+
+        return game_session
+
+    @staticmethod
+    def _create_players(game_session: 'GameSession'):
         for player in game_session.players:
-            if player.id:
-                orm_player = ORMPlayer.objects.get(pk=player.id)
-                orm_player.is_playing = player.is_playing
-                orm_player.score = player.score
-                orm_player.answer = player.answer.text
-                orm_player.is_answer_correct = player.answer.is_correct
-                orm_player.save()
-            else:
+            if not player.id:
                 orm_player = ORMPlayer.objects.create(user_id=player.user.id,
-                                                      game_session=orm_game_session)
+                                                      game_session_id=game_session.id,
+                                                      **player.get_state())
                 player.id = orm_player.pk
+                player.mark_persisted()
 
-        if game_session.current_round:
-            orm_current_round = ORMRound.objects.get(pk=game_session.current_round.id)
-            orm_game_session.current_round = orm_current_round
-        else:
-            orm_game_session.current_round = None
+    @staticmethod
+    def _update_players(game_session: 'GameSession'):
+        players_ids = {player.id for player in game_session.players}
 
-        if game_session.current_question:
-            orm_current_question = ORMQuestion.objects.get(pk=game_session.current_question.id)
-            orm_game_session.current_question = orm_current_question
-        else:
-            orm_game_session.current_question = None
-
-        if game_session.current_player:
-            current_player = game_session.current_player
-            orm_current_player = ORMPlayer.objects.get(pk=current_player.id)
-            orm_current_player.score = current_player.score
-            orm_current_player.answer = current_player.answer.text
-            orm_current_player.is_answer_correct = current_player.answer.is_correct
-            orm_current_player.save()
-            orm_game_session.current_player = orm_current_player
-        else:
-            orm_game_session.current_player = None
+        if not game_session.is_tracked:
+            ORMPlayer.objects.filter(game_session_id=game_session.id).exclude(pk__in=players_ids).delete()
+        elif 'player_ids' in game_session.get_changes():
+            persisted_players_ids, _ = game_session.get_changes()['player_ids']
+            ORMPlayer.objects.filter(pk__in=persisted_players_ids - players_ids).delete()
 
-        orm_game_session.stage = game_session.stage
+        changed_orm_players = list()
+        changed_fields = set()
+        for player in game_session.players:
+            player_changes = player.get_changes()
+            if player_changes:
+                changed_orm_players.append(ORMPlayer(pk=player.id, **player.get_state()))
+                changed_fields.update(player_changes)
 
-        answered_questions_ids = [question.id for question in game_session.answered_questions]
-        orm_questions_qs = ORMQuestion.objects.filter(pk__in=answered_questions_ids)
-        orm_game_session.answered_questions.set(orm_questions_qs)
+        if changed_orm_players:
+            ORMPlayer.objects.bulk_update(changed_orm_players, changed_fields)
 
-        orm_game_session.save()
+    @classmethod
+    def refresh_user(cls, user_id: int, nickname: str):
+        cls._bump_user_game_sessions(user_id, excluded_ids=set())
 
-        return game_session
+    @staticmethod
+    def _bump_user_game_sessions(user_id: int, excluded_ids: Set[int]):
+        """
+        Увеличивает версию сессий, в которых участвует пользователь: состояния сессий с его прежним никнеймом,
+        закэшированные в любом процессе, перестают совпадать с версией в БД.
+        """
+        game_session_ids = set(ORMGameSession.objects
+                               .filter(Q(players__user_id=user_id) | Q(host_id=user_id))
+                               .values_list('pk', flat=True)) - excluded_ids
+        if game_session_ids:
+            ORMGameSession.objects.filter(pk__in=game_session_ids).update(version=F('version') + 1)
+
+        for game_session_id in game_session_ids:
+            game_state_cache.invalidate(game_session_id)
+
+    @staticmethod
+    def set_timer_deadline(game_session_id: int, deadline: Optional[datetime]):
+        ORMGameSession.objects \
+            .filter(pk=game_session_id) \
+            .update(timer_deadline=deadline, timer_lease_until=None)
+
+    @staticmethod
+    def clear_timer_deadline(game_session_id: int, deadline: datetime):
+        ORMGameSession.objects \
+            .filter(pk=game_session_id, timer_deadline=deadline) \
+            .update(timer_deadline=None, timer_lease_until=None)
+
+    @staticmethod
+    def claim_timer(game_session_id: int, deadline: datetime, lease: timedelta) -> bool:
+        """
+        Захватывает срабатывание таймера: из всех воркеров, у которых взведён этот таймер,
+        его получит только один, пока не истечёт аренда.
+        """
+        now = timezone.now()
+
+        return bool(ORMGameSession.objects
+                    .filter(Q(timer_lease_until__isnull=True) | Q(timer_lease_until__lt=now),
+                            pk=game_session_id,
+                            timer_deadline=deadline)
+                    .update(timer_lease_until=now + lease))
+
+    @staticmethod
+    def get_timer_deadlines() -> List[Tuple[int, Stage, datetime]]:
+        return list(ORMGameSession.objects
+                    .filter(timer_deadline__isnull=False,
+                            stage__in=(Stage.ANSWERING, Stage.FINAL_ROUND, Stage.FINAL_ROUND_ANSWERING))
+                    .values_list('pk', 'stage', 'timer_deadline'))
 
     @staticmethod
     def _delete(game_session: 'GameSession'):
@@ -109,4 +286,205 @@ class GameSessionRepo(Repository):
         orm_game_session.delete()
 
 
-game_session_repo = GameSessionRepo()
+class InMemoryGameSessionRepo(GameSessionRepo):
+    """
+    Хранит активные игровые сессии в памяти процесса и отдаёт их без обращения к БД.
+    Изменения состава игроков записываются сразу, смена стадии - фоновым потоком,
+    остальные изменения - пакетно раз в GAME_SESSION_FLUSH_INTERVAL секунд и при завершении процесса.
+    Сессия, которую не удалось записать, записывается повторно, пока запись не пройдёт.
+    Подходит только для запуска с одним воркером.
+    """
+
+    _game_sessions: Dict[int, 'GameSession'] = dict()
+    _locks: Dict[int, RLock] = dict()
+    _locks_lock = Lock()
+
+    _dirty_ids: Set[int] = set()
+    _dirty_ids_lock = Lock()
+    _retry_attempts: Dict[int, int] = dict()
+    _retry_at: Dict[int, float] = dict()
+    _flush_queue: Queue = Queue()
+    _flusher: Optional[Thread] = None
+
+    @classmethod
+    def lock(cls, game_session_id) -> RLock:
+        with cls._locks_lock:
+            lock = cls._locks.get(game_session_id)
+            if not lock:
+                lock = cls._locks[game_session_id] = RLock()
+
+        return lock
+
+    @classmethod
+    def get(cls, game_session_id) -> 'GameSession':
+        with cls.lock(game_session_id):
+            game_session = cls._game_sessions.get(game_session_id)
+            if not game_session:
+                game_session = cls._game_sessions[game_session_id] = GameSessionRepo.get(game_session_id)
+
+        return game_session
+
+    @classmethod
+    def get_version(cls, game_session_id: int) -> int:
+        game_session = cls._game_sessions.get(game_session_id)
+
+        return game_session.version if game_session else GameSessionRepo.get_version(game_session_id)
+
+    @classmethod
+    def get_all(cls) -> List['GameSession']:
+        return [cls._game_sessions.get(game_session.id, game_session)
+                for game_session in GameSessionRepo.get_all()]
+
+    @classmethod
+    def iter_results(
+            cls,
+            chunk_size: int = settings.EXPORT_CHUNK_SIZE
+    ) -> Iterator[Tuple[str, Optional[str], str, List[Tuple[str, int, bool]]]]:
+        # очки игроков могут быть ещё не записаны в БД
+        cls.flush_all()
+
+        return GameSessionRepo.iter_results(chunk_size)
+
+    @classmethod
+    def _create(cls, game_session: 'GameSession') -> 'GameSession':
+        game_session = GameSessionRepo._create(game_session)
+        cls._game_sessions[game_session.id] = game_session
+
+        cls._start_flusher()
+
+        return game_session
+
+    @classmethod
+    def _update(cls, game_session: 'GameSession') -> 'GameSession':
+        cls._game_sessions[game_session.id] = game_session
+
+        if cls._is_players_changed(game_session):
+            return GameSessionRepo._update(game_session)
+
+        if 'stage' in game_session.get_changes():
+            cls._flush_queue.put(game_session.id)
+        else:
+            with cls._dirty_ids_lock:
+                cls._dirty_ids.add(game_session.id)
+
+        cls._start_flusher()
+
+        return game_session
+
+    @classmethod
+    def _delete(cls, game_session: 'GameSession'):
+        with cls.lock(game_session.id):
+            cls._game_sessions.pop(game_session.id, None)
+            GameSessionRepo._delete(game_session)
+
+    @classmethod
+    def refresh_user(cls, user_id: int, nickname: str):
+        # версия сессий в памяти не меняется в БД, иначе их запись завершалась бы конфликтом
+        for game_session in list(cls._game_sessions.values()):
+            with cls.lock(game_session.id):
+                users = [game_session.creator, game_session.host, *(player.user for player in game_session.players)]
+                changed_users = [user for user in users if user and user.id == user_id]
+                for user in changed_users:
+                    user.nickname = nickname
+
+            if changed_users:
+                game_state_cache.invalidate(game_session.id)
+
+        cls._bump_user_game_sessions(user_id, excluded_ids=set(cls._game_sessions))
+
+    @staticmethod
+    def _is_players_changed(game_session: 'GameSession') -> bool:
+        # от состава и активности игроков зависят данные пользователей, которые читаются из БД
+        return 'player_ids' in game_session.get_changes() \
+            or any(not player.id or 'is_playing' in player.get_changes() for player in game_session.players)
+
+    @classmethod
+    def _start_flusher(cls):
+        with cls._locks_lock:
+            if cls._flusher:
+                return
+
+            cls._flusher = Thread(target=cls._run_flusher, name='game_session_flusher', daemon=True)
+            cls._flusher.start()
+
+        atexit.register(cls.flush_all)
+
+    @classmethod
+    def _run_flusher(cls):
+        flush_at = monotonic() + settings.GAME_SESSION_FLUSH_INTERVAL
+        while True:
+            try:
+                game_session_ids = {cls._flush_queue.get(timeout=max(flush_at - monotonic(), 0))}
+            except Empty:
+                game_session_ids = set()
+
+            # изменения без смены стадии ждут не дольше GAME_SESSION_FLUSH_INTERVAL, даже если очередь не пустеет
+            if monotonic() >= flush_at:
+                game_session_ids |= cls._pop_dirty_ids()
+                flush_at = monotonic() + settings.GAME_SESSION_FLUSH_INTERVAL
+
+            close_old_connections()
+            cls._flush_ids(game_session_ids)
+
+    @classmethod
+    def _pop_dirty_ids(cls) -> Set[int]:
+        now = monotonic()
+        with cls._dirty_ids_lock:
+            game_session_ids = {game_session_id for game_session_id in cls._dirty_ids
+                                if cls._retry_at.get(game_session_id, 0) <= now}
+            cls._dirty_ids -= game_session_ids
+
+        return game_session_ids
+
+    @classmethod
+    def _flush_ids(cls, game_session_ids: Set[int]):
+        for game_session_id in game_session_ids:
+            if cls._flush(game_session_id):
+                with cls._dirty_ids_lock:
+                    cls._retry_attempts.pop(game_session_id, None)
+                    cls._retry_at.pop(game_session_id, None)
+            else:
+                cls._retry_later(game_session_id)
+
+    @classmethod
+    def _retry_later(cls, game_session_id: int):
+        """
+        Несохранённая сессия остаётся в памяти и записывается повторно с экспоненциально растущей паузой.
+        """
+        with cls._dirty_ids_lock:
+            attempts = cls._retry_attempts[game_session_id] = cls._retry_attempts.get(game_session_id, 0) + 1
+            delay = min(settings.GAME_SESSION_FLUSH_INTERVAL * 2 ** (attempts - 1),
+                        settings.GAME_SESSION_FLUSH_MAX_BACKOFF)
+            cls._retry_at[game_session_id] = monotonic() + delay
+            cls._dirty_ids.add(game_session_id)
+
+        print(f'retrying flush of gs {game_session_id} in {delay}s, attempt {attempts}')
+
+    @classmethod
+    def _flush(cls, game_session_id: int) -> bool:
+        with cls.lock(game_session_id):
+            game_session = cls._game_sessions.get(game_session_id)
+            if not game_session or not game_session.get_changes() \
+                    and not any(player.get_changes() for player in game_session.players):
+                return True
+
+            try:
+                GameSessionRepo._update(game_session)
+            except GameSessionNotFound:
+                cls._game_sessions.pop(game_session_id, None)
+            except Exception as e:
+                print(f'failed to flush gs {game_session_id}: {e!r}')
+                return False
+
+        return True
+
+    @classmethod
+    def flush_all(cls):
+        for game_session_id in list(cls._game_sessions):
+            cls._flush(game_session_id)
+
+
+game_session_repo = InMemoryGameSessionRepo() if settings.GAME_SESSION_STORAGE == 'memory' else GameSessionRepo()
+
+lobby = Lobby(game_session_repo.get_lobby_entries)
+game_state_cache = GameStateCache()
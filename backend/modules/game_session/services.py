@@ -1,32 +1,121 @@
-from typing import List, TYPE_CHECKING
+from functools import wraps
+from threading import Lock
+from time import monotonic
+from typing import List, Dict, Tuple, Iterator, Optional, Callable, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from backend.modules.game_session.dtos import CreateGameSessionDTO, JoinGameSessionDTO, QuestionChoiceDTO, \
         AnswerRequestDTO
 
+from backend.core.repos import unit_of_work
+from backend.core.services import to_async
 from backend.modules.game.repos import game_repo
+from backend.modules.game_session.buzzer import buzzer
 from backend.modules.game_session.dtos import GameStateDTO, GameSessionDescriptionDTO, CurrentQuestionAnswerDTO, \
-    HostGameStateDTO
+    HostGameStateDTO, LobbyQueryDTO, GameResultDTO, ConflictMetricsDTO
 from backend.modules.game_session.entities import GameSession
 from backend.modules.game_session.events import GameSessionCreatedEvent, GameSessionDeletedEvent
-from backend.modules.game_session.exceptions import AlreadyPlaying, AlreadyCreated, GameSessionNotFound
-from backend.modules.game_session.repos import game_session_repo
+from backend.modules.game_session.exceptions import AlreadyPlaying, AlreadyCreated, GameSessionNotFound, WrongStage, \
+    ConcurrentModification
+from backend.modules.game_session.repos import game_session_repo, lobby, game_state_cache
+from backend.modules.game_session.state_cache import GameStateSnapshot
 from backend.modules.user.repos import user_repo
 
+MAX_CONFLICT_RETRIES = 5
+
+
+class ConflictMetrics:
+    """
+    Счётчики действий с сессиями в этом процессе: сколько раз их повторяли из-за конфликтов
+    и сколько из них так и не удалось выполнить.
+    """
+
+    _lock = Lock()
+    _actions_count = 0
+    _conflicts_count = 0
+    _failures_count = 0
+
+    @classmethod
+    def record(cls, conflicts_count: int, is_failed: bool):
+        with cls._lock:
+            cls._actions_count += 1
+            cls._conflicts_count += conflicts_count
+            cls._failures_count += is_failed
+
+    @classmethod
+    def get_metrics(cls) -> Dict[str, float]:
+        with cls._lock:
+            return dict(
+                actions_count=cls._actions_count,
+                conflicts_count=cls._conflicts_count,
+                failures_count=cls._failures_count,
+                conflict_rate=cls._conflicts_count / cls._actions_count if cls._actions_count else 0.0
+            )
+
+
+def retry_on_conflict(method: Callable) -> Callable:
+    """
+    Повторяет действие с перезагрузкой сессии, если её параллельно изменил другой запрос.
+    """
+
+    @wraps(method)
+    def retrying_method(*args, **kwargs):
+        for conflicts_count in range(MAX_CONFLICT_RETRIES):
+            try:
+                result = method(*args, **kwargs)
+            except ConcurrentModification:
+                continue
+
+            ConflictMetrics.record(conflicts_count, is_failed=False)
+            return result
+
+        ConflictMetrics.record(MAX_CONFLICT_RETRIES, is_failed=True)
+        print(f'{method.__name__} failed after {MAX_CONFLICT_RETRIES} conflicts')
+
+        raise ConcurrentModification
+
+    return retrying_method
+
 
 class GameSessionService:
     repo = game_session_repo
     game_repo = game_repo
     user_repo = user_repo
 
+    def get_game_state_snapshot(self, username: str) -> GameStateSnapshot:
+        """
+        Возвращает состояние игровой сессии, закодированное в JSON, из кэша, если сессия не менялась.
+        """
+        user = self.user_repo.get(username)
+        if user.is_playing:
+            game_session_id, is_host, dto_class = user.game_session_id, False, GameStateDTO
+        elif user.is_hosting:
+            game_session_id, is_host, dto_class = user.hosted_game_session_id, True, HostGameStateDTO
+        else:
+            raise GameSessionNotFound()
+
+        snapshot = game_state_cache.get(game_session_id, is_host, self.repo.get_version(game_session_id))
+        if snapshot:
+            return snapshot
+
+        with self.repo.lock(game_session_id):
+            game_session = self.repo.get(game_session_id)
+
+            return game_state_cache.put(game_session_id,
+                                        is_host,
+                                        game_session.version,
+                                        dto_class(game_session).to_response())
+
     def get_game_state(self, username: str) -> GameStateDTO:
         user = self.user_repo.get(username)
         if user.is_playing:
-            game_session = self.repo.get(user.game_session_id)
-            return GameStateDTO(game_session)
+            with self.repo.lock(user.game_session_id):
+                game_session = self.repo.get(user.game_session_id)
+                return GameStateDTO(game_session)
         elif user.is_hosting:
-            game_session = self.repo.get(user.hosted_game_session_id)
-            return HostGameStateDTO(game_session)
+            with self.repo.lock(user.hosted_game_session_id):
+                game_session = self.repo.get(user.hosted_game_session_id)
+                return HostGameStateDTO(game_session)
         else:
             raise GameSessionNotFound()
 
@@ -50,146 +139,212 @@ class GameSessionService:
 
         print(f'{username} has created gs')
 
-        game_session = self.repo.save(game_session)
+        with unit_of_work():
+            game_session = self.repo.save(game_session)
 
         return GameStateDTO(game_session)
 
-    def get_all_descriptions(self, username: str | None) -> List[GameSessionDescriptionDTO]:
-        game_sessions = self.repo.get_all()
-
+    def get_all_descriptions(
+            self,
+            username: str | None,
+            query: Optional['LobbyQueryDTO'] = None
+    ) -> Tuple[List[GameSessionDescriptionDTO], int, int]:
+        """
+        Возвращает страницу списка сессий, общее количество подходящих сессий и номер последнего изменения списка.
+        """
+        query = query or LobbyQueryDTO()
+        entries, total_count, sequence = lobby.get_page(query.game_name,
+                                                        query.has_free_seats,
+                                                        query.offset,
+                                                        query.limit)
+
+        playing_gs_ids, left_gs_ids = set(), set()
         if username:
-            user = self.user_repo.get(username)
+            for game_session_id, is_playing in self.user_repo.get_game_sessions(username):
+                (playing_gs_ids if is_playing else left_gs_ids).add(game_session_id)
 
-            left_gs_ids = [id for id in user.game_sessions if id != user.game_session_id]
+        description_dtos = [GameSessionDescriptionDTO(entry,
+                                                      entry.game_session_id in playing_gs_ids,
+                                                      entry.game_session_id in left_gs_ids) for entry in entries]
 
-            return [GameSessionDescriptionDTO(gs,
-                                              gs.id == user.game_session_id,
-                                              gs.id in left_gs_ids) for gs in game_sessions]
-        else:
-            return [GameSessionDescriptionDTO(gs, False, False) for gs in game_sessions]
+        return description_dtos, total_count, sequence
+
+    @staticmethod
+    def get_conflict_metrics() -> ConflictMetricsDTO:
+        return ConflictMetricsDTO(**ConflictMetrics.get_metrics())
 
+    def export_results(self) -> Iterator[GameResultDTO]:
+        return (GameResultDTO(*result) for result in self.repo.iter_results())
+
+    @retry_on_conflict
     def join(self, username: str, join_data: 'JoinGameSessionDTO'):
         user = self.user_repo.get(username)
         creator = self.user_repo.get_by_nickname(join_data.creator)
 
-        game_session = self.repo.get(creator.game_session_id or creator.hosted_game_session_id)
+        game_session_id = creator.game_session_id or creator.hosted_game_session_id
 
-        if not (user.is_playing or user.is_hosting):
-            game_session.join(user)
+        with self.repo.lock(game_session_id), unit_of_work():
+            game_session = self.repo.get(game_session_id)
 
-            game_session = self.repo.save(game_session)
-        elif game_session.id not in (user.game_session_id, user.hosted_game_session_id):
-            raise AlreadyPlaying
+            if not (user.is_playing or user.is_hosting):
+                game_session.join(user)
 
-        return GameStateDTO(game_session)
+                game_session = self.repo.save(game_session)
+            elif game_session.id not in (user.game_session_id, user.hosted_game_session_id):
+                raise AlreadyPlaying
 
+            return GameStateDTO(game_session)
+
+    @retry_on_conflict
     def leave(self, username: str):  # TODO сообщать игрокам о выходе ведущего
         user = self.user_repo.get(username)
 
         if user.is_playing:
-            game_session = self.repo.get(user.game_session_id)
+            game_session_id = user.game_session_id
         elif user.is_hosting:
-            game_session = self.repo.get(user.hosted_game_session_id)
+            game_session_id = user.hosted_game_session_id
         else:
             raise GameSessionNotFound()
 
-        if not user.is_hosting:
-            game_session.leave(user)
+        with self.repo.lock(game_session_id), unit_of_work():
+            game_session = self.repo.get(game_session_id)
 
-        # TODO отдельное уведомление о выходе ведущего
-        # TODO не удалять сессию при выходе ведущего
-        if user.is_hosting or not game_session.is_hosted and game_session.is_all_players_left():
-            game_session.add_event(GameSessionDeletedEvent(game_session))
+            if not user.is_hosting:
+                game_session.leave(user)
 
-            print('gs deleted')
+            # TODO отдельное уведомление о выходе ведущего
+            # TODO не удалять сессию при выходе ведущего
+            if user.is_hosting or not game_session.is_hosted and game_session.is_all_players_left():
+                game_session.add_event(GameSessionDeletedEvent(game_session))
 
-            self.repo.delete(game_session)
-        else:
-            self.repo.save(game_session)
+                print('gs deleted')
 
+                self.repo.delete(game_session)
+            else:
+                self.repo.save(game_session)
+
+    @retry_on_conflict
     def start(self, username: str):
         user = self.user_repo.get(username)
 
         if user.is_hosting:
-            game_session = self.repo.get(user.hosted_game_session_id)
-            game_session.start_game()
+            with self.repo.lock(user.hosted_game_session_id), unit_of_work():
+                game_session = self.repo.get(user.hosted_game_session_id)
+                game_session.start_game()
 
-            self.repo.save(game_session)
+                self.repo.save(game_session)
         else:
             raise GameSessionNotFound()
 
+    @retry_on_conflict
     def choose_question(self, username: str, question_data: 'QuestionChoiceDTO'):
         user = self.user_repo.get(username)
 
         if not user.is_playing:
             raise GameSessionNotFound()
 
-        game_session = self.repo.get(user.game_session_id)
+        with self.repo.lock(user.game_session_id), unit_of_work():
+            game_session = self.repo.get(user.game_session_id)
 
-        game_session.choose_question(user, question_data.theme_index, question_data.question_index)
+            game_session.choose_question(user, question_data.theme_index, question_data.question_index)
 
-        self.repo.save(game_session)
+            self.repo.save(game_session)
 
+    @retry_on_conflict
     def allow_answers(self, username: str):
         user = self.user_repo.get(username)
 
         if user.is_hosting:
-            game_session = self.repo.get(user.hosted_game_session_id)
-            game_session.allow_answers()
+            with self.repo.lock(user.hosted_game_session_id), unit_of_work():
+                game_session = self.repo.get(user.hosted_game_session_id)
+                game_session.allow_answers()
 
-            self.repo.save(game_session)
+                self.repo.save(game_session)
 
-            return CurrentQuestionAnswerDTO(game_session)
+                return CurrentQuestionAnswerDTO(game_session)
         else:
             raise GameSessionNotFound()
 
+    @retry_on_conflict
     def answer_timeout(self, game_session_id: int):
-        game_session = self.repo.get(game_session_id)
+        with self.repo.lock(game_session_id), unit_of_work():
+            game_session = self.repo.get(game_session_id)
 
-        print(f'question timeout, current player: {game_session.current_player.user.username}')
+            print(f'question timeout, current player: {game_session.current_player.user.username}')
 
-        game_session.answer_timeout()
+            game_session.answer_timeout()
 
-        self.repo.save(game_session)
+            self.repo.save(game_session)
 
+    @retry_on_conflict
     def final_round_timeout(self, game_session_id: int):
-        game_session = self.repo.get(game_session_id)
+        with self.repo.lock(game_session_id), unit_of_work():
+            game_session = self.repo.get(game_session_id)
 
-        game_session.final_round_timeout()
+            game_session.final_round_timeout()
 
-        if game_session.is_hosted:
-            self.repo.save(game_session)
-        else:
-            game_session.add_event(GameSessionDeletedEvent(game_session))
+            if game_session.is_hosted:
+                self.repo.save(game_session)
+            else:
+                game_session.add_event(GameSessionDeletedEvent(game_session))
 
-            self.repo.delete(game_session)
+                self.repo.delete(game_session)
 
-    def submit_answer(self, username: str, answer_data: 'AnswerRequestDTO'):
+    def submit_answer(self, username: str, answer_data: 'AnswerRequestDTO', received_at: Optional[float] = None):
+        received_at = received_at or monotonic()
         user = self.user_repo.get(username)
-        game_session = self.repo.get(user.game_session_id)
 
-        game_session.submit_answer(user, answer_data.answer)
+        # нажатие разыгрывается один раз, повторы при конфликте только перезагружают сессию
+        if user.is_playing and not buzzer.buzz(user.game_session_id, username, received_at):
+            raise WrongStage
+
+        self._submit_answer(username, answer_data)
 
-        self.repo.save(game_session)
+    @retry_on_conflict
+    def _submit_answer(self, username: str, answer_data: 'AnswerRequestDTO'):
+        user = self.user_repo.get(username)
+
+        with self.repo.lock(user.game_session_id), unit_of_work():
+            game_session = self.repo.get(user.game_session_id)
 
+            game_session.submit_answer(user, answer_data.answer)
+
+            self.repo.save(game_session)
+
+    @retry_on_conflict
     def confirm_answer(self, username: str):
         user = self.user_repo.get(username)
 
         if user.is_hosting:
-            game_session = self.repo.get(user.hosted_game_session_id)
-            game_session.confirm_answer()
+            with self.repo.lock(user.hosted_game_session_id), unit_of_work():
+                game_session = self.repo.get(user.hosted_game_session_id)
+                game_session.confirm_answer()
 
-            self.repo.save(game_session)
+                self.repo.save(game_session)
         else:
             raise GameSessionNotFound()
 
+    @retry_on_conflict
     def reject_answer(self, username: str):
         user = self.user_repo.get(username)
 
         if user.is_hosting:
-            game_session = self.repo.get(user.hosted_game_session_id)
-            game_session.reject_answer()
+            with self.repo.lock(user.hosted_game_session_id), unit_of_work():
+                game_session = self.repo.get(user.hosted_game_session_id)
+                game_session.reject_answer()
 
-            self.repo.save(game_session)
+                self.repo.save(game_session)
         else:
             raise GameSessionNotFound()
+
+    async_get_game_state = to_async(get_game_state)
+    async_create = to_async(create)
+    async_get_all_descriptions = to_async(get_all_descriptions)
+    async_join = to_async(join)
+    async_leave = to_async(leave)
+    async_start = to_async(start)
+    async_choose_question = to_async(choose_question)
+    async_allow_answers = to_async(allow_answers)
+    async_submit_answer = to_async(submit_answer)
+    async_confirm_answer = to_async(confirm_answer)
+    async_reject_answer = to_async(reject_answer)
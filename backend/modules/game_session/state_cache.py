@@ -0,0 +1,42 @@
+import json
+from hashlib import md5
+from threading import Lock
+from typing import Dict, Tuple, Optional
+
+
+class GameStateSnapshot:
+    def __init__(self, version: int, content: bytes):
+        self.version = version
+        self.content = content
+        self.etag = f'"{md5(content).hexdigest()}"'
+
+
+class GameStateCache:
+    """
+    Закодированные в JSON состояния игровых сессий, отдельно для игроков и для ведущего.
+    Запись сбрасывается при сохранении сессии в этом процессе, а сохранения в других процессах
+    обнаруживаются по версии сессии в БД.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[Tuple[int, bool], GameStateSnapshot] = dict()
+        self._lock = Lock()
+
+    def get(self, game_session_id: int, is_host: bool, version: int) -> Optional[GameStateSnapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get((game_session_id, is_host))
+
+        return snapshot if snapshot and snapshot.version == version else None
+
+    def put(self, game_session_id: int, is_host: bool, version: int, state: Dict) -> GameStateSnapshot:
+        snapshot = GameStateSnapshot(version, json.dumps(state, ensure_ascii=False, separators=(',', ':')).encode())
+
+        with self._lock:
+            self._snapshots[(game_session_id, is_host)] = snapshot
+
+        return snapshot
+
+    def invalidate(self, game_session_id: int):
+        with self._lock:
+            self._snapshots.pop((game_session_id, False), None)
+            self._snapshots.pop((game_session_id, True), None)
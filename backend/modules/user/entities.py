@@ -1,15 +1,16 @@
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Optional
 
-from backend.core.entities import Entity
+from backend.core.entities import AggregateRoot
 
 
-class User(Entity):
+class User(AggregateRoot):
+    __slots__ = ('username', 'nickname', 'password', 'game_session_id', 'hosted_game_session_id')
+
     def __init__(self,
                  username: str,
                  nickname: Optional[str] = None,
                  password: Optional[str] = None,
-                 game_sessions: Optional[List[int]] = None,
                  game_session_id: Optional[int] = None,
                  hosted_game_session_id: Optional[int] = None,
                  id: Optional[int] = None):
@@ -17,7 +18,6 @@ class User(Entity):
         self.username = username
         self.nickname = nickname
         self.password = password
-        self.game_sessions = game_sessions
         self.game_session_id = game_session_id
         self.hosted_game_session_id = hosted_game_session_id
 
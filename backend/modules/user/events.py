@@ -0,0 +1,12 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .entities import User
+
+from backend.core.events import Event
+
+
+class UserNicknameChangedEvent(Event):
+    def __init__(self, user: 'User'):
+        self.user_id = user.id
+        self.nickname = user.nickname
@@ -1,18 +1,32 @@
-from typing import TYPE_CHECKING
+from typing import List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .entities import User
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User as ORMDjangoUser
+from django.db.models import QuerySet, OuterRef, Subquery
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from backend.core.repos import Repository
-from backend.infra.models import ORMUser
+from backend.infra.models import ORMUser, ORMPlayer
 from backend.modules.user.exceptions import UserNotFound
 from backend.modules.user.entities import Session
 
 
+def user_queryset() -> QuerySet:
+    """
+    Загружает пользователя вместе с активной и созданной ведущим сессиями одним запросом.
+    """
+    active_game_session_id = ORMPlayer.objects \
+        .filter(user=OuterRef('pk'), is_playing=True) \
+        .values('game_session_id')[:1]
+
+    return ORMUser.objects \
+        .select_related('user', 'hosted_game_session') \
+        .annotate(active_game_session_id=Subquery(active_game_session_id))
+
+
 class UserRepo(Repository):
     @staticmethod
     def is_exists(username: str) -> bool:
@@ -24,21 +38,42 @@ class UserRepo(Repository):
 
     @staticmethod
     def get(username: str) -> 'User':
+        user = UserRepo._get_identity(('user', username))
+        if user:
+            return user
+
         try:
-            orm_user = ORMUser.objects.get(user__username=username)
+            orm_user = user_queryset().get(user__username=username)
         except ORMUser.DoesNotExist:
             raise UserNotFound
 
-        return orm_user.to_domain()
+        return UserRepo._to_domain(orm_user)
 
     @staticmethod
     def get_by_nickname(username: str) -> 'User':
+        user = UserRepo._get_identity(('user_nickname', username))
+        if user:
+            return user
+
         try:
-            orm_user = ORMUser.objects.get(nickname=username)
+            orm_user = user_queryset().get(nickname=username)
         except ORMUser.DoesNotExist:
             raise UserNotFound
 
-        return orm_user.to_domain()
+        return UserRepo._to_domain(orm_user)
+
+    @staticmethod
+    def _to_domain(orm_user: ORMUser) -> 'User':
+        user = orm_user.to_domain()
+        UserRepo._put_identity(user, ('user', user.username), ('user_nickname', user.nickname))
+
+        return user
+
+    @staticmethod
+    def get_game_sessions(username: str) -> List[Tuple[int, bool]]:
+        return list(ORMPlayer.objects
+                    .filter(user__user__username=username)
+                    .values_list('game_session_id', 'is_playing'))
 
     @staticmethod
     def _create(user: 'User') -> 'User':
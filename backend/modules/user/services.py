@@ -5,6 +5,7 @@ if TYPE_CHECKING:
 
 from backend.modules.user.dtos import UserDTO, SessionDTO
 from backend.modules.user.entities import User
+from backend.modules.user.events import UserNicknameChangedEvent
 from backend.modules.user.exceptions import UserAlreadyExists, UserNotFound, UserNicknameAlreadyExists
 from backend.modules.user.repos import user_repo
 
@@ -49,6 +50,7 @@ class UserService:
                 raise UserNicknameAlreadyExists
 
             user.nickname = user_data.nickname
+            user.add_event(UserNicknameChangedEvent(user))
 
         # TODO добавить проверку на длину пароля (надо от 6 символов)
         user.password = user_data.password
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import tracemalloc
+from time import perf_counter
+from typing import Tuple
+
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import WebsocketConsumer
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, override_settings
+
+from backend.infra.consumers import LobbyConsumer
+from backend.tests.utils import IN_MEMORY_CHANNEL_LAYERS
+
+CONNECTIONS_COUNT = 2000
+EVENTS_COUNT = 5
+
+
+class SyncLobbyConsumer(WebsocketConsumer):
+    """
+    Прежняя реализация: синхронный потребитель, каждое сообщение обрабатывается в потоке через async_to_sync.
+    """
+
+    groups = ['lobby']
+
+    def lobby_event(self, event):
+        event_type = event.pop('type')
+        self.send(json.dumps(event, ensure_ascii=False))
+        event['type'] = event_type
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class ConsumersBenchmark(SimpleTestCase):
+    """
+    CONNECTIONS_COUNT клиентов подключаются к лобби и получают EVENTS_COUNT событий.
+    Сравниваются время подключения, время доставки событий всем клиентам и память на одно подключение.
+    """
+
+    async def _run(self, consumer_class) -> Tuple[float, float, float]:
+        application = consumer_class.as_asgi()
+        channel_layer = get_channel_layer()
+
+        tracemalloc.start()
+        started_at = perf_counter()
+        communicators = [WebsocketCommunicator(application, '/ws/lobby/') for _ in range(CONNECTIONS_COUNT)]
+        for connected, _ in await asyncio.gather(*(communicator.connect(timeout=60)
+                                                   for communicator in communicators)):
+            self.assertTrue(connected)
+        connect_time = perf_counter() - started_at
+        memory_per_connection = tracemalloc.get_traced_memory()[0] / CONNECTIONS_COUNT
+        tracemalloc.stop()
+
+        started_at = perf_counter()
+        for index in range(EVENTS_COUNT):
+            await channel_layer.group_send('lobby', {'type': 'lobby_event', 'event': 'test', 'data': index})
+        for communicator in communicators:
+            for _ in range(EVENTS_COUNT):
+                await communicator.receive_from(timeout=30)
+        delivery_time = perf_counter() - started_at
+
+        await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
+
+        return connect_time, delivery_time, memory_per_connection
+
+    def test_consumers(self):
+        for name, consumer_class in (('WebsocketConsumer', SyncLobbyConsumer),
+                                     ('AsyncWebsocketConsumer', LobbyConsumer)):
+            connect_time, delivery_time, memory_per_connection = async_to_sync(self._run)(consumer_class)
+            print(f'{name}: connect {CONNECTIONS_COUNT} - {connect_time * 1000:.0f} ms, '
+                  f'deliver {EVENTS_COUNT} events to each - {delivery_time * 1000:.0f} ms, '
+                  f'memory per connection - {memory_per_connection / 1024:.1f} KiB')
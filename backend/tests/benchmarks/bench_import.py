@@ -0,0 +1,67 @@
+import io
+import json
+
+from backend.infra.game_packs import GamePackReader
+from backend.infra.models import ORMGame, ORMQuestion, ORMRound, ORMTheme, ORMUser
+from backend.modules.game.dtos import CreateGameDTO
+from backend.modules.game.services import GameService
+from backend.tests.benchmarks.utils import measure_queries
+from backend.tests.utils import GameTestCase, game_json, game_data
+
+GAMES_COUNT = 200
+PACK_SIZES = dict(rounds_count=3, themes_count=6, questions_count=5)
+
+
+def create_per_row(username: str, data: CreateGameDTO):
+    """
+    Прежняя запись игры: отдельный INSERT на каждую строку и на каждую связь.
+    """
+
+    orm_final_round = ORMQuestion.objects.create(text=data.final_round.text,
+                                                 answer=data.final_round.answer,
+                                                 value=data.final_round.value)
+    orm_game = ORMGame.objects.create(name=data.name,
+                                      author=ORMUser.objects.get(user__username=username),
+                                      final_round=orm_final_round)
+
+    for round_index, round in enumerate(data.rounds):
+        orm_round = ORMRound.objects.create(order=round_index + 1)
+
+        for theme_index, theme in enumerate(round.themes):
+            orm_theme = ORMTheme.objects.create(name=theme.name, order=theme_index + 1)
+
+            for question_index, question in enumerate(theme.questions):
+                orm_question = ORMQuestion.objects.create(order=question_index + 1,
+                                                          text=question.text,
+                                                          answer=question.answer,
+                                                          value=question.value)
+                orm_theme.questions.add(orm_question)
+
+            orm_round.themes.add(orm_theme)
+
+        orm_game.rounds.add(orm_round)
+
+
+class ImportBenchmark(GameTestCase):
+    """
+    Импорт GAMES_COUNT паков из 3 раундов по 6 тем по 5 вопросов.
+    Сравниваются прежняя запись по строкам и import_games, читающий JSONL через GamePackReader.
+    """
+
+    def test_import(self):
+        self.create_users('author')
+
+        games_data = [game_data(f'per_row{index}', **PACK_SIZES) for index in range(GAMES_COUNT)]
+        per_row_time, per_row_queries = measure_queries(
+            lambda: [create_per_row('author', data) for data in games_data])
+
+        lines = io.StringIO(''.join(json.dumps(game_json(f'bulk{index}', **PACK_SIZES)) + '\n'
+                                    for index in range(GAMES_COUNT)))
+        bulk_time, bulk_queries = measure_queries(
+            lambda: GameService().import_games('author', GamePackReader(lines)))
+
+        self.assertEqual(ORMGame.objects.count(), 2 * GAMES_COUNT)
+
+        for name, elapsed, queries_count in (('per row', per_row_time, per_row_queries),
+                                             ('import_games', bulk_time, bulk_queries)):
+            print(f'{name}: {GAMES_COUNT / elapsed:.1f} games/s, {queries_count / GAMES_COUNT:.1f} queries per game')
@@ -0,0 +1,124 @@
+import gc
+import tracemalloc
+from dataclasses import is_dataclass
+from typing import Any, Callable, Dict, Tuple
+
+from backend.core.entities import Entity
+from backend.modules.game.repos import GameRepo, game_cache
+from backend.modules.game_session.dtos import CreateGameSessionDTO, JoinGameSessionDTO
+from backend.modules.game_session.repos import GameSessionRepo
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.repos import user_repo
+from backend.tests.utils import GameTestCase
+
+PACK_SIZES = dict(rounds_count=3, themes_count=6, questions_count=5)
+PLAYERS = ['b', 'c', 'd']
+
+
+class DictObject:
+    """
+    Прежний объект предметной области: атрибуты хранятся в __dict__.
+    """
+
+    def __init__(self, attributes: Dict[str, Any]):
+        self.__dict__.update(attributes)
+
+
+class DictEntity(DictObject):
+    """
+    Прежняя сущность: атрибуты в __dict__ и собственный список событий у каждой сущности.
+    """
+
+    def __init__(self, attributes: Dict[str, Any]):
+        super().__init__(attributes)
+        self._events = []
+
+
+def with_slots(value, attributes: Dict[str, Any]):
+    copy = object.__new__(type(value))
+    for name, attribute in attributes.items():
+        setattr(copy, name, attribute)
+
+    return copy
+
+
+def with_dict(value, attributes: Dict[str, Any]):
+    if not isinstance(value, Entity):
+        return DictObject(attributes)
+
+    attributes.pop('_events', None)
+    return DictEntity(attributes)
+
+
+def copy_graph(value, memo: Dict[int, Any], make: Callable[[Any, Dict[str, Any]], Any]):
+    """
+    Копирует сущности и контейнеры графа объектов, строки и числа остаются общими.
+    """
+
+    if id(value) in memo:
+        return memo[id(value)]
+
+    if isinstance(value, (list, tuple)):
+        copy = type(value)(copy_graph(item, memo, make) for item in value)
+    elif isinstance(value, dict):
+        copy = {key: copy_graph(item, memo, make) for key, item in value.items()}
+    elif isinstance(value, Entity) or is_dataclass(value):
+        attributes = {name: copy_graph(getattr(value, name), memo, make)
+                      for cls in type(value).__mro__
+                      for name in getattr(cls, '__slots__', ())
+                      if hasattr(value, name)}
+        copy = make(value, attributes)
+    else:
+        return value
+
+    memo[id(value)] = copy
+    return copy
+
+
+def measure(build: Callable[[], Any]) -> Tuple[Any, int]:
+    gc.collect()
+    tracemalloc.start()
+    started_size = tracemalloc.get_traced_memory()[0]
+
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - started_size
+
+    tracemalloc.stop()
+    return result, size
+
+
+class MemoryBenchmark(GameTestCase):
+    """
+    Память, занятая загруженным паком из 3 раундов по 6 тем по 5 вопросов и активной сессией
+    с тремя игроками, которая ссылается на пак из кэша. Затем сущности и контейнеры пака и сессии
+    копируются со __slots__ и так, как было раньше: с __dict__ и списком событий у каждой сущности.
+    """
+
+    def test_memory(self):
+        self.create_users('a', *PLAYERS)
+        self.create_game('a', 'pack', **PACK_SIZES)
+
+        service = GameSessionService()
+        service.create('a', CreateGameSessionDTO('pack', len(PLAYERS), True))
+        for username in PLAYERS:
+            service.join(username, JoinGameSessionDTO('a'))
+        service.start('a')
+        game_session_id = user_repo.get('a').hosted_game_session_id
+
+        game_cache.clear()
+        game, game_size = measure(lambda: GameRepo.get('pack'))
+        game_session, game_session_size = measure(lambda: GameSessionRepo.get(game_session_id))
+        print(f'loaded 3-round pack: {game_size} bytes, loaded active session, {len(PLAYERS)} players: '
+              f'{game_session_size} bytes')
+
+        for name, make in (('__dict__', with_dict), ('__slots__', with_slots)):
+            game_memo = dict()
+            copy_graph(game, game_memo, make)
+
+            _, game_objects_size = measure(lambda: copy_graph(game, dict(), make))
+            # сессия ссылается на уже загруженный пак
+            _, game_session_objects_size = measure(lambda: copy_graph(game_session, dict(game_memo), make))
+
+            print(f'{name}: entities and containers of the pack - {game_objects_size} bytes, '
+                  f'of the session - {game_session_objects_size} bytes')
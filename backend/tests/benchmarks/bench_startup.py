@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from django.apps import apps
+from django.contrib.auth.models import User as ORMDjangoUser
+
+from backend.infra.dispatcher import EventDispatcher
+from backend.infra.models import ORMGameSession, ORMPlayer, ORMUser, ORMGame
+from backend.infra.timers import Timers
+from backend.modules.game_session.enums import Stage
+from backend.modules.game_session.repos import GameSessionRepo
+from backend.tests.benchmarks.utils import measure_queries
+from backend.tests.utils import GameTestCase
+
+SESSIONS_COUNTS = (10_000, 100_000)
+BATCH_SIZE = 5000
+
+
+def scan_all_sessions():
+    """
+    Прежний запуск: обход всех игроков и сессий с загрузкой связанных строк по одной.
+    """
+
+    group_names = dict()
+    for orm_player in ORMPlayer.objects.all():
+        group_names[orm_player.user.user.username] = orm_player.game_session.pk
+
+    armed = []
+    for orm_game_session in ORMGameSession.objects.all():
+        if orm_game_session.host:
+            group_names[orm_game_session.host.user.username] = orm_game_session.pk
+
+        if orm_game_session.stage in (Stage.ANSWERING, Stage.FINAL_ROUND):
+            armed.append(orm_game_session.pk)
+
+    return group_names, armed
+
+
+class StartupBenchmark(GameTestCase):
+    """
+    В БД добавляются завершённые сессии, по одному игроку в каждой.
+    Сравниваются прежний обход всех сессий при запуске, текущий AppConfig.ready
+    и первый запрос восстановления таймеров, который выполняется уже после запуска.
+    """
+
+    @staticmethod
+    def _add_finished_sessions(start: int, stop: int):
+        game_id = ORMGame.objects.values_list('pk', flat=True).get()
+
+        for batch_start in range(start, stop, BATCH_SIZE):
+            usernames = [f'user{index}' for index in range(batch_start, min(batch_start + BATCH_SIZE, stop))]
+            ORMDjangoUser.objects.bulk_create(ORMDjangoUser(username=username) for username in usernames)
+            user_ids = list(ORMDjangoUser.objects.filter(username__in=usernames).values_list('pk', flat=True))
+
+            ORMUser.objects.bulk_create(ORMUser(user_id=user_id, nickname=f'nickname{user_id}') for user_id in user_ids)
+            ORMGameSession.objects.bulk_create(ORMGameSession(creator_id=user_id, game_id=game_id, max_players=1,
+                                                              stage=Stage.END_GAME)
+                                               for user_id in user_ids)
+            ORMPlayer.objects.bulk_create(ORMPlayer(user_id=user_id, game_session_id=user_id, is_playing=False)
+                                          for user_id in user_ids)
+
+    @staticmethod
+    def _ready():
+        with patch.object(EventDispatcher, 'handlers', dict()), \
+                patch.object(EventDispatcher, 'immediate_handlers', set()), \
+                patch.object(Timers, 'start'):
+            apps.get_app_config('backend').ready()
+
+    def test_startup(self):
+        self.create_users('author')
+        self.create_game('author')
+
+        sessions_count = 0
+        for target_count in SESSIONS_COUNTS:
+            self._add_finished_sessions(sessions_count, target_count)
+            sessions_count = target_count
+
+            for name, function in (('scan all sessions', scan_all_sessions),
+                                   ('AppConfig.ready', self._ready),
+                                   ('get_timer_deadlines', GameSessionRepo.get_timer_deadlines)):
+                elapsed, queries_count = measure_queries(function)
+                print(f'{sessions_count} sessions, {name}: {elapsed * 1000:.1f} ms, {queries_count} queries')
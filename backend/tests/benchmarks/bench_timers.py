@@ -0,0 +1,78 @@
+import random
+from threading import Lock, Timer, active_count, Event
+from time import monotonic, perf_counter
+from typing import Dict, List, Tuple
+
+from django.test import SimpleTestCase
+
+from backend.infra.timers import Timers
+
+TIMERS_COUNT = 10000
+
+
+class ThreadTimers:
+    """
+    Прежняя реализация: отдельный threading.Timer на каждый таймер.
+    """
+
+    _timers: Dict[int, Timer] = dict()
+
+    @staticmethod
+    def start(key, interval, callback, args):
+        ThreadTimers.stop(key)
+
+        timer = ThreadTimers._timers[key] = Timer(interval, callback, args)
+        timer.start()
+
+    @staticmethod
+    def stop(key):
+        timer = ThreadTimers._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+
+
+class TimersBenchmark(SimpleTestCase):
+    """
+    TIMERS_COUNT минутных таймеров запускаются, половина останавливается, четверть перезапускается
+    со сроком до полутора секунд. Сравниваются время запуска, остановки и перезапуска, число потоков
+    и наибольшее опоздание срабатывания перезапущенных таймеров.
+    """
+
+    def _run(self, timers) -> Tuple[float, float, int, float]:
+        fired: List[Tuple[int, float]] = list()
+        fired_lock = Lock()
+        deadlines: Dict[int, float] = dict()
+
+        def fire(key: int):
+            with fired_lock:
+                fired.append((key, monotonic()))
+
+        started_at = perf_counter()
+        for key in range(TIMERS_COUNT):
+            timers.start(key, 60 + random.random(), fire, (key,))
+        start_time = perf_counter() - started_at
+        threads_count = active_count()
+
+        restarted_at = perf_counter()
+        for key in range(0, TIMERS_COUNT, 2):
+            timers.stop(key)
+        for key in range(1, TIMERS_COUNT, 4):
+            deadlines[key] = monotonic() + 0.5 + random.random()
+            timers.start(key, deadlines[key] - monotonic(), fire, (key,))
+        restart_time = perf_counter() - restarted_at
+
+        Event().wait(2)
+        for key in range(TIMERS_COUNT):
+            timers.stop(key)
+
+        self.assertEqual(sorted(key for key, _ in fired), list(range(1, TIMERS_COUNT, 4)))
+        max_lateness = max(fired_at - deadlines[key] for key, fired_at in fired)
+
+        return start_time, restart_time, threads_count, max_lateness
+
+    def test_timers(self):
+        for name, timers in (('threading.Timer', ThreadTimers), ('Timers', Timers)):
+            start_time, restart_time, threads_count, max_lateness = self._run(timers)
+            print(f'{name}: start {TIMERS_COUNT} - {start_time * 1000:.0f} ms, '
+                  f'stop and restart {TIMERS_COUNT * 3 // 4} - {restart_time * 1000:.0f} ms, '
+                  f'threads - {threads_count}, max lateness - {max_lateness * 1000:.1f} ms')
@@ -0,0 +1,24 @@
+from time import perf_counter
+from typing import Callable, Tuple
+
+from django.db import connection
+
+
+def measure_queries(function: Callable[[], object]) -> Tuple[float, int]:
+    """
+    Возвращает время выполнения function в секундах и количество запросов к БД.
+    CaptureQueriesContext хранит не больше 9000 запросов, поэтому они только подсчитываются.
+    """
+    queries_count = 0
+
+    def count_query(execute, *args):
+        nonlocal queries_count
+        queries_count += 1
+        return execute(*args)
+
+    with connection.execute_wrapper(count_query):
+        started_at = perf_counter()
+        function()
+        elapsed = perf_counter() - started_at
+
+    return elapsed, queries_count
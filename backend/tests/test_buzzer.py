@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from backend.modules.game_session.buzzer import Buzzer
+from backend.modules.game_session.dtos import CreateGameSessionDTO, JoinGameSessionDTO, QuestionChoiceDTO, \
+    AnswerRequestDTO
+from backend.modules.game_session.exceptions import ConcurrentModification, WrongStage
+from backend.modules.game_session.repos import game_session_repo
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.repos import user_repo
+from backend.tests.utils import GameTransactionTestCase
+
+GAME_SESSION_ID = 1
+PLAYERS = ['a', 'b', 'c', 'd']
+
+
+class BuzzerTest(SimpleTestCase):
+    def setUp(self):
+        self.buzzer = Buzzer()
+        self.buzzer.open(GAME_SESSION_ID)
+
+    def test_earliest_buzz_wins(self):
+        received_at = monotonic()
+        # чем позже игрок начинает нажатие, тем раньше оно было получено
+        buzzes = [(username, received_at + 0.01 * (len(PLAYERS) - index)) for index, username in enumerate(PLAYERS)]
+
+        with ThreadPoolExecutor(len(PLAYERS)) as executor:
+            results = dict(zip(PLAYERS, executor.map(lambda buzz: self.buzzer.buzz(GAME_SESSION_ID, *buzz), buzzes)))
+
+        self.assertEqual(results, {'a': False, 'b': False, 'c': False, 'd': True})
+
+    def test_winner_buzz_is_repeatable(self):
+        self.assertTrue(self.buzzer.buzz(GAME_SESSION_ID, 'a'))
+
+        self.assertTrue(self.buzzer.buzz(GAME_SESSION_ID, 'a'))
+        self.assertFalse(self.buzzer.buzz(GAME_SESSION_ID, 'b'))
+
+
+class SubmitAnswerTest(GameTransactionTestCase):
+    def setUp(self):
+        self.service = GameSessionService()
+        self.create_users('host', *PLAYERS)
+        self.create_game('host')
+
+        self.service.create('host', CreateGameSessionDTO('game', len(PLAYERS), True))
+        for username in PLAYERS:
+            self.service.join(username, JoinGameSessionDTO('host'))
+        self.service.start('host')
+
+        self.game_session_id = user_repo.get('host').hosted_game_session_id
+        current_player = game_session_repo.get(self.game_session_id).current_player
+        self.service.choose_question(current_player.username, QuestionChoiceDTO(0, 0))
+        self.service.allow_answers('host')
+
+    def _submit_answer(self, username: str, received_at: float) -> bool:
+        try:
+            self.service.submit_answer(username, AnswerRequestDTO(), received_at)
+        except WrongStage:
+            return False
+        finally:
+            connection.close()
+
+        return True
+
+    def test_earliest_player_answers_despite_conflict(self):
+        save = game_session_repo.save
+        conflicts = [ConcurrentModification()]
+
+        def save_with_conflict(game_session):
+            if conflicts:
+                raise conflicts.pop()
+            return save(game_session)
+
+        received_at = monotonic()
+        # первым получено нажатие игрока, который начинает отвечать последним
+        usernames = PLAYERS[::-1]
+        received = [received_at + 0.01 * (len(PLAYERS) - index) for index in range(len(PLAYERS))]
+        with patch.object(game_session_repo, 'save', side_effect=save_with_conflict), \
+                ThreadPoolExecutor(len(PLAYERS)) as executor:
+            results = dict(zip(usernames, executor.map(self._submit_answer, usernames, received)))
+
+        self.assertEqual(results, {'a': True, 'b': False, 'c': False, 'd': False})
+        self.assertFalse(conflicts)
+        self.assertEqual(game_session_repo.get(self.game_session_id).current_player.username, 'a')
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User as ORMDjangoUser
+from django.db.models import F
+from rest_framework.test import APIClient
+
+from backend.core.repos import unit_of_work
+from backend.infra.models import ORMGameSession, ORMPlayer
+from backend.modules.game_session.dtos import CreateGameSessionDTO, JoinGameSessionDTO
+from backend.modules.game_session.exceptions import ConcurrentModification
+from backend.modules.game_session.repos import GameSessionRepo
+from backend.modules.game_session.services import GameSessionService, ConflictMetrics
+from backend.modules.user.repos import user_repo
+from backend.tests.utils import GameTestCase
+
+
+class ConflictTest(GameTestCase):
+    def setUp(self):
+        self.create_users('a', 'b', 'c')
+        self.create_game('a')
+        GameSessionService().create('a', CreateGameSessionDTO('game', 3, False))
+        self.game_session_id = user_repo.get('a').game_session_id
+
+    def _get_players(self):
+        return set(ORMPlayer.objects.filter(game_session_id=self.game_session_id)
+                   .values_list('user__nickname', flat=True))
+
+    def test_stale_copy_is_not_saved(self):
+        first, second = GameSessionRepo.get(self.game_session_id), GameSessionRepo.get(self.game_session_id)
+
+        first.join(user_repo.get('b'))
+        with unit_of_work():
+            GameSessionRepo.save(first)
+
+        second.join(user_repo.get('c'))
+        with self.assertRaises(ConcurrentModification), unit_of_work():
+            GameSessionRepo.save(second)
+
+        self.assertEqual(self._get_players(), {'a', 'b'})
+
+    def test_action_is_retried_with_reloaded_session(self):
+        get = GameSessionRepo.get
+        loads_count = 0
+
+        def get_modified_by_another_request(game_session_id):
+            nonlocal loads_count
+            loads_count += 1
+
+            game_session = get(game_session_id)
+            if loads_count == 1:
+                ORMGameSession.objects.filter(pk=game_session_id).update(version=F('version') + 1)
+
+            return game_session
+
+        conflicts_count = ConflictMetrics.get_metrics()['conflicts_count']
+
+        # тест выполняется во внешней транзакции TestCase, после конфликта она должна оставаться рабочей
+        with patch.object(GameSessionRepo, 'get', side_effect=get_modified_by_another_request):
+            GameSessionService().join('b', JoinGameSessionDTO('a'))
+
+        self.assertEqual(loads_count, 2)
+        self.assertEqual(self._get_players(), {'a', 'b'})
+        self.assertEqual(ConflictMetrics.get_metrics()['conflicts_count'], conflicts_count + 1)
+
+    def test_metrics_are_available_to_admins(self):
+        ORMDjangoUser.objects.filter(username='a').update(is_staff=True)
+        client = APIClient()
+
+        client.force_authenticate(ORMDjangoUser.objects.get(username='b'))
+        self.assertEqual(client.get('/api/metrics/').status_code, 403)
+
+        client.force_authenticate(ORMDjangoUser.objects.get(username='a'))
+        response = client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['conflicts']),
+                         {'actionsCount', 'conflictsCount', 'failuresCount', 'conflictRate'})
+        self.assertIn('queueDepth', response.data['events'])
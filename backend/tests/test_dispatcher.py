@@ -0,0 +1,110 @@
+from threading import Event as ThreadingEvent, Lock, current_thread
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from backend.core.entities import AggregateRoot
+from backend.core.events import Event
+from backend.infra.dispatcher import EventDispatcher
+
+DELIVERY_TIMEOUT = 5
+
+
+class _NumberedEvent(Event):
+    def __init__(self, entity_id: int, number: int):
+        self.entity_id = entity_id
+        self.number = number
+
+
+class _Entity(AggregateRoot):
+    __slots__ = ()
+
+    def __init__(self, id: int, *events: Event):
+        super().__init__(id)
+        for event in events:
+            self.add_event(event)
+
+
+@override_settings(EVENT_DISPATCH_MODE='async', EVENT_DISPATCH_WORKERS=2, EVENT_QUEUE_TIMEOUT=0.01)
+class AsyncDispatchTest(TestCase):
+    def setUp(self):
+        # свои обработчики и очереди, чтобы не задеть обработчики приложения и их потоки
+        for name, value in (('handlers', {}), ('immediate_handlers', set()), ('_queues', [])):
+            patcher = patch.object(EventDispatcher, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.delivered = []
+        self.delivered_lock = Lock()
+        self.all_delivered = ThreadingEvent()
+        self.expected_count = 0
+
+    def _record(self, event: _NumberedEvent):
+        with self.delivered_lock:
+            self.delivered.append((event.entity_id, event.number, current_thread()))
+            if len(self.delivered) == self.expected_count:
+                self.all_delivered.set()
+
+    def _dispatch(self, entity: _Entity):
+        with self.captureOnCommitCallbacks(execute=True):
+            EventDispatcher.dispatch_events(entity)
+
+    def test_events_are_delivered_after_commit(self):
+        immediate = []
+        EventDispatcher.register_handler(self._record, _NumberedEvent)
+        EventDispatcher.register_handler(immediate.append, _NumberedEvent, is_immediate=True)
+        self.expected_count = 1
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            event = _NumberedEvent(1, 0)
+            EventDispatcher.dispatch_events(_Entity(1, event))
+
+            self.assertEqual(immediate, [event])
+            self.assertEqual(self.delivered, [])
+            self.assertEqual(EventDispatcher.get_metrics()['queue_depth'], 0)
+
+        for callback in callbacks:
+            callback()
+
+        self.assertTrue(self.all_delivered.wait(DELIVERY_TIMEOUT))
+        self.assertIsNot(self.delivered[0][2], current_thread())
+        self.assertEqual(immediate, [event])
+
+    def test_events_of_entity_are_delivered_in_order(self):
+        EventDispatcher.register_handler(self._record, _NumberedEvent)
+        self.expected_count = 2 * 50
+
+        for number in range(50):
+            for entity_id in (1, 2):
+                self._dispatch(_Entity(entity_id, _NumberedEvent(entity_id, number)))
+
+        self.assertTrue(self.all_delivered.wait(DELIVERY_TIMEOUT))
+        for entity_id in (1, 2):
+            self.assertEqual([number for delivered_id, number, _ in self.delivered if delivered_id == entity_id],
+                             list(range(50)))
+
+    @override_settings(EVENT_DISPATCH_WORKERS=1, EVENT_QUEUE_SIZE=1)
+    def test_events_are_delivered_inline_when_queue_is_full(self):
+        worker_started, worker_released = ThreadingEvent(), ThreadingEvent()
+        self.addCleanup(worker_released.set)
+
+        def block_worker(event: _NumberedEvent):
+            if event.number == 0:
+                worker_started.set()
+                worker_released.wait(DELIVERY_TIMEOUT)
+
+        EventDispatcher.register_handler(block_worker, _NumberedEvent)
+        EventDispatcher.register_handler(self._record, _NumberedEvent)
+        self.expected_count = 3
+        inline_count = EventDispatcher.get_metrics()['inline_count']
+
+        self._dispatch(_Entity(1, _NumberedEvent(1, 0)))
+        self.assertTrue(worker_started.wait(DELIVERY_TIMEOUT))
+        self._dispatch(_Entity(1, _NumberedEvent(1, 1)))
+        self._dispatch(_Entity(1, _NumberedEvent(1, 2)))
+
+        self.assertEqual([(number, thread) for _, number, thread in self.delivered], [(2, current_thread())])
+        self.assertEqual(EventDispatcher.get_metrics()['inline_count'], inline_count + 1)
+
+        worker_released.set()
+        self.assertTrue(self.all_delivered.wait(DELIVERY_TIMEOUT))
@@ -0,0 +1,29 @@
+from backend.core.entities import AggregateRoot
+from backend.modules.game.repos import GameRepo
+from backend.modules.game_session.dtos import CreateGameSessionDTO, JoinGameSessionDTO
+from backend.modules.game_session.entities import CurrentQuestion
+from backend.modules.game_session.repos import GameSessionRepo
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.repos import user_repo
+from backend.tests.utils import GameTestCase
+
+
+class EntitiesTest(GameTestCase):
+    def test_entities_have_no_dict_and_only_roots_have_events(self):
+        self.create_users('a', 'b')
+        self.create_game('a')
+        GameSessionService().create('a', CreateGameSessionDTO('game', 1, True))
+        GameSessionService().join('b', JoinGameSessionDTO('a'))
+
+        game = GameRepo.get('game')
+        game_session = GameSessionRepo.get(user_repo.get('a').hosted_game_session_id)
+        round = game.rounds[0]
+        theme = round.themes[0]
+        question = theme.questions[0]
+        player = game_session.players[0]
+
+        for entity in (game, round, theme, question, game.final_round, game_session, player, player.user,
+                       player.answer, game_session.host, CurrentQuestion(question)):
+            with self.subTest(type(entity).__name__):
+                self.assertFalse(hasattr(entity, '__dict__'))
+                self.assertEqual(hasattr(entity, '_events'), isinstance(entity, AggregateRoot))
@@ -0,0 +1,80 @@
+import asyncio
+import json
+from time import sleep
+
+from asgiref.sync import async_to_sync
+from channels.testing import HttpCommunicator
+from django.contrib.auth.models import User as ORMDjangoUser
+from django.test import SimpleTestCase
+
+from backend.config.asgi import application
+from backend.infra.export import stream_in_thread
+from backend.modules.user.dtos import LoginUserDTO
+from backend.modules.user.services import UserService
+from backend.tests.utils import GameTransactionTestCase
+
+
+class StreamInThreadTest(SimpleTestCase):
+    def test_event_loop_is_not_blocked(self):
+        def slow_lines():
+            for index in range(3):
+                sleep(0.2)
+                yield f'{index}\n'
+
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.create_task(tick())
+            chunks = [chunk async for chunk in stream_in_thread(slow_lines())]
+            ticker.cancel()
+
+            return chunks, ticks
+
+        chunks, ticks = async_to_sync(run)()
+
+        self.assertEqual(b''.join(chunks), b'0\n1\n2\n')
+        self.assertGreater(ticks, 20)
+
+
+class ExportTest(GameTransactionTestCase):
+    def setUp(self):
+        self.create_users('admin', 'user')
+        self.create_game('admin', 'first')
+        self.create_game('admin', 'second')
+        ORMDjangoUser.objects.filter(username='admin').update(is_staff=True)
+
+    @staticmethod
+    def _get(path: str, username: str = None):
+        headers = [(b'host', b'testserver')]
+        if username:
+            token = UserService().authenticate(LoginUserDTO(username, 'password')).access
+            headers.append((b'authorization', f'Bearer {token}'.encode()))
+
+        return async_to_sync(HttpCommunicator(application, 'GET', path, headers=headers).get_response)(timeout=5)
+
+    def test_games_are_streamed_as_jsonl(self):
+        response = self._get('/api/export/?type=game', 'admin')
+
+        self.assertEqual(response['status'], 200)
+        self.assertIn((b'Content-Type', b'application/x-ndjson'), response['headers'])
+        lines = [json.loads(line) for line in response['body'].decode().splitlines()]
+        self.assertEqual([(line['type'], line['name']) for line in lines], [('game', 'first'), ('game', 'second')])
+
+    def test_export_requires_admin(self):
+        self.assertEqual(self._get('/api/export/')['status'], 401)
+        self.assertEqual(self._get('/api/export/', 'user')['status'], 403)
+
+    def test_unknown_type_is_rejected(self):
+        response = self._get('/api/export/?type=user', 'admin')
+
+        self.assertEqual(response['status'], 400)
+        self.assertEqual(json.loads(response['body']), {'code': 'invalid_request'})
+
+    def test_other_requests_reach_django(self):
+        self.assertEqual(self._get('/api/games/', 'user')['status'], 200)
@@ -0,0 +1,80 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from backend.infra.models import ORMGame, ORMPlayer, ORMQuestion, ORMUser
+from backend.modules.game.entities import Game, Question
+from backend.modules.game.exceptions import GameNotFound
+from backend.modules.game.repos import GameCache, GameRepo, game_cache, game_queryset
+from backend.modules.game_session.dtos import CreateGameSessionDTO
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.entities import User
+from backend.tests.utils import GameTestCase
+
+
+def make_game(game_id: int) -> Game:
+    return Game(name=f'game{game_id}', author=User('a'), rounds=[], final_round=Question('text', 'answer', 100),
+                id=game_id)
+
+
+class GameCacheTest(GameTestCase):
+    def test_least_recently_used_game_is_evicted(self):
+        cache = GameCache(max_size=2)
+        for game_id in (1, 2):
+            cache.put(make_game(game_id))
+
+        cache.get(1)
+        cache.put(make_game(3))
+
+        self.assertIsNone(cache.get(2))
+        self.assertIsNone(cache.get_by_name('game2'))
+        self.assertEqual([cache.get_by_name(f'game{game_id}').id for game_id in (1, 3)], [1, 3])
+
+    def _count_load_queries(self) -> int:
+        game_cache.clear()
+
+        with CaptureQueriesContext(connection) as context:
+            GameRepo.get('game')
+
+        return len(context.captured_queries)
+
+    def test_author_state_is_not_loaded(self):
+        self.create_users('a')
+        self.create_game('a')
+        GameSessionService().create('a', CreateGameSessionDTO('game', 2, False))
+        queries_count = self._count_load_queries()
+
+        orm_user = ORMUser.objects.get(nickname='a')
+        ORMPlayer.objects.bulk_create(ORMPlayer(user=orm_user, game_session_id=orm_user.pk, is_playing=False)
+                                      for _ in range(20))
+
+        self.assertEqual(self._count_load_queries(), queries_count)
+        author = GameRepo.get('game').author
+        self.assertEqual((author.username, author.nickname, author.game_session_id), ('a', None, None))
+
+    def test_update_invalidates_cached_game(self):
+        self.create_users('a')
+        self.create_game('a')
+        GameRepo.get('game')
+
+        game = game_queryset().get(name='game').to_domain()
+        game.name = 'renamed'
+        game.rounds[0].themes[0].questions[0].text = 'new text'
+        with self.captureOnCommitCallbacks(execute=True):
+            GameRepo.save(game)
+
+        with self.assertRaises(GameNotFound):
+            GameRepo.get('game')
+        self.assertEqual(GameRepo.get('renamed').rounds[0].themes[0].questions[0].text, 'new text')
+
+    def test_delete_invalidates_cached_game(self):
+        self.create_users('a')
+        self.create_game('a')
+        game = GameRepo.get('game')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GameRepo.delete(game)
+
+        with self.assertRaises(GameNotFound):
+            GameRepo.get_by_id(game.id)
+        self.assertFalse(ORMGame.objects.exists())
+        self.assertFalse(ORMQuestion.objects.exists())
@@ -0,0 +1,66 @@
+import io
+import json
+
+from django.contrib.auth.models import User as ORMDjangoUser
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from backend.infra.game_packs import PackStreamTooLarge, read_lines
+from backend.infra.models import ORMGame, ORMQuestion
+from backend.modules.game.services import GameService
+from backend.tests.utils import GameTestCase, game_data, game_json
+
+
+def pack_lines(*names: str) -> str:
+    return ''.join(json.dumps(game_json(name, rounds_count=3, themes_count=6, questions_count=5)) + '\n'
+                   for name in names)
+
+
+class GameImportTest(GameTestCase):
+    def setUp(self):
+        self.create_users('author')
+
+    def _count_import_queries(self, games_count: int, prefix: str) -> int:
+        games_data = [game_data(f'{prefix}{index}') for index in range(games_count)]
+
+        with CaptureQueriesContext(connection) as context:
+            GameService().import_games('author', games_data)
+
+        return len(context.captured_queries)
+
+    def test_queries_count_does_not_depend_on_games_count(self):
+        # SQLite делит большие пакетные INSERT на части, поэтому пачка берётся небольшой
+        self.assertEqual(self._count_import_queries(1, 'single'),
+                         self._count_import_queries(10, 'batch'))
+        self.assertEqual(ORMGame.objects.count(), 11)
+
+    def _post(self, body: str):
+        client = APIClient()
+        client.force_authenticate(ORMDjangoUser.objects.get(username='author'))
+
+        return client.post('/api/games/import/', body, content_type='application/x-ndjson')
+
+    def test_jsonl_is_imported(self):
+        response = self._post(pack_lines('a', 'b') + 'not json\n' + pack_lines('a'))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'importedCount': 2, 'skippedNames': ['a'], 'invalidIndexes': [2]})
+        self.assertEqual(ORMQuestion.objects.count(), 2 * (3 * 6 * 5 + 1))
+
+    def test_too_large_body_is_rejected(self):
+        body = pack_lines('a', 'b')
+
+        with override_settings(GAME_IMPORT_MAX_SIZE=len(body) - 1):
+            response = self._post(body)
+
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(ORMGame.objects.exists())
+
+    def test_stream_is_read_up_to_max_size(self):
+        lines = read_lines(io.BytesIO(b'first\nsecond\n'), 10)
+
+        self.assertEqual(next(lines), 'first\n')
+        with self.assertRaises(PackStreamTooLarge):
+            next(lines)
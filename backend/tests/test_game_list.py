@@ -0,0 +1,69 @@
+from time import monotonic
+from typing import List, Optional
+from unittest.mock import patch
+
+from django.conf import settings
+
+from backend.infra.models import ORMGame
+from backend.modules.game.dtos import GameListQueryDTO
+from backend.modules.game.repos import GameListCache, GameRepo
+from backend.modules.game.services import GameService
+from backend.tests.utils import GameTestCase
+
+
+class GameListTest(GameTestCase):
+    def setUp(self):
+        self.create_users('a', 'b')
+        # у игр автора a одинаковые автор и количество раундов, различаются только названия
+        for index in range(1, 6):
+            self.create_game('a', f'game{index}', rounds_count=1)
+        for name in ('b_game', 'quiz'):
+            self.create_game('b', name, rounds_count=1)
+
+    @staticmethod
+    def _get_pages(limit: int, search: Optional[str] = None) -> List[List[str]]:
+        pages, cursor = [], None
+        while True:
+            descriptions, cursor = GameService().get_all_descriptions(GameListQueryDTO(search, cursor, limit))
+            pages.append([description.name for description in descriptions])
+            if cursor is None:
+                return pages
+
+    def test_games_with_equal_fields_are_listed_once(self):
+        self.assertEqual(self._get_pages(1),
+                         [['b_game'], ['game1'], ['game2'], ['game3'], ['game4'], ['game5'], ['quiz']])
+
+    def test_full_last_page_has_no_next_page(self):
+        self.assertEqual(self._get_pages(2, 'game'), [['b_game', 'game1'], ['game2', 'game3'], ['game4', 'game5']])
+        self.assertEqual(self._get_pages(4, 'game'), [['b_game', 'game1', 'game2', 'game3'], ['game4', 'game5']])
+
+    def test_search_is_combined_with_cursor(self):
+        self.assertEqual(self._get_pages(1, 'b'), [['b_game'], ['quiz']])
+
+        # страница без поиска с тем же курсором закэширована под другим ключом
+        self.assertEqual([row[0] for row in GameRepo.get_descriptions(None, 'game3', 2)], ['game4', 'game5'])
+        self.assertEqual(GameRepo.get_descriptions('b', 'game3', 2), [('quiz', 'b', 1)])
+
+    def test_games_changed_by_another_process_are_listed_after_ttl(self):
+        GameRepo.get_descriptions('quiz')
+
+        ORMGame.objects.filter(name='quiz').update(name='quiz2')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(GameRepo.get_descriptions('quiz'), [('quiz', 'b', 1)])
+
+        with patch('backend.modules.game.repos.monotonic', return_value=monotonic() + settings.GAME_LIST_CACHE_TTL):
+            self.assertEqual(GameRepo.get_descriptions('quiz'), [('quiz2', 'b', 1)])
+
+
+class GameListCacheTest(GameTestCase):
+    def test_least_recently_used_page_is_evicted(self):
+        cache = GameListCache(ttl=10, max_size=2)
+        cache.put(('a', None, 1), [])
+        cache.put(('b', None, 1), [])
+
+        cache.get(('a', None, 1))
+        cache.put(('c', None, 1), [])
+
+        self.assertIsNone(cache.get(('b', None, 1)))
+        self.assertEqual(cache.get(('a', None, 1)), [])
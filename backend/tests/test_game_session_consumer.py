@@ -0,0 +1,115 @@
+from typing import Set
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+
+from backend.infra.consumers import GameSessionConsumer
+from backend.infra.registry import game_session_registry
+from backend.modules.game_session.dtos import CreateGameSessionDTO
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.dtos import LoginUserDTO
+from backend.modules.user.services import UserService
+from backend.tests.utils import GameTransactionTestCase
+
+
+class GameSessionConsumerTest(GameTransactionTestCase):
+    def setUp(self):
+        self.create_users('host', 'player')
+        self.create_game('host')
+        GameSessionService().create('host', CreateGameSessionDTO('game', 2, True))
+
+    @staticmethod
+    async def _send_commands(query_string: str, *commands):
+        communicator = WebsocketCommunicator(GameSessionConsumer.as_asgi(), f'/ws/game_session/?{query_string}')
+        connected, _ = await communicator.connect()
+        assert connected
+
+        responses = []
+        for index, (command, data) in enumerate(commands):
+            await communicator.send_json_to(dict(id=index, command=command, data=data))
+            responses.append(await communicator.receive_json_from(timeout=5))
+
+        await communicator.disconnect()
+        return responses
+
+    def test_commands_are_answered_by_id(self):
+        token = UserService().authenticate(LoginUserDTO('player', 'password')).access
+
+        join, state, unknown, invalid = async_to_sync(self._send_commands)(
+            f'token={token}',
+            ('join', {'creator': 'host'}),
+            ('get_state', None),
+            ('explode', None),
+            ('choose_question', {'theme_index': 'x'}),
+        )
+
+        self.assertEqual(join['status'], 'ok')
+        self.assertEqual(state['status'], 'ok')
+        self.assertEqual([player['nickname'] for player in state['data']['players']], ['player'])
+        self.assertEqual(unknown, {'id': 2, 'status': 'error', 'code': 'unknown_command'})
+        self.assertEqual(invalid, {'id': 3, 'status': 'error', 'code': 'invalid_request'})
+
+    def test_service_errors_are_returned_as_codes(self):
+        token = UserService().authenticate(LoginUserDTO('player', 'password')).access
+
+        [leave] = async_to_sync(self._send_commands)(f'token={token}', ('leave', None))
+
+        self.assertEqual(leave, {'id': 0, 'status': 'error', 'code': 'game_session_not_found'})
+
+    def test_commands_require_token(self):
+        [response] = async_to_sync(self._send_commands)('', ('get_state', None))
+
+        self.assertEqual(response, {'id': 0, 'status': 'error', 'code': 'not_authenticated'})
+
+    @staticmethod
+    def _get_subscribed_groups() -> Set[str]:
+        # в тесте открыт один сокет, поэтому непустые группы - это его группы
+        return {group_name for group_name, channels in get_channel_layer().groups.items() if channels}
+
+    def test_socket_follows_player_to_joined_session(self):
+        self.create_users('other_host')
+        GameSessionService().create('other_host', CreateGameSessionDTO('game', 2, True))
+        first_group, second_group = (game_session_registry.get_group_name(username)
+                                     for username in ('host', 'other_host'))
+        token = UserService().authenticate(LoginUserDTO('player', 'password')).access
+
+        async def run():
+            communicator = WebsocketCommunicator(GameSessionConsumer.as_asgi(), f'/ws/game_session/?token={token}')
+            await communicator.connect()
+
+            groups = list()
+            for index, (command, data) in enumerate((('join', {'creator': 'host'}),
+                                                     ('leave', None),
+                                                     ('join', {'creator': 'other_host'}))):
+                await communicator.send_json_to(dict(id=index, command=command, data=data))
+                response = await communicator.receive_json_from(timeout=5)
+                # игровые события группы приходят в тот же сокет, ответ на команду отличается полем id
+                while 'id' not in response:
+                    response = await communicator.receive_json_from(timeout=5)
+                assert response['status'] == 'ok', response
+                groups.append(self._get_subscribed_groups())
+
+            await communicator.disconnect()
+            groups.append(self._get_subscribed_groups())
+
+            return groups
+
+        self.assertEqual(async_to_sync(run)(), [{first_group}, set(), {second_group}, set()])
+
+    def test_authenticated_socket_ignores_username(self):
+        token = UserService().authenticate(LoginUserDTO('player', 'password')).access
+
+        async def run():
+            communicator = WebsocketCommunicator(GameSessionConsumer.as_asgi(), f'/ws/game_session/?token={token}')
+            await communicator.connect()
+            await communicator.send_json_to(dict(username='host'))
+            await communicator.send_json_to(dict(id=0, command='get_state', data=None))
+            await communicator.receive_json_from(timeout=5)
+
+            groups = self._get_subscribed_groups()
+            await communicator.disconnect()
+
+            return groups
+
+        self.assertEqual(async_to_sync(run)(), set())
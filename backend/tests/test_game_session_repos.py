@@ -0,0 +1,117 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from backend.infra.dispatcher import EventDispatcher
+from backend.infra.models import ORMGameSession, ORMPlayer, ORMUser
+from backend.modules.game.dtos import CreateGameDTO
+from backend.modules.game.repos import GameRepo
+from backend.modules.game.services import GameService
+from backend.modules.game_session.dtos import CreateGameSessionDTO, JoinGameSessionDTO
+from backend.modules.game_session.enums import Stage
+from backend.modules.game_session.repos import GameSessionRepo, game_session_queryset
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.repos import user_repo
+from backend.tests.utils import GameTestCase, question_data
+
+
+class GameSessionLoadTest(GameTestCase):
+    def setUp(self):
+        self.service = GameSessionService()
+
+    def _create_game_session(self, creator: str, players, game_name: str, is_host: bool = False) -> int:
+        self.service.create(creator, CreateGameSessionDTO(game_name, len(players) + 1, is_host))
+        for player in players:
+            self.service.join(player, JoinGameSessionDTO(creator))
+
+        user = user_repo.get(creator)
+        return user.hosted_game_session_id if is_host else user.game_session_id
+
+    def _count_get_queries(self, game_session_id: int) -> int:
+        # содержимое игры загружается один раз и дальше берётся из кэша
+        GameSessionRepo.get(game_session_id)
+
+        with CaptureQueriesContext(connection) as context:
+            GameSessionRepo.get(game_session_id)
+
+        return len(context.captured_queries)
+
+    def test_queries_count_does_not_depend_on_session_size(self):
+        users = self.create_users('a', 'b', 'c', 'd', 'e', 'f', 'g', 'h')
+        self.create_game('a', 'small', rounds_count=2, themes_count=3, questions_count=2)
+        self.create_game('a', 'big', rounds_count=3, themes_count=6, questions_count=5)
+
+        small_id = self._create_game_session('a', users[1:2], 'small')
+        big_id = self._create_game_session('c', users[3:], 'big')
+
+        self.assertEqual(self._count_get_queries(small_id), self._count_get_queries(big_id))
+
+    def test_players_history_is_not_loaded(self):
+        self.create_users('a', 'b', 'c', 'd')
+        self.create_game('a')
+        game_session_id = self._create_game_session('a', ['b'], 'game')
+        queries_count = self._count_get_queries(game_session_id)
+
+        past_game_session_id = self._create_game_session('c', ['d'], 'game')
+        for nickname in ('a', 'b'):
+            orm_user = ORMUser.objects.get(nickname=nickname)
+            ORMPlayer.objects.bulk_create(ORMPlayer(user=orm_user, game_session_id=past_game_session_id,
+                                                    is_playing=False) for _ in range(20))
+
+        with self.assertNumQueries(queries_count):
+            game_session = GameSessionRepo.get(game_session_id)
+
+        self.assertEqual([player.user.game_session_id for player in game_session.players], [game_session_id] * 2)
+
+        orm_game_session = game_session_queryset().get(pk=game_session_id)
+        self.assertEqual(len(orm_game_session.creator.players.all()), 1)
+        self.assertEqual([len(orm_player.user.players.all()) for orm_player in orm_game_session.players.all()],
+                         [1, 1])
+
+
+class AnsweredQuestionsTest(GameTestCase):
+    """
+    Отвеченные вопросы хранятся битовой маской по порядку вопросов раунда, доска может быть не прямоугольной.
+    """
+
+    def setUp(self):
+        self.create_users('a', 'b')
+        rounds = [dict(themes=[dict(name=f'theme{theme_index}',
+                                    questions=[question_data(index) for index in range(1, questions_count + 1)])
+                               for theme_index, questions_count in enumerate(themes_sizes)])
+                  for themes_sizes in ((3, 1), (1, 2))]
+        GameService().create('a', CreateGameDTO('uneven', rounds, question_data(9)))
+
+        dispatch_patcher = patch.object(EventDispatcher, 'dispatch_events')
+        dispatch_patcher.start()
+        self.addCleanup(dispatch_patcher.stop)
+
+    def test_bitmap_is_decoded_by_question_positions(self):
+        round = GameRepo.get('uneven').rounds[0]
+        answered_questions = {(0, 2), (1, 0)}
+
+        bitmap = ORMGameSession.answered_questions_from_domain(round, answered_questions)
+
+        self.assertEqual(int.from_bytes(bitmap, 'little'), 0b1100)
+        self.assertEqual(ORMGameSession(answered_questions=bitmap)._answered_questions_to_domain(round),
+                         answered_questions)
+
+    def test_round_ends_when_all_questions_are_answered(self):
+        GameSessionService().create('a', CreateGameSessionDTO('uneven', 2, False))
+        GameSessionService().join('b', JoinGameSessionDTO('a'))
+        game_session_id = user_repo.get('a').game_session_id
+
+        boards = (((0, 0), (1, 0), (0, 2), (0, 1)), ((1, 1), (0, 0), (1, 0)))
+        for round_order, board in enumerate(boards, start=1):
+            for answered_count, (theme_index, question_index) in enumerate(board, start=1):
+                game_session = GameSessionRepo.get(game_session_id)
+                self.assertEqual((game_session.current_round.order, len(game_session.answered_questions)),
+                                 (round_order, answered_count - 1))
+
+                user = game_session.current_player.user
+                game_session.choose_question(user, theme_index, question_index)
+                game_session.submit_answer(user, game_session.current_question.answer)
+                GameSessionRepo.save(game_session)
+
+        self.assertEqual(GameSessionRepo.get(game_session_id).stage, Stage.FINAL_ROUND)
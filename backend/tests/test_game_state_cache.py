@@ -0,0 +1,63 @@
+import json
+
+from django.contrib.auth.models import User as ORMDjangoUser
+from rest_framework.test import APIClient
+
+from backend.modules.game_session.dtos import CreateGameSessionDTO, JoinGameSessionDTO
+from backend.modules.game_session.repos import InMemoryGameSessionRepo, GameSessionRepo
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.dtos import ChangeUserDTO
+from backend.modules.user.repos import user_repo
+from backend.modules.user.services import UserService
+from backend.tests.utils import GameTestCase
+
+
+class GameStateCacheTest(GameTestCase):
+    def setUp(self):
+        self.create_users('a', 'b')
+        self.create_game('a')
+        GameSessionService().create('a', CreateGameSessionDTO('game', 3, False))
+        GameSessionService().join('b', JoinGameSessionDTO('a'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(ORMDjangoUser.objects.get(username='a'))
+
+    @staticmethod
+    def _get_nicknames(content: bytes):
+        return [player['nickname'] for player in json.loads(content)['players']]
+
+    def test_snapshot_is_reused_until_session_changes(self):
+        service = GameSessionService()
+        snapshot = service.get_game_state_snapshot('a')
+
+        self.assertIs(service.get_game_state_snapshot('b'), snapshot)
+
+        service.leave('b')
+        self.assertIsNot(service.get_game_state_snapshot('a'), snapshot)
+
+    def test_unchanged_state_is_not_sent_again(self):
+        response = self.client.get('/api/game_sessions/current/')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/api/game_sessions/current/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_nickname_change_invalidates_snapshot(self):
+        etag = self.client.get('/api/game_sessions/current/')['ETag']
+
+        UserService().update('b', ChangeUserDTO(nickname='bb', password='password'))
+
+        response = self.client.get('/api/game_sessions/current/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._get_nicknames(response.content), ['a', 'bb'])
+
+    def test_nickname_change_updates_sessions_in_memory(self):
+        game_session_id = user_repo.get('a').game_session_id
+        game_session = InMemoryGameSessionRepo.get(game_session_id)
+        self.addCleanup(InMemoryGameSessionRepo._game_sessions.pop, game_session_id, None)
+
+        InMemoryGameSessionRepo.refresh_user(user_repo.get('b').id, 'bb')
+
+        self.assertEqual([player.nickname for player in game_session.players], ['a', 'bb'])
+        # запись сессии из памяти не должна конфликтовать с версией в БД
+        self.assertEqual(GameSessionRepo.get_version(game_session_id), game_session.version)
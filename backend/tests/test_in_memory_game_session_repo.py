@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+from django.db import OperationalError
+
+from backend.infra.models import ORMPlayer
+from backend.modules.game_session.dtos import CreateGameSessionDTO
+from backend.modules.game_session.repos import InMemoryGameSessionRepo, GameSessionRepo
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.repos import user_repo
+from backend.tests.utils import GameTestCase
+
+
+class InMemoryGameSessionFlushTest(GameTestCase):
+    def setUp(self):
+        self.create_users('a')
+        self.create_game('a')
+        GameSessionService().create('a', CreateGameSessionDTO('game', 2, False))
+        self.game_session_id = user_repo.get('a').game_session_id
+
+        self.game_session = InMemoryGameSessionRepo.get(self.game_session_id)
+        self.game_session.players[0].score = 300
+
+        self.addCleanup(InMemoryGameSessionRepo._game_sessions.pop, self.game_session_id, None)
+        self.addCleanup(InMemoryGameSessionRepo._dirty_ids.discard, self.game_session_id)
+        self.addCleanup(InMemoryGameSessionRepo._retry_attempts.pop, self.game_session_id, None)
+        self.addCleanup(InMemoryGameSessionRepo._retry_at.pop, self.game_session_id, None)
+
+    def test_failed_flush_is_retried_with_backoff(self):
+        with patch.object(GameSessionRepo, '_update', side_effect=OperationalError('database is locked')):
+            InMemoryGameSessionRepo._flush_ids({self.game_session_id})
+            InMemoryGameSessionRepo._flush_ids({self.game_session_id})
+
+        self.assertIn(self.game_session_id, InMemoryGameSessionRepo._dirty_ids)
+        self.assertEqual(InMemoryGameSessionRepo._retry_attempts[self.game_session_id], 2)
+        self.assertNotIn(self.game_session_id, InMemoryGameSessionRepo._pop_dirty_ids())
+
+        InMemoryGameSessionRepo._retry_at[self.game_session_id] = 0
+        game_session_ids = InMemoryGameSessionRepo._pop_dirty_ids()
+        self.assertIn(self.game_session_id, game_session_ids)
+
+        InMemoryGameSessionRepo._flush_ids(game_session_ids)
+
+        self.assertNotIn(self.game_session_id, InMemoryGameSessionRepo._retry_attempts)
+        self.assertEqual(ORMPlayer.objects.get(game_session_id=self.game_session_id).score, 300)
@@ -0,0 +1,73 @@
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, override_settings
+
+from backend.infra import consumers
+from backend.infra.consumers import LobbyConsumer
+from backend.modules.game_session.dtos import CreateGameSessionDTO
+from backend.modules.game_session.lobby import Lobby, LobbyEntry
+from backend.modules.game_session.repos import lobby
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.repos import user_repo
+from backend.tests.utils import GameTestCase, IN_MEMORY_CHANNEL_LAYERS
+
+
+class LobbyTest(GameTestCase):
+    def test_created_session_survives_refresh(self):
+        self.create_users('a')
+        self.create_game('a')
+
+        with patch.object(lobby, 'refresh_interval', 0):
+            _, _, sequence = lobby.get_page()
+
+            GameSessionService().create('a', CreateGameSessionDTO('game', 2, False))
+
+            entries, _, _ = lobby.get_page()
+
+        self.assertEqual([entry.game_session_id for entry in entries], [user_repo.get('a').game_session_id])
+        self.assertEqual([event_type for _, event_type, _ in lobby.get_deltas(sequence)], ['game_session_created'])
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class LobbyConsumerTest(SimpleTestCase):
+    def setUp(self):
+        self.lobby = Lobby(list, deltas_size=2)
+        lobby_patcher = patch.object(consumers, 'lobby', self.lobby)
+        lobby_patcher.start()
+        self.addCleanup(lobby_patcher.stop)
+
+    @staticmethod
+    async def _connect(path: str):
+        communicator = WebsocketCommunicator(LobbyConsumer.as_asgi(), path)
+        await communicator.connect()
+
+        message = None if await communicator.receive_nothing() else await communicator.receive_json_from()
+        await communicator.disconnect()
+
+        return message
+
+    def test_changes_after_snapshot_are_replayed(self):
+        _, _, sequence = self.lobby.get_page()
+        self.lobby.add(LobbyEntry(1, 'a', 'game', 2, 1), 'game_session_created', {'creator': 'a'})
+
+        message = async_to_sync(self._connect)(f'/ws/lobby/?sequence={sequence}')
+
+        self.assertEqual(message, {'events': [{'event': 'game_session_created',
+                                               'data': {'creator': 'a'},
+                                               'sequence': sequence + 1}]})
+
+    def test_up_to_date_client_gets_nothing(self):
+        _, _, sequence = self.lobby.get_page()
+
+        self.assertIsNone(async_to_sync(self._connect)(f'/ws/lobby/?sequence={sequence}'))
+
+    def test_evicted_changes_require_resync(self):
+        _, _, sequence = self.lobby.get_page()
+        for game_session_id in range(3):
+            self.lobby.remove(game_session_id, 'game_session_deleted', {'creator': 'a'})
+
+        message = async_to_sync(self._connect)(f'/ws/lobby/?sequence={sequence}')
+
+        self.assertEqual(message, {'event': 'resync', 'data': {'sequence': self.lobby.sequence}})
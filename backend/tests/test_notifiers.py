@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import SimpleTestCase, override_settings
+
+from backend.core.services import to_async
+from backend.infra import notifiers
+from backend.infra.notifiers import notify_to_lobby, notification_batch
+from backend.tests.utils import IN_MEMORY_CHANNEL_LAYERS
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class NotifiersTest(SimpleTestCase):
+    def setUp(self):
+        self.channel_layer = get_channel_layer()
+        self.channel_name = async_to_sync(self.channel_layer.new_channel)()
+        async_to_sync(self.channel_layer.group_add)('lobby', self.channel_name)
+
+        channel_layer_patcher = patch.object(notifiers, 'channel_layer', self.channel_layer)
+        channel_layer_patcher.start()
+        self.addCleanup(channel_layer_patcher.stop)
+
+    def _receive(self):
+        return async_to_sync(self.channel_layer.receive)(self.channel_name)
+
+    def test_notification_is_sent_immediately_outside_batch(self):
+        notify_to_lobby({'creator': 'a'}, 'game_session_created', 1)
+
+        self.assertEqual(self._receive(), {'type': 'lobby_event',
+                                           'event': 'game_session_created',
+                                           'data': {'creator': 'a'},
+                                           'sequence': 1})
+
+    def test_batch_is_sent_as_one_message(self):
+        with notification_batch():
+            notify_to_lobby({'creator': 'a'}, 'player_joined', 1)
+            notify_to_lobby({'creator': 'a'}, 'player_left', 2)
+
+        message = self._receive()
+        self.assertEqual([event['event'] for event in message['events']], ['player_joined', 'player_left'])
+
+        notify_to_lobby({'creator': 'a'}, 'game_session_deleted', 3)
+        self.assertEqual(self._receive()['event'], 'game_session_deleted')
+
+    def test_async_entry_point_sends_notifications_from_event_loop(self):
+        class Service:
+            def leave(self):
+                notify_to_lobby({'creator': 'a'}, 'player_left', 1)
+                notify_to_lobby({'creator': 'a'}, 'game_session_deleted', 2)
+
+            async_leave = to_async(leave)
+
+        with patch.object(notifiers, 'async_to_sync', side_effect=AssertionError('notification left the event loop')):
+            async_to_sync(Service().async_leave)()
+
+        message = self._receive()
+        self.assertEqual([event['event'] for event in message['events']], ['player_left', 'game_session_deleted'])
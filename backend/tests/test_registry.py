@@ -0,0 +1,69 @@
+from time import monotonic
+from unittest.mock import patch
+
+from backend.infra.models import ORMPlayer
+from backend.infra.registry import GameSessionRegistry
+from backend.modules.game_session.dtos import CreateGameSessionDTO, JoinGameSessionDTO
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.repos import user_repo
+from backend.tests.utils import GameTestCase
+
+
+class GameSessionRegistryTest(GameTestCase):
+    def setUp(self):
+        self.create_users('a', 'b', 'c')
+        self.create_game('a')
+
+        self.registry = GameSessionRegistry(ttl=30)
+
+    def test_users_are_added_and_removed(self):
+        self.registry.add_user('a', 1)
+        self.registry.add_user('b', 1)
+        self.registry.add_user('a', 2)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.registry.get_group_name('a'), 'game_session_2')
+            self.assertEqual(self.registry.get_group_name('b'), 'game_session_1')
+        self.assertEqual(self.registry._usernames, {'game_session_1': {'b'}, 'game_session_2': {'a'}})
+
+        self.registry.remove_user('b')
+
+        self.assertEqual(self.registry._usernames, {'game_session_2': {'a'}})
+        self.assertIsNone(self.registry.get_group_name('b'))
+
+    def test_group_is_removed_with_its_users(self):
+        self.registry.add_user('a', 1)
+        self.registry.add_user('b', 1)
+        self.registry.add_user('c', 2)
+
+        self.registry.remove_group(1)
+
+        self.assertEqual(set(self.registry._group_names), {'c'})
+        self.assertEqual(self.registry._usernames, {'game_session_2': {'c'}})
+
+    def test_membership_changed_by_another_process_is_loaded_after_ttl(self):
+        service = GameSessionService()
+        for creator in ('a', 'c'):
+            service.create(creator, CreateGameSessionDTO('game', 3, False))
+        first_id, second_id = (user_repo.get(creator).game_session_id for creator in ('a', 'c'))
+        service.join('b', JoinGameSessionDTO('a'))
+
+        self.assertEqual(self.registry.get_group_name('b'), f'game_session_{first_id}')
+
+        # другой процесс переводит игрока во вторую сессию, обработчики этого реестра об этом не знают
+        ORMPlayer.objects.filter(user__user__username='b').update(game_session_id=second_id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.registry.get_group_name('b'), f'game_session_{first_id}')
+
+        with patch('backend.infra.registry.monotonic', return_value=monotonic() + self.registry.ttl + 1):
+            self.assertEqual(self.registry.get_group_name('b'), f'game_session_{second_id}')
+            self.assertEqual(self.registry._usernames[f'game_session_{second_id}'], {'b'})
+
+            ORMPlayer.objects.filter(user__user__username='b').update(is_playing=False)
+
+        with patch('backend.infra.registry.monotonic', return_value=monotonic() + 2 * self.registry.ttl + 2):
+            self.assertIsNone(self.registry.get_group_name('b'))
+
+        self.assertNotIn('b', self.registry._group_names)
+        self.assertNotIn(f'game_session_{second_id}', self.registry._usernames)
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from importlib import reload
+from unittest.mock import patch
+
+from django.apps import apps
+from django.test import override_settings
+from django.utils import timezone
+
+from backend.config import asgi
+
+from backend.infra.dispatcher import EventDispatcher
+from backend.infra.models import ORMGameSession
+from backend.infra.timers import Timers
+from backend.modules.game_session import event_handlers
+from backend.modules.game_session.dtos import CreateGameSessionDTO
+from backend.modules.game_session.enums import Stage
+from backend.modules.game_session.repos import GameSessionRepo
+from backend.modules.game_session.services import GameSessionService
+from backend.tests.utils import GameTestCase
+
+
+class StartupTest(GameTestCase):
+    def test_ready_does_not_query_database_or_start_timers(self):
+        with patch.object(EventDispatcher, 'handlers', dict()), \
+                patch.object(EventDispatcher, 'immediate_handlers', set()), \
+                patch.object(Timers, 'start') as start_timer, \
+                self.assertNumQueries(0):
+            apps.get_app_config('backend').ready()
+
+        start_timer.assert_not_called()
+
+    def test_asgi_entry_point_schedules_timer_recovery(self):
+        for is_enabled in (True, False):
+            with self.subTest(is_enabled=is_enabled), \
+                    override_settings(TIMER_RECOVERY_ENABLED=is_enabled), \
+                    patch.object(Timers, 'start') as start_timer:
+                reload(asgi)
+
+            if is_enabled:
+                start_timer.assert_called_once_with(key='recover_timers', interval=0,
+                                                    callback=event_handlers.recover_timers, args=())
+            else:
+                start_timer.assert_not_called()
+
+    def test_timer_recovery_reads_only_active_sessions(self):
+        creators = self.create_users('a', 'b', 'c')
+        self.create_game('a')
+        for creator in creators:
+            GameSessionService().create(creator, CreateGameSessionDTO('game', 2, False))
+
+        deadline = timezone.now() + timedelta(seconds=30)
+        ORMGameSession.objects.filter(creator__nickname='a').update(stage=Stage.ANSWERING, timer_deadline=deadline)
+        ORMGameSession.objects.filter(creator__nickname='b').update(stage=Stage.END_GAME, timer_deadline=deadline)
+        ORMGameSession.objects.filter(creator__nickname='c').update(stage=Stage.ANSWERING)
+
+        self.assertEqual([stage for _, stage, _ in GameSessionRepo.get_timer_deadlines()], [Stage.ANSWERING])
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from time import monotonic
+from unittest.mock import patch
+
+from django.db import OperationalError
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from backend.infra.timers import Timers, TIMER_RECOVERY_INTERVAL
+from backend.modules.game_session import event_handlers
+from backend.modules.game_session.enums import Stage
+from backend.modules.game_session.repos import game_session_repo
+
+GAME_SESSION_ID = -1
+
+
+class TimerRecoveryTest(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(event_handlers._armed_deadlines.pop, GAME_SESSION_ID, None)
+        self.addCleanup(Timers.stop, GAME_SESSION_ID)
+        # recover_timers взводит своё следующее выполнение в общем планировщике
+        self.addCleanup(Timers.stop, 'recover_timers')
+
+    def test_recovery_is_rescheduled_after_failure(self):
+        Timers.stop('recover_timers')
+
+        with patch.object(game_session_repo, 'get_timer_deadlines', side_effect=OperationalError):
+            with self.assertRaises(OperationalError):
+                event_handlers.recover_timers()
+
+        entry = Timers._timers['recover_timers']
+        self.assertGreater(entry.deadline, monotonic() + TIMER_RECOVERY_INTERVAL - 1)
+        self.assertIs(entry.callback, event_handlers.recover_timers)
+
+    def test_recovery_does_not_replace_newer_timer(self):
+        recovered_deadline = timezone.now() + timedelta(seconds=30)
+        newer_deadline = recovered_deadline + timedelta(seconds=5)
+        event_handlers._arm_timer(GAME_SESSION_ID, newer_deadline, print)
+
+        with patch.object(game_session_repo, 'get_timer_deadlines',
+                          return_value=[(GAME_SESSION_ID, Stage.ANSWERING, recovered_deadline)]):
+            event_handlers.recover_timers()
+
+        _, armed_deadline, _ = Timers._timers[GAME_SESSION_ID].args
+        self.assertEqual(armed_deadline, newer_deadline)
+
+    def test_recovery_arms_unknown_timer(self):
+        recovered_deadline = timezone.now() + timedelta(seconds=30)
+
+        with patch.object(game_session_repo, 'get_timer_deadlines',
+                          return_value=[(GAME_SESSION_ID, Stage.FINAL_ROUND, recovered_deadline)]):
+            event_handlers.recover_timers()
+
+        _, armed_deadline, callback = Timers._timers[GAME_SESSION_ID].args
+        self.assertEqual(armed_deadline, recovered_deadline)
+        self.assertEqual(callback.__name__, 'final_round_timeout')
@@ -0,0 +1,53 @@
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+from threading import Event, Lock
+from typing import List
+
+from django.test import SimpleTestCase
+
+from backend.infra.timers import Timers
+
+
+class TimersTest(SimpleTestCase):
+    def setUp(self):
+        self.fired: List[str] = list()
+        self.fired_lock = Lock()
+        self.done = Event()
+
+    def _fire(self, name: str):
+        with self.fired_lock:
+            self.fired.append(name)
+
+    def test_fires_in_deadline_order(self):
+        Timers.start(('order', 3), 0.15, self._fire, ('third',))
+        Timers.start(('order', 1), 0.05, self._fire, ('first',))
+        Timers.start(('order', 2), 0.1, self._fire, ('second',))
+        Timers.start(('order', 'done'), 0.2, self.done.set, ())
+
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual(self.fired, ['first', 'second', 'third'])
+
+    def test_stopped_and_restarted_timers(self):
+        Timers.start(('stop', 1), 0.05, self._fire, ('stopped',))
+        Timers.start(('stop', 2), 0.05, self._fire, ('restarted early',))
+        Timers.stop(('stop', 1))
+        Timers.start(('stop', 2), 0.1, self._fire, ('restarted',))
+        Timers.start(('stop', 'done'), 0.2, self.done.set, ())
+
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual(self.fired, ['restarted'])
+
+    def test_failed_callback_is_reported(self):
+        def fail():
+            raise ValueError('timer failure')
+
+        output = StringIO()
+        with redirect_stdout(output), redirect_stderr(output):
+            Timers.start(('fail', 1), 0.05, fail, ())
+            Timers.start(('fail', 2), 0.1, self._fire, ('after failure',))
+            Timers.start(('fail', 'done'), 0.15, self.done.set, ())
+
+            self.assertTrue(self.done.wait(2))
+
+        self.assertIn("ValueError: timer failure", output.getvalue())
+        self.assertEqual(self.fired, ['after failure'])
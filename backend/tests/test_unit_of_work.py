@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+from django.db.models import F
+
+from backend.core.repos import identity_map, unit_of_work
+from backend.infra.dispatcher import EventDispatcher
+from backend.infra.models import ORMGameSession, ORMPlayer
+from backend.modules.game.repos import game_repo
+from backend.modules.game_session.dtos import CreateGameSessionDTO
+from backend.modules.game_session.entities import GameSession
+from backend.modules.game_session.exceptions import ConcurrentModification
+from backend.modules.game_session.repos import GameSessionRepo
+from backend.modules.game_session.services import GameSessionService
+from backend.modules.user.repos import user_repo
+from backend.tests.utils import GameTestCase
+
+
+class IdentityMapTest(GameTestCase):
+    def test_entity_is_loaded_once(self):
+        self.create_users('a')
+        self.create_game('a')
+        GameSessionService().create('a', CreateGameSessionDTO('game', 2, False))
+        game_session_id = user_repo.get('a').game_session_id
+        GameSessionRepo.get(game_session_id)
+
+        with identity_map():
+            game_session = GameSessionRepo.get(game_session_id)
+
+            with self.assertNumQueries(0):
+                self.assertIs(GameSessionRepo.get(game_session_id), game_session)
+
+        self.assertIsNot(GameSessionRepo.get(game_session_id), game_session)
+
+
+class UnitOfWorkTest(GameTestCase):
+    def setUp(self):
+        self.create_users('a', 'b', 'c')
+        self.create_game('a')
+        for creator in ('a', 'b'):
+            GameSessionService().create(creator, CreateGameSessionDTO('game', 3, False))
+
+        self.first_id, self.second_id = (user_repo.get(creator).game_session_id for creator in ('a', 'b'))
+
+        dispatch_patcher = patch.object(EventDispatcher, 'dispatch_events')
+        self.dispatch_events = dispatch_patcher.start()
+        self.addCleanup(dispatch_patcher.stop)
+
+    def test_writes_are_committed_together_and_events_follow(self):
+        with unit_of_work():
+            first = GameSessionRepo.get(self.first_id)
+            first.join(user_repo.get('c'))
+            GameSessionRepo.save(first)
+            new = GameSessionRepo.save(GameSession(creator=user_repo.get('c'),
+                                                   host=None,
+                                                   game=game_repo.get('game'),
+                                                   max_players=2))
+
+            self.assertIsNone(new.id)
+            self.assertFalse(ORMPlayer.objects.filter(game_session_id=self.first_id, user__nickname='c').exists())
+            self.dispatch_events.assert_not_called()
+
+        self.assertTrue(ORMGameSession.objects.filter(pk=new.id).exists())
+        self.assertTrue(ORMPlayer.objects.filter(game_session_id=self.first_id, user__nickname='c').exists())
+        self.assertEqual([call.args[0] for call in self.dispatch_events.call_args_list], [first, new])
+
+    def test_failed_flush_rolls_back_all_writes(self):
+        sessions_count = ORMGameSession.objects.count()
+
+        with self.assertRaises(ConcurrentModification), unit_of_work():
+            first = GameSessionRepo.get(self.first_id)
+            first.join(user_repo.get('c'))
+            GameSessionRepo.save(first)
+            GameSessionRepo.save(GameSession(creator=user_repo.get('c'),
+                                             host=None,
+                                             game=game_repo.get('game'),
+                                             max_players=2))
+
+            GameSessionRepo.save(GameSessionRepo.get(self.second_id))
+            # сессию изменил другой запрос после загрузки
+            ORMGameSession.objects.filter(pk=self.second_id).update(version=F('version') + 1)
+
+        self.assertEqual(ORMGameSession.objects.count(), sessions_count)
+        self.assertFalse(ORMPlayer.objects.filter(game_session_id=self.first_id, user__nickname='c').exists())
+        self.dispatch_events.assert_not_called()
@@ -0,0 +1,80 @@
+from typing import Dict, List
+from unittest.mock import patch
+
+from channels.layers import get_channel_layer
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from backend.infra import notifiers
+from backend.modules.game.dtos import CreateGameDTO
+from backend.modules.game.repos import game_cache, game_list_cache
+from backend.modules.game.services import GameService
+from backend.modules.user.dtos import CreateUserDTO
+from backend.modules.user.services import UserService
+
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+def question_data(index: int) -> Dict:
+    return dict(text=f'text{index}', answer=f'answer{index}', value=100 * index)
+
+
+def game_json(name: str, rounds_count: int = 2, themes_count: int = 3, questions_count: int = 2) -> Dict:
+    rounds = [dict(themes=[dict(name=f'theme{theme_index}',
+                                questions=[question_data(index) for index in range(1, questions_count + 1)])
+                           for theme_index in range(themes_count)])
+              for _ in range(rounds_count)]
+
+    return dict(name=name, rounds=rounds, finalRound=question_data(9))
+
+
+def game_data(name: str, **sizes) -> CreateGameDTO:
+    data = game_json(name, **sizes)
+
+    return CreateGameDTO(data['name'], data['rounds'], data['finalRound'])
+
+
+class GameTestMixin:
+    """
+    Тест с пользователями и играми, уведомления отправляются в канальный слой в памяти.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        # нотификатор получает канальный слой при импорте, до подмены настроек
+        channel_layer_patcher = patch.object(notifiers, 'channel_layer', get_channel_layer())
+        channel_layer_patcher.start()
+        cls.addClassCleanup(channel_layer_patcher.stop)
+
+    def _post_teardown(self):
+        # после отката или очистки таблиц закэшированные игры ссылались бы на удалённые строки
+        game_cache.clear()
+        game_list_cache.clear()
+
+        super()._post_teardown()
+
+    @staticmethod
+    def create_users(*usernames: str) -> List[str]:
+        for username in usernames:
+            UserService().create(CreateUserDTO(username, 'password'))
+
+        return list(usernames)
+
+    @staticmethod
+    def create_game(author: str, name: str = 'game', **sizes) -> str:
+        GameService().create(author, game_data(name, **sizes))
+
+        return name
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, EVENT_DISPATCH_MODE='sync')
+class GameTestCase(GameTestMixin, TestCase):
+    pass
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, EVENT_DISPATCH_MODE='sync')
+class GameTransactionTestCase(GameTestMixin, TransactionTestCase):
+    """
+    Для тестов, в которых БД читают другие потоки: они не видят данные незафиксированной транзакции TestCase.
+    """
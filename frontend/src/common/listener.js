@@ -18,7 +18,8 @@ class Listener {
 
         this.ws.onmessage = (message) => {
             const data = JSON.parse(message.data);
-            this.handler(data.event, data.data);
+            const events = data.events ?? [data];
+            events.forEach(({event, data, sequence}) => this.handler(event, data, sequence));
         }
     }
 
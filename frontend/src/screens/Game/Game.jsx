@@ -13,7 +13,7 @@ import useStore from "../../common/RootStore";
 import GameSessionListener from "./listener";
 import {getNickname} from "../../common/auth/services";
 import {chooseQuestion, getAvatarUrl, getGameState, leaveGameSession, submitAnswer, allowAnswers,
-    confirmAnswer, rejectAnswer, startGame} from "./services";
+    confirmAnswer, rejectAnswer, startGame, setGameSessionListener} from "./services";
 
 const AnswerForm = () => {
     return (
@@ -471,6 +471,7 @@ const Game = observer(() => {
 
         const listener = new GameSessionListener(listenerUrls.gameSession);
         listener.setHandler(store.eventHandler);
+        setGameSessionListener(listener);
 
         if (!store.isInitialized)
             getGameState()
@@ -489,6 +490,7 @@ const Game = observer(() => {
                 });
 
         return () => {
+            setGameSessionListener(null);
             listener?.close();
             store.clear();
         }
@@ -2,12 +2,63 @@ import {Listener} from "../../common/listener";
 
 class GameSessionListener extends Listener {
     constructor(url) {
-        super(url);
+        const accessToken = localStorage.getItem("access_token");
+        super(accessToken ? `${url}?token=${accessToken}` : url);
+
+        this.isAuthenticated = Boolean(accessToken);
+        this.commandId = 0;
+        this.pendingCommands = new Map();
+
         this.ws.onopen = () => {
-            const username = localStorage.getItem("username");
-            this.ws.send(JSON.stringify({username}));
+            if (!accessToken) {
+                const username = localStorage.getItem("username");
+                this.ws.send(JSON.stringify({username}));
+            }
+        }
+
+        this.ws.onclose = () => {
+            this.pendingCommands.forEach(({reject}) => reject('connection_closed'));
+            this.pendingCommands.clear();
+        }
+    }
+
+    get isOpen() {
+        return this.isAuthenticated && this.ws.readyState === WebSocket.OPEN;
+    }
+
+    setHandler(handler) {
+        super.setHandler(handler);
+
+        const eventHandler = this.ws.onmessage;
+        this.ws.onmessage = (message) => {
+            const data = JSON.parse(message.data);
+            if (data.status !== undefined)
+                this.resolveCommand(data);
+            else
+                eventHandler(message);
         }
     }
+
+    sendCommand(command, data) {
+        const id = ++this.commandId;
+
+        return new Promise((resolve, reject) => {
+            this.pendingCommands.set(id, {resolve, reject});
+            this.ws.send(JSON.stringify({id, command, data}));
+        });
+    }
+
+    resolveCommand({id, status, data, code}) {
+        const pendingCommand = this.pendingCommands.get(id);
+        if (!pendingCommand)
+            return;
+
+        this.pendingCommands.delete(id);
+        if (status === 'ok')
+            pendingCommand.resolve(data);
+        else
+            pendingCommand.reject(code);
+    }
 }
 
-export default GameSessionListener;
\ No newline at end of file
+export default GameSessionListener;
@@ -16,38 +16,56 @@ const joinGameSession = (creator) => {
     return axios.post(url, {creator});
 };
 
+let gameSessionListener = null;
+
+const setGameSessionListener = (listener) => {
+    gameSessionListener = listener;
+};
+
+// игровые команды отправляются по вебсокету игры, а если он не подключён или не аутентифицирован - HTTP-запросом
+const sendCommand = (command, data, request) => {
+    if (!gameSessionListener?.isOpen)
+        return request();
+
+    return gameSessionListener.sendCommand(command, data)
+        .then(data => ({data}))
+        .catch(errorCode => errorCode === 'not_authenticated' ? request() : Promise.reject(errorCode));
+};
+
 const leaveGameSession = () => {
     const url = 'game_sessions/current/actions/leave/';
-    return axios.delete(url);
+    return sendCommand('leave', undefined, () => axios.delete(url));
 };
 
 const startGame = () => {
     const url = 'game_sessions/current/actions/start/';
-    return axios.post(url);
+    return sendCommand('start', undefined, () => axios.post(url));
 };
 
 const chooseQuestion = (themeIndex, questionIndex) => {
     const url = 'game_sessions/current/question/';
-    return axios.post(url, {themeIndex, questionIndex});
+    return sendCommand('choose_question', {themeIndex, questionIndex},
+        () => axios.post(url, {themeIndex, questionIndex}));
 };
 const allowAnswers = () => {
     const url = 'game_sessions/current/actions/allow_answers/';
-    return axios.post(url);
+    return sendCommand('allow_answers', undefined, () => axios.post(url));
 };
 
 const submitAnswer = (answer) => {
     const url = 'game_sessions/current/answer/';
-    return axios.post(url, answer ? {answer} : undefined);
+    return sendCommand('submit_answer', answer ? {answer} : undefined,
+        () => axios.post(url, answer ? {answer} : undefined));
 };
 
 const confirmAnswer = () => {
     const url = 'game_sessions/current/actions/confirm_answer/';
-    return axios.post(url);
+    return sendCommand('confirm_answer', undefined, () => axios.post(url));
 };
 
 const rejectAnswer = () => {
     const url = 'game_sessions/current/actions/reject_answer/';
-    return axios.post(url);
+    return sendCommand('reject_answer', undefined, () => axios.post(url));
 };
 
 const getHostImageUrl = (stage) => {
@@ -60,5 +78,5 @@ const getAvatarUrl = () => {
 
 export {
     getGameState, createGameSession, joinGameSession, leaveGameSession, startGame, chooseQuestion, allowAnswers,
-    confirmAnswer, rejectAnswer, submitAnswer, getHostImageUrl, getAvatarUrl
+    confirmAnswer, rejectAnswer, submitAnswer, getHostImageUrl, getAvatarUrl, setGameSessionListener
 };
\ No newline at end of file
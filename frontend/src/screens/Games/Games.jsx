@@ -129,25 +129,52 @@ const Games = observer(() => {
 
     useEffect(() => {
         document.title = 'Игры';
+    }, []);
 
-        getGameDescriptions()
+    useEffect(() => {
+        // запрос отправляется, когда пользователь перестал набирать название
+        const timeout = setTimeout(() => getGameDescriptions(store.search)
             .then(result => {
-                store.initialize(result.data);
+                store.initialize(result.data, result.headers['x-next-cursor']);
             })
             .catch(error => {
                 console.log(error);
-            });
-    }, []);
+            }), 300);
+
+        return () => clearTimeout(timeout);
+    }, [store.search]);
+
+    const loadNextPage = () => getGameDescriptions(store.search, store.nextCursor)
+        .then(result => {
+            store.addPage(result.data, result.headers['x-next-cursor']);
+        })
+        .catch(error => {
+            console.log(error);
+        });
 
     return (
         <div className='games'>
             <h1>Игры</h1>
 
+            <input
+                className='games-search'
+                type='text'
+                placeholder='Название или автор'
+                value={store.search}
+                onChange={event => store.setSearch(event.target.value)}
+            />
+
             {store.descriptions.size > 0
                 ? <GamesTable/>
                 : <h3>список игр пуст</h3>
             }
 
+            {store.nextCursor &&
+                <button onClick={loadNextPage}>
+                    Показать ещё
+                </button>
+            }
+
             <button onClick={() => isAuthenticated()
                 ? navigate('/games/new')
                 : toast("Сначала надо войти")}>
@@ -10,10 +10,18 @@ const GameDescription = types
 const GamesStore = types
     .model({
         descriptions: types.map(GameDescription),
-        chosenGame: types.maybe(types.reference(GameDescription))
+        chosenGame: types.maybe(types.reference(GameDescription)),
+        search: '',
+        nextCursor: types.maybeNull(types.string)
     })
     .actions(self => ({
-        initialize(data) {
+        initialize(data, nextCursor) {
+            self.chosenGame = undefined;
+            self.descriptions.clear();
+            self.addPage(data, nextCursor);
+        },
+        addPage(data, nextCursor) {
+            self.nextCursor = nextCursor || null;
             data.forEach(descr => {
                 self.addDescription(
                     descr.name,
@@ -28,6 +36,9 @@ const GamesStore = types
         },
         setChosenGame(description) {
             self.chosenGame = description;
+        },
+        setSearch(search) {
+            self.search = search;
         }
     }))
 
@@ -1,8 +1,8 @@
 import axios from "axios";
 
-const getGameDescriptions = () => {
+const getGameDescriptions = (search, cursor) => {
         const url = '/games/';
-        return axios.get(url);
+        return axios.get(url, {params: {search: search || undefined, cursor: cursor || undefined}});
 };
 
 export {getGameDescriptions};
\ No newline at end of file
@@ -4,7 +4,8 @@ import {values} from 'mobx';
 import {observer} from "mobx-react-lite";
 import {toast} from "react-toastify";
 
-import {Listener, listenerUrls} from "../../common/listener";
+import {listenerUrls} from "../../common/listener";
+import LobbyListener from "./listener";
 import useStore from "../../common/RootStore";
 import {joinGameSession} from "../Game/services";
 import {getGameSessionDescriptions} from "./services";
@@ -83,18 +84,36 @@ const Lobby = observer(() => {
     useEffect(() => {
         document.title = 'Лобби'
 
-        const listener = new Listener(listenerUrls.lobby);
-        listener.setHandler(store.eventHandler);
-
-        getGameSessionDescriptions()
+        const loadDescriptions = () => getGameSessionDescriptions()
             .then(result => {
-                store.initialize(result.data);
+                store.initialize(result.data, Number(result.headers['x-sequence']));
             })
             .catch(error => {
                 console.log(error);
             });
 
-        return () => listener.close()
+        let listener = null;
+        let isUnmounted = false;
+
+        // подписка открывается после получения снимка, чтобы сервер прислал изменения, сделанные после него
+        loadDescriptions()
+            .then(() => {
+                if (isUnmounted)
+                    return;
+
+                listener = new LobbyListener(listenerUrls.lobby, () => store.sequence);
+                listener.setHandler((event, data, sequence) => {
+                    if (event === 'resync')
+                        loadDescriptions();
+                    else
+                        store.eventHandler(event, data, sequence);
+                });
+            });
+
+        return () => {
+            isUnmounted = true;
+            listener?.close();
+        }
     }, []);
     return (
         <div className='lobby'>
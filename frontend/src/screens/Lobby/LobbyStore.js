@@ -20,10 +20,15 @@ const GameSessionDescription = types
 
 const LobbyStore = types
     .model({
-        descriptions: types.map(GameSessionDescription)
+        descriptions: types.map(GameSessionDescription),
+        sequence: types.maybeNull(types.number)
     })
     .actions(self => ({
-        eventHandler(event, data) {
+        eventHandler(event, data, sequence) {
+            if (self.sequence !== null && sequence <= self.sequence)
+                return;
+            self.sequence = sequence ?? self.sequence;
+
             const handlers = {
                 'game_session_created': self.onGameSessionCreated,
                 'game_session_deleted': self.onGameSessionDeleted,
@@ -45,8 +50,9 @@ const LobbyStore = types
         onPlayerLeft(data) {
             self.descriptions.get(data.creator).setPlayerLeft();
         },
-        initialize(data) {
+        initialize(data, sequence) {
             self.clear();
+            self.sequence = sequence;
             data.forEach(descriptionData =>
                 self.descriptions.put(descriptionData)
             )
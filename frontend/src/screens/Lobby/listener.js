@@ -0,0 +1,43 @@
+import {Listener} from "../../common/listener";
+
+const RECONNECT_DELAY = 1000;
+
+const withSequence = (url, sequence) => sequence !== null ? `${url}?sequence=${sequence}` : url;
+
+class LobbyListener extends Listener {
+    constructor(url, getSequence) {
+        super(withSequence(url, getSequence()));
+
+        this.baseUrl = url;
+        this.getSequence = getSequence;
+        this.isClosed = false;
+
+        this.ws.onclose = () => this.scheduleReconnect();
+    }
+
+    scheduleReconnect() {
+        if (this.isClosed)
+            return;
+
+        // случайная задержка, чтобы клиенты не переподключались одновременно после перезапуска сервера
+        setTimeout(() => this.reconnect(), RECONNECT_DELAY * (1 + Math.random()));
+    }
+
+    reconnect() {
+        if (this.isClosed)
+            return;
+
+        const onmessage = this.ws.onmessage;
+
+        this.ws = new WebSocket(withSequence(this.baseUrl, this.getSequence()));
+        this.ws.onmessage = onmessage;
+        this.ws.onclose = () => this.scheduleReconnect();
+    }
+
+    close() {
+        this.isClosed = true;
+        super.close();
+    }
+}
+
+export default LobbyListener;